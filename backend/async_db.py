@@ -0,0 +1,113 @@
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Optional, Sequence
+
+import aiomysql
+
+from backend.config import settings
+from backend.db import bulk_insert_statements
+from backend.rows import RowMapper
+
+logger = logging.getLogger(__name__)
+
+_pool: Optional[aiomysql.Pool] = None
+_pool_lock: Optional[asyncio.Lock] = None
+
+
+async def get_pool() -> aiomysql.Pool:
+    """Return the asyncio MySQL pool, creating it on first use.
+
+    Sized by the same MYSQL_POOL_* settings as the sync pool in backend.db.
+    Statements use the same %s paramstyle, so services share SQL between
+    their sync and async variants.
+    """
+    global _pool, _pool_lock
+    if _pool is None:
+        if _pool_lock is None:
+            _pool_lock = asyncio.Lock()
+        async with _pool_lock:
+            if _pool is None:
+                logger.info(
+                    "Creating async MySQL pool: host=%s port=%s db=%s maxsize=%s",
+                    settings.MYSQL_HOST, settings.MYSQL_PORT, settings.MYSQL_DATABASE,
+                    settings.MYSQL_POOL_SIZE + settings.MYSQL_POOL_MAX_OVERFLOW,
+                )
+                _pool = await aiomysql.create_pool(
+                    host=settings.MYSQL_HOST,
+                    port=settings.MYSQL_PORT,
+                    user=settings.MYSQL_USER,
+                    password=settings.MYSQL_PASSWORD,
+                    db=settings.MYSQL_DATABASE,
+                    minsize=0,
+                    maxsize=settings.MYSQL_POOL_SIZE + settings.MYSQL_POOL_MAX_OVERFLOW,
+                    pool_recycle=settings.MYSQL_POOL_RECYCLE,
+                    autocommit=False,
+                    charset="utf8mb4",
+                )
+    return _pool
+
+
+@asynccontextmanager
+async def transaction(dictionary: bool = False) -> AsyncIterator[aiomysql.Cursor]:
+    """Yield a cursor inside a transaction: commit on success, roll back on error."""
+    pool = await get_pool()
+    async with pool.acquire() as conn:
+        cursor_cls = aiomysql.DictCursor if dictionary else aiomysql.Cursor
+        cursor = await conn.cursor(cursor_cls)
+        try:
+            yield cursor
+            await conn.commit()
+        except BaseException:
+            await conn.rollback()
+            raise
+        finally:
+            await cursor.close()
+
+
+async def fetch_one(sql: str, params: Sequence[Any] = (), dictionary: bool = True,
+                    mapper: Optional[RowMapper] = None) -> Optional[Any]:
+    """Fetch one row; with *mapper*, a tuple row mapped through it."""
+    async with transaction(dictionary=dictionary and mapper is None) as cursor:
+        await cursor.execute(sql, params)
+        row = await cursor.fetchone()
+        if mapper is None or row is None:
+            return row
+        return mapper.map(cursor.description, [row])[0]
+
+
+async def fetch_all(sql: str, params: Sequence[Any] = (), dictionary: bool = True,
+                    mapper: Optional[RowMapper] = None) -> list:
+    """Fetch all rows; with *mapper*, tuple rows mapped through it."""
+    async with transaction(dictionary=dictionary and mapper is None) as cursor:
+        await cursor.execute(sql, params)
+        rows = await cursor.fetchall()
+        if mapper is None:
+            return list(rows)
+        return mapper.map(cursor.description, rows)
+
+
+async def execute(sql: str, params: Sequence[Any] = ()) -> tuple[int, int]:
+    """Run one statement and commit. Returns (rowcount, lastrowid)."""
+    async with transaction() as cursor:
+        await cursor.execute(sql, params)
+        return cursor.rowcount, cursor.lastrowid
+
+
+async def bulk_insert(cursor: aiomysql.Cursor, table: str, columns: Sequence[str],
+                      rows: Sequence[Sequence[Any]], **kwargs) -> int:
+    """Async version of backend.db.bulk_insert (runs on the caller's transaction)."""
+    affected = 0
+    for sql, params in bulk_insert_statements(table, columns, rows, **kwargs):
+        await cursor.execute(sql, params)
+        affected += cursor.rowcount
+    return affected
+
+
+async def close_pool() -> None:
+    """Close the async pool (application shutdown)."""
+    global _pool
+    if _pool is not None:
+        _pool.close()
+        await _pool.wait_closed()
+        _pool = None
@@ -0,0 +1,126 @@
+"""Measure per-request overhead of the tracing and SPA fallback middleware.
+
+Compares the previous BaseHTTPMiddleware-based versions (kept here for the
+comparison only) with the ASGI ones in backend/middleware.py, on a trivial
+route driven straight through ASGI (no server, no sockets).  Logging is
+disabled so only the middleware machinery is measured.
+
+Usage (from the project root):
+    python -m backend.bench_middleware                # 20000 requests per stack
+    python -m backend.bench_middleware -n 50000
+"""
+import argparse
+import asyncio
+import logging
+import tempfile
+import time
+import uuid
+from pathlib import Path
+
+from starlette.applications import Starlette
+from starlette.middleware import Middleware
+from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.requests import Request
+from starlette.responses import FileResponse, PlainTextResponse
+from starlette.routing import Route
+
+from backend.logging_config import request_id_ctx
+from backend.middleware import RequestTracingMiddleware, SPAFallbackMiddleware
+
+logger = logging.getLogger(__name__)
+
+
+class BaseHTTPTracingMiddleware(BaseHTTPMiddleware):
+    """The former main.RequestTracingMiddleware."""
+
+    async def dispatch(self, request: Request, call_next):
+        rid = request.headers.get("x-request-id") or uuid.uuid4().hex[:12]
+        request_id_ctx.set(rid)
+        request.state.request_id = rid
+        logger.info(">>> %s %s  user=%s", request.method, request.url.path, "-")
+        start = time.perf_counter()
+        response = await call_next(request)
+        duration_ms = (time.perf_counter() - start) * 1000
+        logger.info("<<< %s %s  status=%s  %.0fms",
+                    request.method, request.url.path, response.status_code, duration_ms)
+        response.headers["X-Request-ID"] = rid
+        return response
+
+
+class BaseHTTPSPAFallbackMiddleware(BaseHTTPMiddleware):
+    """The former main.spa_fallback."""
+
+    def __init__(self, app, dist: Path):
+        super().__init__(app)
+        self.dist = dist
+
+    async def dispatch(self, request: Request, call_next):
+        response = await call_next(request)
+        if request.method == "GET" and response.status_code == 404 and not request.url.path.startswith("/api/"):
+            rel = request.url.path.lstrip("/")
+            candidate = self.dist / rel
+            if rel and candidate.is_file():
+                return FileResponse(candidate)
+            return FileResponse(self.dist / "index.html")
+        return response
+
+
+async def _ping(request: Request):
+    return PlainTextResponse("pong")
+
+
+def _app(middleware: list[Middleware]) -> Starlette:
+    return Starlette(routes=[Route("/api/ping", _ping)], middleware=middleware)
+
+
+async def _run(app, requests: int) -> float:
+    """Drive *requests* GET /api/ping calls through *app*. Returns seconds per request."""
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET",
+        "scheme": "http", "path": "/api/ping", "raw_path": b"/api/ping", "root_path": "",
+        "query_string": b"", "headers": [(b"host", b"bench")], "client": ("127.0.0.1", 1),
+        "server": ("bench", 80),
+    }
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        pass
+
+    for _ in range(min(requests, 1000)):
+        await app(dict(scope), receive, send)
+    start = time.perf_counter()
+    for _ in range(requests):
+        await app(dict(scope), receive, send)
+    return (time.perf_counter() - start) / requests
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark middleware overhead per request.")
+    parser.add_argument("-n", "--requests", type=int, default=20000, help="Requests per stack (default 20000)")
+    args = parser.parse_args()
+
+    logging.disable(logging.CRITICAL)
+    with tempfile.TemporaryDirectory() as tmp:
+        dist = Path(tmp)
+        (dist / "index.html").write_text("<html></html>")
+        stacks = {
+            "no middleware": [],
+            "BaseHTTPMiddleware (before)": [
+                Middleware(BaseHTTPSPAFallbackMiddleware, dist=dist), Middleware(BaseHTTPTracingMiddleware),
+            ],
+            "pure ASGI (after)": [
+                Middleware(SPAFallbackMiddleware, dist=dist), Middleware(RequestTracingMiddleware),
+            ],
+        }
+        results = {name: asyncio.run(_run(_app(mw), args.requests)) for name, mw in stacks.items()}
+
+    bare = results["no middleware"]
+    print(f"{'stack':<30} {'us/request':>12} {'overhead us':>12}")
+    for name, seconds in results.items():
+        print(f"{name:<30} {seconds * 1e6:>12.1f} {(seconds - bare) * 1e6:>12.1f}")
+
+
+if __name__ == "__main__":
+    main()
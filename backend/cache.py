@@ -0,0 +1,230 @@
+"""In-process caches.
+
+TTLCache and LRUCache back single-purpose caches.  TaggedCache adds both
+bounds (entry count and age) plus tags: entries are stored with tags such
+as ``"user:42"`` and ``invalidate_tags`` drops every entry carrying one, in
+every TaggedCache, so writers need not know which caches hold derived data.
+
+Every cache registers itself by name; ``cache_stats`` reports their
+hit/miss counters (served by ``GET /api/health``).
+"""
+import collections
+import logging
+import threading
+import time
+from typing import Any, Hashable, Iterable, Optional
+
+logger = logging.getLogger(__name__)
+
+_MISSING = object()
+
+_registry: dict[str, "_StatsMixin"] = {}
+_registry_lock = threading.Lock()
+
+
+class _StatsMixin:
+    name: str
+    hits = 0
+    misses = 0
+    evictions = 0
+
+    def _register(self) -> None:
+        with _registry_lock:
+            _registry[self.name] = self
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self),
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else None,
+        }
+
+
+class TTLCache(_StatsMixin):
+    """Thread-safe in-process key/value cache whose entries expire after *ttl* seconds."""
+
+    def __init__(self, name: str, ttl: float):
+        self.name = name
+        self.ttl = ttl
+        self._data: dict[Hashable, tuple[float, Any]] = {}
+        self._lock = threading.Lock()
+        self._register()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            entry = self._data.get(key, _MISSING)
+            if entry is _MISSING:
+                self.misses += 1
+                return default
+            expires_at, value = entry
+            if expires_at <= time.monotonic():
+                del self._data[key]
+                self.misses += 1
+                return default
+            self.hits += 1
+            return value
+
+    def set(self, key: Hashable, value: Any) -> None:
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl, value)
+
+    def invalidate(self, *keys: Hashable) -> None:
+        with self._lock:
+            for key in keys:
+                self._data.pop(key, None)
+        logger.debug("Cache %s: invalidated %d key(s)", self.name, len(keys))
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+        logger.debug("Cache %s: cleared", self.name)
+
+
+class LRUCache(_StatsMixin):
+    """Thread-safe in-process cache holding at most *max_entries* keys.
+
+    Entries never expire on their own; the least recently used key is
+    evicted when the cache is full.  Callers that need freshness store it in
+    the value.
+    """
+
+    def __init__(self, name: str, max_entries: int):
+        self.name = name
+        self.max_entries = max_entries
+        self._data: collections.OrderedDict = collections.OrderedDict()
+        self._lock = threading.Lock()
+        self._register()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            value = self._data.get(key, _MISSING)
+            if value is _MISSING:
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key: Hashable, value: Any) -> None:
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, *keys: Hashable) -> None:
+        with self._lock:
+            for key in keys:
+                self._data.pop(key, None)
+        logger.debug("Cache %s: invalidated %d key(s)", self.name, len(keys))
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+        logger.debug("Cache %s: cleared", self.name)
+
+
+class TaggedCache(_StatsMixin):
+    """Thread-safe LRU cache with a TTL and tag-based invalidation.
+
+    Holds at most *max_entries* keys (least recently used evicted first),
+    each for at most *ttl* seconds.  ``generation`` changes on every
+    invalidation: a loader reads it before going to the database and passes
+    it to ``set``, which then skips storing a value that an invalidation may
+    have made stale in the meantime.
+    """
+
+    def __init__(self, name: str, max_entries: int, ttl: float):
+        self.name = name
+        self.max_entries = max_entries
+        self.ttl = ttl
+        # key -> (expires_at, value, tags)
+        self._data: collections.OrderedDict = collections.OrderedDict()
+        self._by_tag: dict[str, set[Hashable]] = {}
+        self._lock = threading.Lock()
+        self.generation = 0
+        self._register()
+
+    def _remove(self, key: Hashable) -> None:
+        _, _, tags = self._data.pop(key)
+        for tag in tags:
+            keys = self._by_tag.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._by_tag[tag]
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            entry = self._data.get(key, _MISSING)
+            if entry is _MISSING:
+                self.misses += 1
+                return default
+            if entry[0] <= time.monotonic():
+                self._remove(key)
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, key: Hashable, value: Any, tags: Iterable[str] = (), generation: Optional[int] = None) -> None:
+        with self._lock:
+            if generation is not None and generation != self.generation:
+                return
+            if key in self._data:
+                self._remove(key)
+            tags = tuple(tags)
+            self._data[key] = (time.monotonic() + self.ttl, value, tags)
+            for tag in tags:
+                self._by_tag.setdefault(tag, set()).add(key)
+            while len(self._data) > self.max_entries:
+                self._remove(next(iter(self._data)))
+                self.evictions += 1
+
+    def invalidate(self, *keys: Hashable) -> None:
+        with self._lock:
+            self.generation += 1
+            for key in keys:
+                if key in self._data:
+                    self._remove(key)
+        logger.debug("Cache %s: invalidated %d key(s)", self.name, len(keys))
+
+    def invalidate_tags(self, *tags: str) -> int:
+        """Drop every entry carrying any of *tags*. Returns the number dropped."""
+        with self._lock:
+            self.generation += 1
+            keys = set().union(*(self._by_tag.get(tag, ()) for tag in tags))
+            for key in keys:
+                self._remove(key)
+        if keys:
+            logger.debug("Cache %s: invalidated %d key(s) by tag %s", self.name, len(keys), ", ".join(tags))
+        return len(keys)
+
+    def clear(self) -> None:
+        with self._lock:
+            self.generation += 1
+            self._data.clear()
+            self._by_tag.clear()
+        logger.debug("Cache %s: cleared", self.name)
+
+
+def invalidate_tags(*tags: str) -> int:
+    """Drop entries carrying any of *tags* from every TaggedCache. Returns the number dropped."""
+    with _registry_lock:
+        caches = [c for c in _registry.values() if isinstance(c, TaggedCache)]
+    return sum(cache.invalidate_tags(*tags) for cache in caches)
+
+
+def cache_stats() -> dict[str, dict]:
+    """{cache name: {entries, hits, misses, evictions, hit_rate}} for every cache."""
+    with _registry_lock:
+        caches = list(_registry.values())
+    return {cache.name: cache.stats() for cache in caches}
@@ -8,6 +8,8 @@ class Settings:
     CONSUMER_KEY: str = os.getenv("CONSUMER_KEY", "")
     CONSUMER_SECRET: str = os.getenv("CONSUMER_SECRET", "")
     SECRET_KEY: str = os.getenv("SECRET_KEY", os.urandom(24).hex())
+    # Fernet key encrypting stored Splitwise tokens (empty disables token storage)
+    TOKEN_ENCRYPTION_KEY: str = os.getenv("TOKEN_ENCRYPTION_KEY", "")
     BACKEND_PORT: int = int(os.getenv("BACKEND_PORT", "8080"))
     FRONTEND_PORT: int = int(os.getenv("FRONTEND_PORT", "5173"))
     FRONTEND_URL: str = os.getenv("FRONTEND_URL", "http://localhost:5173")
@@ -20,5 +22,48 @@ class Settings:
     MYSQL_PASSWORD: str = os.getenv("MYSQL_PASSWORD", "")
     MYSQL_DATABASE: str = os.getenv("MYSQL_DATABASE", "splitwise_manager")
 
+    # MySQL connection pool
+    MYSQL_POOL_SIZE: int = int(os.getenv("MYSQL_POOL_SIZE", "10"))
+    MYSQL_POOL_MAX_OVERFLOW: int = int(os.getenv("MYSQL_POOL_MAX_OVERFLOW", "10"))
+    MYSQL_POOL_TIMEOUT: float = float(os.getenv("MYSQL_POOL_TIMEOUT", "10"))
+    MYSQL_POOL_RECYCLE: int = int(os.getenv("MYSQL_POOL_RECYCLE", "3600"))
+    MYSQL_POOL_PRE_PING: bool = os.getenv("MYSQL_POOL_PRE_PING", "true").lower() in ("true", "1", "yes")
+
+    # Outbound HTTP (Splitwise API)
+    HTTP_CONNECT_TIMEOUT: float = float(os.getenv("HTTP_CONNECT_TIMEOUT", "5"))
+    HTTP_READ_TIMEOUT: float = float(os.getenv("HTTP_READ_TIMEOUT", "20"))
+    HTTP_MAX_RETRIES: int = int(os.getenv("HTTP_MAX_RETRIES", "3"))
+    HTTP_BACKOFF_FACTOR: float = float(os.getenv("HTTP_BACKOFF_FACTOR", "0.5"))
+    HTTP_BACKOFF_JITTER: float = float(os.getenv("HTTP_BACKOFF_JITTER", "0.5"))
+    HTTP_POOL_MAXSIZE: int = int(os.getenv("HTTP_POOL_MAXSIZE", "20"))
+    HTTP_POOL_BLOCK: bool = os.getenv("HTTP_POOL_BLOCK", "false").lower() in ("true", "1", "yes")
+
+    # Splitwise response caches (seconds)
+    GROUPS_CACHE_TTL_SEC: int = int(os.getenv("GROUPS_CACHE_TTL_SEC", "300"))
+    CURRENCIES_CACHE_TTL_SEC: int = int(os.getenv("CURRENCIES_CACHE_TTL_SEC", "86400"))
+
+    # In-process cache of user and trip lookups (entries per cache, seconds)
+    LOOKUP_CACHE_MAX_ENTRIES: int = int(os.getenv("LOOKUP_CACHE_MAX_ENTRIES", "10000"))
+    LOOKUP_CACHE_TTL_SEC: int = int(os.getenv("LOOKUP_CACHE_TTL_SEC", "60"))
+
+    # Exchange rates
+    EXCHANGE_RATE_TTL_HOURS: int = int(os.getenv("EXCHANGE_RATE_TTL_HOURS", "12"))
+
+    # Background jobs (trip setup, initial expense sync)
+    JOB_WORKERS: int = int(os.getenv("JOB_WORKERS", "4"))
+    JOB_MAX_ATTEMPTS: int = int(os.getenv("JOB_MAX_ATTEMPTS", "3"))
+    JOB_RETRY_BACKOFF_SEC: float = float(os.getenv("JOB_RETRY_BACKOFF_SEC", "2"))
+    JOB_EVENTS_POLL_SEC: float = float(os.getenv("JOB_EVENTS_POLL_SEC", "1"))
+    JOB_HEARTBEAT_SEC: float = float(os.getenv("JOB_HEARTBEAT_SEC", "30"))
+    JOB_STALE_AFTER_SEC: float = float(os.getenv("JOB_STALE_AFTER_SEC", "120"))
+
+    # Scheduled sync of active trips (0 disables the scheduler)
+    SYNC_INTERVAL_SEC: int = int(os.getenv("SYNC_INTERVAL_SEC", "900"))
+    SYNC_CONCURRENCY: int = int(os.getenv("SYNC_CONCURRENCY", "2"))
+    SYNC_JITTER_SEC: float = float(os.getenv("SYNC_JITTER_SEC", "30"))
+
+    # Offline city gazetteer: path to a GeoNames cities file (empty disables it)
+    GAZETTEER_PATH: str = os.getenv("GAZETTEER_PATH", "")
+
 
 settings = Settings()
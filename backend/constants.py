@@ -10,5 +10,10 @@ SESSION_RESOURCE_OWNER_KEY = "resource_owner_key"
 SESSION_RESOURCE_OWNER_SECRET = "resource_owner_secret"
 SESSION_USER_ID = "user_id"
 
-# Expense fetch limit
+# Expense fetch paging: page size per get_expenses call, and a hard cap on the
+# number of pages walked so a misbehaving upstream can't loop forever.
 DEFAULT_EXPENSE_LIMIT = 100
+MAX_EXPENSE_PAGES = 500
+
+# Upper bound on the page size clients may request from local expense listings
+MAX_EXPENSE_PAGE_SIZE = 500
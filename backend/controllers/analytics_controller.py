@@ -0,0 +1,74 @@
+import logging
+from datetime import date
+from typing import Optional
+
+from fastapi import APIRouter, Request, HTTPException, Query
+
+from backend.constants import SESSION_USER_ID
+from backend.services import analytics_service, summary_service, trip_service, user_service
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(tags=["analytics"])
+
+
+async def _resolve_scope(request: Request, scope: str) -> Optional[int]:
+    """Splitwise user id to filter on for scope=user, None for scope=trip."""
+    db_user_id = request.session.get(SESSION_USER_ID)
+    if not db_user_id:
+        raise HTTPException(status_code=401, detail="Not authenticated")
+    if scope not in ("user", "trip"):
+        raise HTTPException(status_code=400, detail="scope must be 'user' or 'trip'")
+    if scope == "trip":
+        return None
+    db_user = await user_service.get_user_by_id_async(db_user_id)
+    if not db_user:
+        raise HTTPException(status_code=401, detail="Not authenticated")
+    return db_user["splitwise_id"]
+
+
+async def _require_trip_member(request: Request, group_id: str) -> None:
+    """404 unless the caller holds a trip row for *group_id* (needed for scope=trip)."""
+    db_user_id = request.session.get(SESSION_USER_ID)
+    if db_user_id not in await trip_service.get_member_user_ids_async(group_id):
+        logger.warning("Trip-scope analytics denied: group_id=%s user=%s", group_id, db_user_id)
+        raise HTTPException(status_code=404, detail="Trip not found")
+
+
+@router.get("/trip_analytics/{group_id}")
+async def get_trip_analytics(
+    request: Request,
+    group_id: str,
+    scope: str = Query("user", description="user (your shares) or trip (everyone)"),
+    date_from: Optional[date] = Query(None, description="Inclusive start date (YYYY-MM-DD)"),
+    date_to: Optional[date] = Query(None, description="Inclusive end date (YYYY-MM-DD)"),
+    top_n: int = Query(analytics_service.DEFAULT_TOP_N, ge=1, le=analytics_service.MAX_TOP_N),
+):
+    """Per-category/location/day/currency totals for a trip, aggregated in SQL."""
+    splitwise_user_id = await _resolve_scope(request, scope)
+    if splitwise_user_id is None:
+        await _require_trip_member(request, group_id)
+
+    result = await analytics_service.get_trip_analytics_async(
+        group_id,
+        splitwise_user_id=splitwise_user_id,
+        date_from=date_from.isoformat() if date_from else None,
+        date_to=date_to.isoformat() if date_to else None,
+        top_n=top_n,
+    )
+    logger.info("Trip analytics: group_id=%s scope=%s", group_id, scope)
+    return result
+
+
+@router.get("/trip_summary/{group_id}")
+async def get_trip_summary(
+    request: Request,
+    group_id: str,
+    scope: str = Query("user", description="user (your shares) or trip (everyone)"),
+):
+    """Trip totals by category and day (plus by user for scope=trip) from trip_summaries."""
+    splitwise_user_id = await _resolve_scope(request, scope)
+    if splitwise_user_id is None:
+        await _require_trip_member(request, group_id)
+
+    return await summary_service.get_trip_summary_async(group_id, splitwise_user_id)
@@ -2,6 +2,7 @@ import logging
 
 from fastapi import APIRouter, Request
 from fastapi.responses import RedirectResponse, JSONResponse
+from starlette.concurrency import run_in_threadpool
 
 from backend.constants import (
     SESSION_ACCESS_TOKEN,
@@ -11,8 +12,8 @@ from backend.constants import (
     SESSION_USER_ID,
 )
 from backend.config import settings
-from backend.dependencies import get_oauth_session
-from backend.services import auth_service, splitwise_service, user_service
+from backend.dependencies import get_splitwise_client
+from backend.services import auth_service, splitwise_async_service, token_service, user_service
 
 logger = logging.getLogger(__name__)
 
@@ -20,7 +21,7 @@ router = APIRouter(tags=["auth"])
 
 
 @router.get("/check_login")
-def check_login(request: Request):
+async def check_login(request: Request):
     is_logged_in = (
         SESSION_ACCESS_TOKEN in request.session
         and SESSION_ACCESS_TOKEN_SECRET in request.session
@@ -28,7 +29,7 @@ def check_login(request: Request):
     )
     result = {"logged_in": is_logged_in}
     if is_logged_in:
-        user = user_service.get_user_by_id(request.session[SESSION_USER_ID])
+        user = await user_service.get_user_by_id_async(request.session[SESSION_USER_ID])
         if user:
             result["user"] = {"id": user["id"], "name": user["name"], "email": user["email"]}
     logger.info("check_login: logged_in=%s user_id=%s", is_logged_in, request.session.get(SESSION_USER_ID, "-"))
@@ -46,9 +47,10 @@ def login(request: Request):
 
 
 @router.get("/callback")
-def callback(request: Request, oauth_verifier: str):
+async def callback(request: Request, oauth_verifier: str):
     logger.info("OAuth callback received")
-    tokens = auth_service.exchange_access_token(
+    tokens = await run_in_threadpool(
+        auth_service.exchange_access_token,
         resource_owner_key=request.session.get(SESSION_RESOURCE_OWNER_KEY, ""),
         resource_owner_secret=request.session.get(SESSION_RESOURCE_OWNER_SECRET, ""),
         verifier=oauth_verifier,
@@ -57,23 +59,27 @@ def callback(request: Request, oauth_verifier: str):
     request.session[SESSION_ACCESS_TOKEN_SECRET] = tokens["oauth_token_secret"]
 
     # Fetch the Splitwise profile and upsert into our users table
-    oauth = get_oauth_session(request)
-    sw_data = splitwise_service.fetch_current_user(oauth)
+    client = get_splitwise_client(request)
+    sw_data = await splitwise_async_service.fetch_current_user(client)
     sw_user = sw_data.get("user", {})
-    db_user = user_service.upsert_user(
+    db_user = await user_service.upsert_user_async(
         splitwise_id=sw_user.get("id"),
         name=f"{sw_user.get('first_name', '')} {sw_user.get('last_name', '')}".strip(),
         email=sw_user.get("email", ""),
     )
     request.session[SESSION_USER_ID] = db_user["id"]
+    # Kept server-side too so the scheduler can sync this user's active trips
+    await token_service.save_tokens_async(db_user["id"], tokens["oauth_token"], tokens["oauth_token_secret"])
     logger.info("User authenticated: db_id=%s splitwise_id=%s name=%s", db_user["id"], sw_user.get("id"), db_user["name"])
 
     return RedirectResponse(url=settings.FRONTEND_URL)
 
 
 @router.get("/logout")
-def logout(request: Request):
+async def logout(request: Request):
     user_id = request.session.get(SESSION_USER_ID, "-")
+    if user_id != "-":
+        await token_service.delete_tokens_async(user_id)
     request.session.clear()
     logger.info("User logged out: user_id=%s", user_id)
     return RedirectResponse(url=settings.FRONTEND_URL)
@@ -2,8 +2,9 @@ import logging
 
 from fastapi import APIRouter, Request
 
-from backend.dependencies import get_oauth_session
-from backend.services import splitwise_service
+from backend.dependencies import get_splitwise_client
+from backend.responses import conditional_json_response
+from backend.services import splitwise_cache
 
 logger = logging.getLogger(__name__)
 
@@ -11,7 +12,8 @@ router = APIRouter(tags=["currencies"])
 
 
 @router.get("/get_currencies")
-def get_currencies(request: Request):
+async def get_currencies(request: Request):
     logger.info("Fetching currencies")
-    oauth = get_oauth_session(request)
-    return splitwise_service.fetch_currencies(oauth)
+    client = get_splitwise_client(request)
+    result, etag = await splitwise_cache.get_currencies(client)
+    return conditional_json_response(request, result, etag)
@@ -11,7 +11,7 @@ router = APIRouter(tags=["emergency"])
 
 
 @router.get("/emergency_services")
-def get_emergency_services(
+async def get_emergency_services(
     request: Request,
     location: str = Query(..., description="City or location name"),
     category: str = Query("all", description="hospital, police, pharmacy, embassy, or all"),
@@ -25,9 +25,9 @@ def get_emergency_services(
         return {"services": {}}
 
     if category == "all":
-        result = emergency_service.get_all_emergency_services(location)
+        result = await emergency_service.get_all_emergency_services_async(location)
     else:
-        result = {category: emergency_service.get_emergency_services(location, category)}
+        result = {category: await emergency_service.get_emergency_services_async(location, category)}
 
     logger.info(
         "Emergency services for '%s' category='%s' user=%s — %s",
@@ -35,3 +35,26 @@ def get_emergency_services(
         {k: len(v) for k, v in result.items()},
     )
     return {"services": result}
+
+
+@router.get("/emergency_services/nearest")
+async def get_nearest_emergency_services(
+    request: Request,
+    lat: float = Query(..., ge=-90, le=90),
+    lon: float = Query(..., ge=-180, le=180),
+    category: str = Query("all", description="hospital, police, pharmacy, or all"),
+    k: int = Query(10, ge=1, le=50, description="Number of services to return"),
+):
+    """The k closest cached services to (lat, lon) from any city, nearest first, with distance_km."""
+    user_id = request.session.get(SESSION_USER_ID)
+    if not user_id:
+        raise HTTPException(status_code=401, detail="Not authenticated")
+
+    if category != "all" and category not in emergency_service.CATEGORY_OVERPASS_TAGS:
+        raise HTTPException(status_code=400, detail=f"Unknown category: {category}")
+    categories = None if category == "all" else [category]
+
+    services = await emergency_service.get_nearest_services_async(lat, lon, k, categories)
+    logger.info("Nearest emergency services to (%.4f, %.4f) category='%s' k=%d user=%s — %d found",
+                lat, lon, category, k, user_id, len(services))
+    return {"services": services}
@@ -1,30 +1,41 @@
 import logging
 import uuid
 from datetime import date
+from typing import Optional
 
-from fastapi import APIRouter, Request
+from fastapi import APIRouter, HTTPException, Query, Request
+from starlette.concurrency import run_in_threadpool
 
-from backend.constants import SESSION_USER_ID
-from backend.dependencies import get_oauth_session
-from backend.services import splitwise_service, expense_service, user_service
+from backend.constants import MAX_EXPENSE_PAGE_SIZE, SESSION_USER_ID
+from backend.dependencies import get_oauth_session, get_splitwise_client
+from backend.responses import ORJSONResponse
+from backend.services import splitwise_async_service, splitwise_cache, expense_service, rate_service, trip_service, user_service
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter(tags=["expenses"])
 
 
+async def _invalidate_group_members(group_ids: list[str]) -> None:
+    """Splitwise balances in the cached groups payload change on every expense write."""
+    member_ids = set()
+    for group_id in group_ids:
+        member_ids.update(await trip_service.get_member_user_ids_async(group_id))
+    splitwise_cache.invalidate_groups(*member_ids)
+
+
 @router.get("/get_expenses/{group_id}")
-def get_expenses(request: Request, group_id: str):
+async def get_expenses(request: Request, group_id: str):
     logger.info("Fetching expenses for group_id=%s", group_id)
-    oauth = get_oauth_session(request)
-    active_expenses = splitwise_service.fetch_expenses(oauth, group_id)
+    client = get_splitwise_client(request)
+    active_expenses = await splitwise_async_service.fetch_expenses(client, group_id)
     logger.info("Fetched %d active expenses for group_id=%s", len(active_expenses), group_id)
-    return {"expenses": active_expenses}
+    return ORJSONResponse({"expenses": active_expenses})
 
 
 @router.post("/create_expense")
 async def create_expense(request: Request):
-    oauth = get_oauth_session(request)
+    client = get_splitwise_client(request)
     payload = await request.json()
     logger.info("Creating expense: description=%s group_id=%s", payload.get("description"), payload.get("group_id"))
 
@@ -34,7 +45,7 @@ async def create_expense(request: Request):
 
     # Identify the logged-in user's Splitwise ID
     db_user_id = request.session.get(SESSION_USER_ID)
-    db_user = user_service.get_user_by_id(db_user_id) if db_user_id else None
+    db_user = await user_service.get_user_by_id_async(db_user_id) if db_user_id else None
     logged_in_sw_id = str(db_user["splitwise_id"]) if db_user else None
 
     # Parse user splits from the payload to check if others owe money
@@ -63,7 +74,7 @@ async def create_expense(request: Request):
     if others_owe:
         # Other users have a share → save to Splitwise
         logger.info("Expense involves others; saving to Splitwise (edit=%s)", bool(original_expense_id))
-        sw_result = splitwise_service.create_or_update_expense(oauth, payload)
+        sw_result = await splitwise_async_service.create_or_update_expense(client, payload)
         # Extract the Splitwise expense ID from the response
         expenses_list = sw_result.get("expenses", [])
         if expenses_list:
@@ -77,10 +88,10 @@ async def create_expense(request: Request):
 
     # If editing, remove old rows before re-inserting updated ones
     if original_expense_id:
-        expense_service.delete_expense_rows(str(original_expense_id))
+        await expense_service.delete_expense_rows_async(str(original_expense_id))
 
     # Save to local expenses table (one row per user who owes)
-    expense_service.save_expense_rows(
+    await expense_service.save_expense_rows_async(
         trip_id=group_id,
         expense_id=expense_id,
         description=description,
@@ -91,6 +102,9 @@ async def create_expense(request: Request):
         date_str=str(date.today()),
     )
 
+    if others_owe:
+        await _invalidate_group_members([group_id])
+
     logger.info("Expense saved: expense_id=%s description=%s currency=%s", expense_id, description, currency_code)
     if others_owe:
         return sw_result
@@ -99,32 +113,59 @@ async def create_expense(request: Request):
 
 
 @router.post("/delete_expense/{expense_id}")
-def delete_expense(request: Request, expense_id: str):
+async def delete_expense(request: Request, expense_id: str):
     logger.info("Deleting expense: expense_id=%s", expense_id)
     # Always remove from local DB
-    expense_service.delete_expense_rows(expense_id)
+    trip_ids = await expense_service.delete_expense_rows_async(expense_id)
 
     # If it's a Splitwise expense (not local-only), delete from Splitwise too
     if not expense_id.startswith("local_"):
         logger.info("Also deleting from Splitwise: expense_id=%s", expense_id)
-        oauth = get_oauth_session(request)
-        return splitwise_service.delete_expense(oauth, expense_id)
+        client = get_splitwise_client(request)
+        result = await splitwise_async_service.delete_expense(client, expense_id)
+        await _invalidate_group_members(trip_ids)
+        return result
 
     logger.info("Local-only expense deleted: expense_id=%s", expense_id)
     return {"success": True}
 
 
 @router.get("/get_my_expenses/{group_id}")
-def get_my_expenses(request: Request, group_id: str):
-    """Return local expense rows for the logged-in user in a given trip/group."""
+async def get_my_expenses(
+    request: Request,
+    group_id: str,
+    limit: Optional[int] = Query(None, ge=1, le=MAX_EXPENSE_PAGE_SIZE, description="Page size (all rows when omitted)"),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+    date_from: Optional[date] = Query(None, alias="from", description="Inclusive start date (YYYY-MM-DD)"),
+    date_to: Optional[date] = Query(None, alias="to", description="Inclusive end date (YYYY-MM-DD)"),
+    fields: Optional[str] = Query(None, description="Comma-separated columns to return"),
+):
+    """Return local expense rows for the logged-in user in a given trip/group, newest first.
+
+    With *limit*, ``next_cursor`` is set when more rows may follow; pass it
+    back as *cursor* to fetch the next page.
+    """
     db_user_id = request.session.get(SESSION_USER_ID)
     if not db_user_id:
-        return {"expenses": []}
-    db_user = user_service.get_user_by_id(db_user_id)
+        return {"expenses": [], "next_cursor": None}
+    db_user = await user_service.get_user_by_id_async(db_user_id)
     if not db_user:
-        return {"expenses": []}
-    rows = expense_service.get_user_expenses_by_trip(group_id, db_user["splitwise_id"])
-    return {"expenses": rows}
+        return {"expenses": [], "next_cursor": None}
+    field_list = [f.strip() for f in fields.split(",") if f.strip()] if fields else None
+    try:
+        rows = await expense_service.get_user_expenses_by_trip_async(
+            group_id,
+            db_user["splitwise_id"],
+            limit=limit,
+            after=cursor,
+            date_from=date_from.isoformat() if date_from else None,
+            date_to=date_to.isoformat() if date_to else None,
+            fields=field_list,
+        )
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    next_cursor = expense_service.encode_expense_cursor(rows[-1]) if limit and len(rows) == limit else None
+    return ORJSONResponse({"expenses": rows, "next_cursor": next_cursor})
 
 
 @router.post("/update_expense_details")
@@ -134,7 +175,7 @@ async def update_expense_details(request: Request):
     if not db_user_id:
         return {"status": "error", "detail": "Not authenticated"}
     data = await request.json()
-    expense_service.update_expense_details(
+    await expense_service.update_expense_details_async(
         expense_row_id=data["id"],
         location=data.get("location", ""),
         category=data.get("category", ""),
@@ -149,7 +190,7 @@ async def update_stay_dates(request: Request):
     if not db_user_id:
         return {"status": "error", "detail": "Not authenticated"}
     data = await request.json()
-    expense_service.update_stay_dates(
+    await expense_service.update_stay_dates_async(
         expense_row_id=data["id"],
         start_date=data.get("start_date", None),
         end_date=data.get("end_date", None),
@@ -159,28 +200,47 @@ async def update_stay_dates(request: Request):
 
 
 @router.get("/get_personal_expenses/{group_id}")
-def get_personal_expenses(request: Request, group_id: str):
+async def get_personal_expenses(request: Request, group_id: str):
     """Return local-only personal expenses for a group, shaped like Splitwise expenses."""
     db_user_id = request.session.get(SESSION_USER_ID)
     if not db_user_id:
         return {"expenses": []}
-    db_user = user_service.get_user_by_id(db_user_id)
+    db_user = await user_service.get_user_by_id_async(db_user_id)
     if not db_user:
         return {"expenses": []}
     logger.info("Fetching personal expenses for group_id=%s user=%s", group_id, db_user["splitwise_id"])
-    expenses = expense_service.get_personal_expenses(group_id, db_user["splitwise_id"])
-    return {"expenses": expenses}
+    expenses = await expense_service.get_personal_expenses_async(group_id, db_user["splitwise_id"])
+    return ORJSONResponse({"expenses": expenses})
 
 
 @router.post("/sync_expenses/{group_id}")
 def sync_expenses(request: Request, group_id: str):
-    """Fetch expenses from Splitwise and sync any new ones into the local DB."""
+    """Pull changes from Splitwise into the local DB (delta sync, full when needed).
+
+    Kept sync: the streaming sync holds one DB transaction open across all
+    Splitwise pages, so it runs on a threadpool thread end to end.
+    """
     logger.info("Syncing expenses from Splitwise for group_id=%s", group_id)
     oauth = get_oauth_session(request)
-    sw_expenses = splitwise_service.fetch_expenses(oauth, group_id)
-    inserted = expense_service.sync_expenses_from_splitwise(group_id, sw_expenses)
-    logger.info("Sync complete for group_id=%s: %d new rows inserted", group_id, inserted)
-    return {"status": "success", "synced": inserted}
+    result = expense_service.sync_trip_expenses(oauth, group_id)
+    logger.info("Sync complete for group_id=%s: mode=%s %d new rows inserted", group_id, result["mode"], result["inserted"])
+    return {"status": "success", "synced": result["inserted"], "mode": result["mode"]}
+
+
+@router.post("/sync_all_expenses")
+def sync_all_expenses(request: Request):
+    """Delta-sync every trip of the logged-in user with one account-wide Splitwise pass."""
+    user_id = request.session.get(SESSION_USER_ID)
+    if not user_id:
+        raise HTTPException(status_code=401, detail="Not authenticated")
+    oauth = get_oauth_session(request)
+    trip_ids = [trip["groupId"] for trip in trip_service.get_trips(user_id)]
+    result = expense_service.sync_account_expenses(oauth, trip_ids)
+    logger.info(
+        "Account sync complete: user=%s trips=%d changed=%d unchanged=%d",
+        user_id, len(set(trip_ids)), len(result["trips"]), len(result["unchanged"]),
+    )
+    return {"status": "success", **result}
 
 
 @router.get("/convert/{from_code}/{to_code}/{amount}")
@@ -196,7 +256,5 @@ async def convert_batch(request: Request):
     data = await request.json()
     base = data.get("base", "INR").upper()
     targets = [t.upper() for t in data.get("targets", [])]
-    rates = {}
-    for t in targets:
-        rates[t] = expense_service.get_conversion_rate(base, t)
+    rates = await run_in_threadpool(rate_service.get_conversion_rates, base, targets)
     return {"base": base, "rates": rates}
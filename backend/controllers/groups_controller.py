@@ -1,9 +1,11 @@
 import logging
 
-from fastapi import APIRouter, Request
+from fastapi import APIRouter, HTTPException, Request
 
-from backend.dependencies import get_oauth_session
-from backend.services import splitwise_service
+from backend.constants import SESSION_USER_ID
+from backend.dependencies import get_splitwise_client
+from backend.responses import conditional_json_response
+from backend.services import splitwise_cache
 
 logger = logging.getLogger(__name__)
 
@@ -11,9 +13,14 @@ router = APIRouter(tags=["groups"])
 
 
 @router.get("/get_groups")
-def get_groups(request: Request):
+async def get_groups(request: Request):
+    # The groups cache is per user, so a session with tokens but no user id
+    # (a /callback that failed after storing them) must not reach it
+    user_id = request.session.get(SESSION_USER_ID)
+    if not user_id:
+        raise HTTPException(status_code=401, detail="Not authenticated")
     logger.info("Fetching Splitwise groups")
-    oauth = get_oauth_session(request)
-    result = splitwise_service.fetch_groups(oauth)
+    client = get_splitwise_client(request)
+    result, etag = await splitwise_cache.get_groups(client, user_id)
     logger.info("Fetched %d groups", len(result.get("groups", [])))
-    return result
+    return conditional_json_response(request, result, etag)
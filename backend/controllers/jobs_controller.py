@@ -0,0 +1,62 @@
+import asyncio
+import logging
+
+import orjson
+from fastapi import APIRouter, Request, HTTPException
+from fastapi.responses import StreamingResponse
+
+from backend.config import settings
+from backend.constants import SESSION_USER_ID
+from backend.services import job_service
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(tags=["jobs"])
+
+
+def _get_user_id(request: Request) -> int:
+    user_id = request.session.get(SESSION_USER_ID)
+    if not user_id:
+        raise HTTPException(status_code=401, detail="Not authenticated")
+    return user_id
+
+
+def _public(job: dict) -> dict:
+    return {k: v for k, v in job.items() if k != "user_id"}
+
+
+async def _get_own_job(job_id: int, user_id: int) -> dict:
+    job = await job_service.get_job_async(job_id)
+    # Someone else's job is reported as missing rather than forbidden
+    if not job or job["user_id"] != user_id:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+
+@router.get("/jobs/{job_id}")
+async def get_job(request: Request, job_id: int):
+    """Status, attempts, result and last error of a background job."""
+    user_id = _get_user_id(request)
+    return {"job": _public(await _get_own_job(job_id, user_id))}
+
+
+@router.get("/jobs/{job_id}/events")
+async def job_events(request: Request, job_id: int):
+    """Server-sent events: one `job` event per status change until the job finishes."""
+    user_id = _get_user_id(request)
+    job = await _get_own_job(job_id, user_id)
+
+    async def stream():
+        current, last = job, None
+        while True:
+            state = (current["status"], current["attempts"])
+            if state != last:
+                last = state
+                yield b"event: job\ndata: " + orjson.dumps(_public(current)) + b"\n\n"
+            if current["status"] in job_service.FINISHED_STATUSES or await request.is_disconnected():
+                return
+            await asyncio.sleep(settings.JOB_EVENTS_POLL_SEC)
+            current = await job_service.get_job_async(job_id) or current
+
+    logger.info("Job events stream: job_id=%s user=%s", job_id, user_id)
+    return StreamingResponse(stream(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
@@ -1,3 +1,4 @@
+import asyncio
 import logging
 
 from fastapi import APIRouter, Request, HTTPException, Query
@@ -11,15 +12,33 @@ router = APIRouter(tags=["location"])
 
 
 @router.get("/location_coords")
-def get_location_coords(request: Request, names: str = Query(..., description="Comma-separated location names")):
+async def get_location_coords(request: Request, names: str = Query(..., description="Comma-separated location names")):
+    """Cached coords for each name; uncached names are geocoded in the background and listed in pending."""
     user_id = request.session.get(SESSION_USER_ID)
     if not user_id:
         raise HTTPException(status_code=401, detail="Not authenticated")
 
     name_list = [n.strip() for n in names.split(",") if n.strip()]
     if not name_list:
-        return {"coords": []}
+        return {"coords": [], "pending": []}
 
-    coords = location_service.get_location_coords(name_list)
-    logger.info("Returned %d location coords for user=%s", len(coords), user_id)
-    return {"coords": coords}
+    result = await location_service.get_location_coords_async(name_list)
+    logger.info("Returned %d location coords (%d pending) for user=%s",
+                len(result["coords"]), len(result["pending"]), user_id)
+    return result
+
+
+@router.get("/location_search")
+async def search_locations(
+    request: Request,
+    q: str = Query(..., description="Start of a city name"),
+    limit: int = Query(10, ge=1, le=50),
+):
+    """City typeahead from the offline gazetteer (empty list when none is configured)."""
+    user_id = request.session.get(SESSION_USER_ID)
+    if not user_id:
+        raise HTTPException(status_code=401, detail="Not authenticated")
+
+    # The first call loads the gazetteer file, so keep it off the event loop
+    results = await asyncio.to_thread(location_service.search_locations, q, limit)
+    return {"results": results}
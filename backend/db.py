@@ -1,40 +1,332 @@
+import collections
+import hashlib
 import logging
 import pathlib
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Iterator, Optional, Sequence
 
 import mysql.connector
-from mysql.connector import pooling
+from mysql.connector import errors
 
 from backend.config import settings
 
 logger = logging.getLogger(__name__)
 
-_pool: pooling.MySQLConnectionPool | None = None
-
 MIGRATIONS_DIR = pathlib.Path(__file__).parent / "migrations"
 
 
-def _get_pool() -> pooling.MySQLConnectionPool:
+class PooledConnection:
+    """A checked-out connection; ``close()`` returns it to the pool.
+
+    Everything else is delegated to the underlying mysql-connector connection,
+    so callers keep using ``conn.cursor()`` / ``conn.commit()`` / ``conn.close()``.
+    """
+
+    def __init__(self, pool: "ConnectionPool", cnx: mysql.connector.MySQLConnection, created_at: float):
+        self._pool = pool
+        self._cnx = cnx
+        self._created_at = created_at
+        self._released = False
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._cnx, name)
+
+    def close(self) -> None:
+        if not self._released:
+            self._released = True
+            self._pool._release(self._cnx, self._created_at)
+
+
+class ConnectionPool:
+    """Bounded MySQL connection pool with overflow, checkout timeout,
+    max connection lifetime, pre-ping and contention stats.
+
+    Up to *size* connections are kept idle; up to *max_overflow* more are
+    opened under load and closed when returned.  When all are checked out,
+    ``get_connection`` waits up to *timeout* seconds before raising PoolError.
+    """
+
+    def __init__(self, size: int, max_overflow: int, timeout: float,
+                 recycle: int, pre_ping: bool, **connect_args):
+        self.size = size
+        self.max_overflow = max_overflow
+        self.timeout = timeout
+        self.recycle = recycle
+        self.pre_ping = pre_ping
+        self._connect_args = connect_args
+        self._idle: collections.deque = collections.deque()
+        self._cond = threading.Condition()
+        self._checked_out = 0
+        self._stats = {
+            "checkouts": 0,
+            "connections_opened": 0,
+            "exhausted_events": 0,
+            "timeouts": 0,
+            "wait_time_total_ms": 0.0,
+            "wait_time_max_ms": 0.0,
+        }
+
+    def _open(self) -> tuple[mysql.connector.MySQLConnection, float]:
+        cnx = mysql.connector.connect(**self._connect_args)
+        with self._cond:
+            self._stats["connections_opened"] += 1
+        return cnx, time.monotonic()
+
+    def _is_usable(self, cnx: mysql.connector.MySQLConnection, created_at: float) -> bool:
+        if self.recycle > 0 and time.monotonic() - created_at > self.recycle:
+            return False
+        if self.pre_ping:
+            try:
+                cnx.ping(reconnect=False)
+            except Exception:
+                return False
+        return True
+
+    def get_connection(self) -> PooledConnection:
+        start = time.monotonic()
+        deadline = start + self.timeout
+        waited = False
+        with self._cond:
+            while True:
+                if self._idle:
+                    cnx, created_at = self._idle.pop()
+                    break
+                if self._checked_out < self.size + self.max_overflow:
+                    cnx, created_at = None, 0.0
+                    break
+                if not waited:
+                    waited = True
+                    self._stats["exhausted_events"] += 1
+                    logger.warning("MySQL pool exhausted (%d checked out), waiting up to %.1fs",
+                                   self._checked_out, self.timeout)
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self._stats["timeouts"] += 1
+                    raise errors.PoolError(
+                        f"Timed out after {self.timeout}s waiting for a MySQL connection "
+                        f"({self._checked_out} checked out)"
+                    )
+                self._cond.wait(remaining)
+            # Reserve the slot before doing any I/O outside the lock
+            self._checked_out += 1
+            wait_ms = (time.monotonic() - start) * 1000
+            self._stats["checkouts"] += 1
+            self._stats["wait_time_total_ms"] += wait_ms
+            self._stats["wait_time_max_ms"] = max(self._stats["wait_time_max_ms"], wait_ms)
+
+        try:
+            if cnx is not None and not self._is_usable(cnx, created_at):
+                self._discard(cnx)
+                cnx = None
+            if cnx is None:
+                cnx, created_at = self._open()
+        except Exception:
+            with self._cond:
+                self._checked_out -= 1
+                self._cond.notify()
+            raise
+        return PooledConnection(self, cnx, created_at)
+
+    def _discard(self, cnx: mysql.connector.MySQLConnection) -> None:
+        try:
+            cnx.close()
+        except Exception:
+            logger.debug("Error closing discarded MySQL connection", exc_info=True)
+
+    def _release(self, cnx: mysql.connector.MySQLConnection, created_at: float) -> None:
+        keep = True
+        try:
+            # Never hand an open transaction to the next borrower
+            if cnx.in_transaction:
+                cnx.rollback()
+        except Exception:
+            keep = False
+        with self._cond:
+            self._checked_out -= 1
+            if keep and len(self._idle) < self.size:
+                self._idle.append((cnx, created_at))
+                cnx = None
+            self._cond.notify()
+        if cnx is not None:
+            self._discard(cnx)
+
+    def stats(self) -> dict:
+        with self._cond:
+            result = dict(self._stats)
+            result.update(
+                size=self.size,
+                max_overflow=self.max_overflow,
+                checked_out=self._checked_out,
+                idle=len(self._idle),
+            )
+        result["wait_time_avg_ms"] = (
+            result["wait_time_total_ms"] / result["checkouts"] if result["checkouts"] else 0.0
+        )
+        return result
+
+    def close(self) -> None:
+        with self._cond:
+            idle = list(self._idle)
+            self._idle.clear()
+        for cnx, _ in idle:
+            self._discard(cnx)
+
+
+_pool: Optional[ConnectionPool] = None
+_pool_lock = threading.Lock()
+
+
+def _get_pool() -> ConnectionPool:
     global _pool
     if _pool is None:
-        logger.info("Creating MySQL connection pool: host=%s port=%s db=%s pool_size=5",
-                     settings.MYSQL_HOST, settings.MYSQL_PORT, settings.MYSQL_DATABASE)
-        _pool = pooling.MySQLConnectionPool(
-            pool_name="splitwise_pool",
-            pool_size=5,
-            host=settings.MYSQL_HOST,
-            port=settings.MYSQL_PORT,
-            user=settings.MYSQL_USER,
-            password=settings.MYSQL_PASSWORD,
-            database=settings.MYSQL_DATABASE,
-        )
+        with _pool_lock:
+            if _pool is None:
+                logger.info(
+                    "Creating MySQL connection pool: host=%s port=%s db=%s pool_size=%s max_overflow=%s timeout=%ss",
+                    settings.MYSQL_HOST, settings.MYSQL_PORT, settings.MYSQL_DATABASE,
+                    settings.MYSQL_POOL_SIZE, settings.MYSQL_POOL_MAX_OVERFLOW, settings.MYSQL_POOL_TIMEOUT,
+                )
+                _pool = ConnectionPool(
+                    size=settings.MYSQL_POOL_SIZE,
+                    max_overflow=settings.MYSQL_POOL_MAX_OVERFLOW,
+                    timeout=settings.MYSQL_POOL_TIMEOUT,
+                    recycle=settings.MYSQL_POOL_RECYCLE,
+                    pre_ping=settings.MYSQL_POOL_PRE_PING,
+                    host=settings.MYSQL_HOST,
+                    port=settings.MYSQL_PORT,
+                    user=settings.MYSQL_USER,
+                    password=settings.MYSQL_PASSWORD,
+                    database=settings.MYSQL_DATABASE,
+                )
     return _pool
 
 
-def get_connection() -> mysql.connector.MySQLConnection:
-    """Return a connection from the pool."""
+def get_connection() -> PooledConnection:
+    """Return a connection from the pool; ``close()`` gives it back."""
     return _get_pool().get_connection()
 
 
+def pool_stats() -> dict:
+    """Checked-out/idle counts, wait times and exhaustion events of the pool."""
+    if _pool is None:
+        return {}
+    return _pool.stats()
+
+
+def close_pool() -> None:
+    """Close idle pooled connections (application shutdown)."""
+    global _pool
+    if _pool is not None:
+        _pool.close()
+        _pool = None
+
+
+# Multi-row statements are cut at whichever limit is hit first.  The byte
+# budget is an estimate kept well under MySQL's max_allowed_packet (64 MiB by
+# default in 8.0, but as low as 4 MiB on older or managed servers).
+BULK_MAX_ROWS = 1000
+BULK_MAX_BYTES = 1 << 20
+
+
+def _estimated_size(value: Any) -> int:
+    if value is None:
+        return 4
+    if isinstance(value, (bytes, bytearray)):
+        return 2 * len(value) + 3
+    # Strings may double when escaped, plus quotes and a separator
+    return 2 * len(str(value).encode()) + 3
+
+
+def bulk_insert_statements(
+    table: str,
+    columns: Sequence[str],
+    rows: Sequence[Sequence[Any]],
+    update_columns: Sequence[str] = (),
+    ignore: bool = False,
+    value_sql: Optional[dict[str, str]] = None,
+    max_rows: int = BULK_MAX_ROWS,
+    max_bytes: int = BULK_MAX_BYTES,
+) -> Iterator[tuple[str, list]]:
+    """Yield (sql, params) multi-row INSERT statements covering *rows* in chunks.
+
+    With *update_columns* each statement becomes an upsert
+    (``ON DUPLICATE KEY UPDATE col = VALUES(col)``); with *ignore*, an
+    ``INSERT IGNORE``.  *value_sql* maps a column to the SQL expression that
+    builds it (e.g. ``{"geo": "POINT(%s, %s)"}``), whose parameters then take
+    that column's place in each row.  Chunks hold at most *max_rows* rows
+    and roughly *max_bytes* of parameter data (a single oversized row still
+    gets its own statement).
+    """
+    column_list = ", ".join(columns)
+    value_sql = value_sql or {}
+    row_sql = "(" + ", ".join(value_sql.get(c, "%s") for c in columns) + ")"
+    head = f"INSERT {'IGNORE ' if ignore else ''}INTO {table} ({column_list}) VALUES "
+    tail = ""
+    if update_columns:
+        tail = " ON DUPLICATE KEY UPDATE " + ", ".join(f"{c} = VALUES({c})" for c in update_columns)
+
+    chunk: list = []
+    chunk_rows = 0
+    chunk_bytes = 0
+    for row in rows:
+        size = sum(_estimated_size(v) for v in row)
+        if chunk_rows and (chunk_rows >= max_rows or chunk_bytes + size > max_bytes):
+            yield head + ", ".join([row_sql] * chunk_rows) + tail, chunk
+            chunk, chunk_rows, chunk_bytes = [], 0, 0
+        chunk.extend(row)
+        chunk_rows += 1
+        chunk_bytes += size
+    if chunk_rows:
+        yield head + ", ".join([row_sql] * chunk_rows) + tail, chunk
+
+
+def bulk_insert(cursor, table: str, columns: Sequence[str], rows: Sequence[Sequence[Any]], **kwargs) -> int:
+    """Insert *rows* on *cursor* with chunked multi-row statements.
+
+    Runs inside the caller's transaction (no commit).  Accepts the options of
+    bulk_insert_statements.  Returns the summed affected-row count (for
+    upserts MySQL counts 1 per insert and 2 per changed existing row).
+    """
+    affected = 0
+    for sql, params in bulk_insert_statements(table, columns, rows, **kwargs):
+        cursor.execute(sql, params)
+        affected += cursor.rowcount
+    return affected
+
+
+# MySQL caps user-level lock names at 64 characters
+_MAX_LOCK_NAME = 64
+
+
+@contextmanager
+def advisory_lock(name: str, timeout: float = 0) -> Iterator[bool]:
+    """Hold a MySQL user-level lock (GET_LOCK) for the duration of the block.
+
+    Coordinates work across processes sharing the database.  Yields True if
+    the lock was acquired within *timeout* seconds, False otherwise (the
+    block still runs; callers decide what to do without the lock).  The
+    lock lives on a dedicated pooled connection, released on exit.
+    """
+    if len(name) > _MAX_LOCK_NAME:
+        name = name[:_MAX_LOCK_NAME - 41] + ":" + hashlib.sha1(name.encode()).hexdigest()
+    conn = get_connection()
+    try:
+        cursor = conn.cursor()
+        cursor.execute("SELECT GET_LOCK(%s, %s)", (name, timeout))
+        acquired = cursor.fetchone()[0] == 1
+        try:
+            yield acquired
+        finally:
+            if acquired:
+                cursor.execute("SELECT RELEASE_LOCK(%s)", (name,))
+                cursor.fetchone()
+            cursor.close()
+    finally:
+        conn.close()
+
+
 def _ensure_database(conn: mysql.connector.MySQLConnection) -> None:
     """Create the database and the schema_migrations tracking table."""
     cursor = conn.cursor()
@@ -69,7 +361,10 @@ def _get_applied_versions(conn: mysql.connector.MySQLConnection) -> set[str]:
 def _run_migration(conn: mysql.connector.MySQLConnection, path: pathlib.Path) -> None:
     """Execute a single migration file and record it in schema_migrations."""
     version = path.stem  # e.g. "V001__initial_schema"
-    sql = path.read_text()
+    # Drop full-line comments first so a ";" inside one cannot split a statement
+    sql = "\n".join(
+        line for line in path.read_text().splitlines() if not line.lstrip().startswith("--")
+    )
 
     cursor = conn.cursor()
     for statement in sql.split(";"):
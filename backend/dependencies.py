@@ -5,20 +5,43 @@ from requests_oauthlib import OAuth1Session
 
 from backend.config import settings
 from backend.constants import SESSION_ACCESS_TOKEN, SESSION_ACCESS_TOKEN_SECRET
+from backend.http_client import mount_pooled_transport
+from backend.services.splitwise_async_service import SplitwiseClient
 
 logger = logging.getLogger(__name__)
 
 
-def get_oauth_session(request: Request) -> OAuth1Session:
-    """Build an authenticated OAuth1Session from the current session, or raise 401."""
+def _get_access_tokens(request: Request) -> tuple[str, str]:
+    """Return the user's Splitwise access token pair from the session, or raise 401."""
     access_token = request.session.get(SESSION_ACCESS_TOKEN)
     access_token_secret = request.session.get(SESSION_ACCESS_TOKEN_SECRET)
     if not access_token or not access_token_secret:
         logger.warning("OAuth session requested but no tokens in session")
         raise HTTPException(status_code=401, detail="Not authenticated")
-    return OAuth1Session(
+    return access_token, access_token_secret
+
+
+def build_oauth_session(access_token: str, access_token_secret: str) -> OAuth1Session:
+    """Build an OAuth1Session signing with the given user tokens.
+
+    The session sends through the shared pooled transport, so keep-alive
+    connections survive across requests.
+    """
+    oauth = OAuth1Session(
         settings.CONSUMER_KEY,
         client_secret=settings.CONSUMER_SECRET,
         resource_owner_key=access_token,
         resource_owner_secret=access_token_secret,
     )
+    return mount_pooled_transport(oauth)
+
+
+def get_oauth_session(request: Request) -> OAuth1Session:
+    """Build an authenticated OAuth1Session from the current session, or raise 401."""
+    return build_oauth_session(*_get_access_tokens(request))
+
+
+def get_splitwise_client(request: Request) -> SplitwiseClient:
+    """Build an async Splitwise client from the current session, or raise 401."""
+    access_token, access_token_secret = _get_access_tokens(request)
+    return SplitwiseClient(access_token, access_token_secret)
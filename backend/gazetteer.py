@@ -0,0 +1,133 @@
+"""Offline city gazetteer loaded from a GeoNames cities file.
+
+Reads the tab-separated GeoNames dump format (``cities15000.txt`` and
+friends from https://download.geonames.org/export/dump/) into memory:
+
+* an exact-match map from normalized name (name, ASCII name and alternate
+  names) to the most populous city carrying it;
+* a sorted key list over name and ASCII name for prefix (typeahead) search.
+
+The file is read once, on first use.  Without a file every lookup misses
+and callers fall back to Nominatim.
+"""
+import bisect
+import heapq
+import logging
+import pathlib
+import threading
+import time
+from typing import Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+# GeoNames column positions
+_NAME, _ASCII_NAME, _ALTERNATE_NAMES, _LAT, _LON, _COUNTRY, _POPULATION = 1, 2, 3, 4, 5, 8, 14
+
+# Keys a single prefix search scans at most (one- or two-letter prefixes)
+MAX_PREFIX_SCAN = 20000
+
+
+class Gazetteer:
+    """In-memory city index over a GeoNames file at *path* (empty path disables it).
+
+    *normalize* turns a place name into the key used for both indexing and
+    lookups, so callers get the same folding as their own caches.
+    """
+
+    def __init__(self, path: str, normalize: Callable[[str], str]):
+        self.path = path
+        self.normalize = normalize
+        self._cities: list[tuple[str, str, float, float, int]] = []
+        self._by_key: dict[str, int] = {}
+        self._prefix_keys: list[str] = []
+        self._prefix_ids: list[int] = []
+        self._loaded = False
+        self._lock = threading.Lock()
+
+    def _load(self) -> None:
+        with self._lock:
+            if self._loaded:
+                return
+            self._loaded = True
+            if not self.path:
+                return
+            started = time.perf_counter()
+            try:
+                with pathlib.Path(self.path).open(encoding="utf-8") as f:
+                    prefix_entries = self._index(f)
+            except (OSError, UnicodeDecodeError):
+                logger.warning("Gazetteer file %s could not be read, lookups disabled", self.path, exc_info=True)
+                self._cities, self._by_key = [], {}
+                return
+            prefix_entries.sort()
+            self._prefix_keys = [key for key, _ in prefix_entries]
+            self._prefix_ids = [city_id for _, city_id in prefix_entries]
+            logger.info("Gazetteer loaded: %d cities, %d names from %s in %.2fs",
+                        len(self._cities), len(self._by_key), self.path, time.perf_counter() - started)
+
+    def _index(self, lines) -> list[tuple[str, int]]:
+        prefix_entries = set()
+        for line in lines:
+            fields = line.rstrip("\n").split("\t")
+            if len(fields) <= _POPULATION:
+                continue
+            try:
+                city = (fields[_NAME], fields[_COUNTRY], float(fields[_LAT]), float(fields[_LON]),
+                        int(fields[_POPULATION] or 0))
+            except ValueError:
+                continue
+            city_id = len(self._cities)
+            self._cities.append(city)
+            primary = {self.normalize(fields[_NAME]), self.normalize(fields[_ASCII_NAME])}
+            alternates = {self.normalize(n) for n in fields[_ALTERNATE_NAMES].split(",") if n}
+            for key in primary | alternates:
+                # Ambiguous names resolve to the most populous city
+                current = self._by_key.get(key)
+                if key and (current is None or self._cities[current][4] < city[4]):
+                    self._by_key[key] = city_id
+            prefix_entries.update((key, city_id) for key in primary if key)
+        return list(prefix_entries)
+
+    def _to_place(self, city_id: int) -> dict:
+        name, country, lat, lon, population = self._cities[city_id]
+        return {"name": name, "country": country, "lat": lat, "lon": lon, "population": population}
+
+    def lookup(self, name: str) -> Optional[dict]:
+        """Exact (normalized) match for *name*, or for "City, CC" with an ISO country code.
+
+        Returns {name, country, lat, lon, population} or None.  Other
+        qualified names ("Paris, Texas") are left to the caller's geocoder.
+        """
+        self._load()
+        key = self.normalize(name)
+        city_id = self._by_key.get(key)
+        if city_id is None and "," in key:
+            city, _, qualifier = key.partition(",")
+            city_id = self._in_country(city.strip(), qualifier.strip())
+        return self._to_place(city_id) if city_id is not None else None
+
+    def _in_country(self, key: str, country: str) -> Optional[int]:
+        """Most populous city named *key* (name or ASCII name) in *country*."""
+        best = None
+        i = bisect.bisect_left(self._prefix_keys, key)
+        while i < len(self._prefix_keys) and self._prefix_keys[i] == key:
+            city = self._cities[self._prefix_ids[i]]
+            if city[1].casefold() == country and (best is None or self._cities[best][4] < city[4]):
+                best = self._prefix_ids[i]
+            i += 1
+        return best
+
+    def search(self, prefix: str, limit: int = 10) -> list[dict]:
+        """Cities whose name starts with *prefix*, most populous first."""
+        self._load()
+        prefix = self.normalize(prefix)
+        if not prefix:
+            return []
+        start = bisect.bisect_left(self._prefix_keys, prefix)
+        matches = set()
+        for i in range(start, min(start + MAX_PREFIX_SCAN, len(self._prefix_keys))):
+            if not self._prefix_keys[i].startswith(prefix):
+                break
+            matches.add(self._prefix_ids[i])
+        best = heapq.nlargest(limit, matches, key=lambda city_id: self._cities[city_id][4])
+        return [self._to_place(city_id) for city_id in best]
@@ -0,0 +1,188 @@
+import functools
+import logging
+import random
+import threading
+import time
+from typing import Optional
+
+import httpx
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from backend.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Retry only idempotent requests: a retried POST /create_expense could
+# create the expense twice on Splitwise.
+RETRY_STATUS_CODES = (429, 500, 502, 503, 504)
+RETRY_METHODS = frozenset({"GET", "HEAD", "OPTIONS"})
+
+_adapter: "TimeoutHTTPAdapter | None" = None
+_adapter_lock = threading.Lock()
+
+_async_client: Optional[httpx.AsyncClient] = None
+
+
+class TimeoutHTTPAdapter(HTTPAdapter):
+    """HTTPAdapter that applies a default timeout to every request it sends."""
+
+    def __init__(self, *args, timeout: tuple[float, float], **kwargs):
+        self._timeout = timeout
+        super().__init__(*args, **kwargs)
+
+    def send(self, request, **kwargs):
+        if kwargs.get("timeout") is None:
+            kwargs["timeout"] = self._timeout
+        return super().send(request, **kwargs)
+
+
+def _build_retry() -> Retry:
+    # Only failed connects are retried here: the request never left, so
+    # resending the same signed bytes is safe.  Anything that reached
+    # Splitwise is retried above the signing layer (see
+    # mount_pooled_transport), because urllib3 would replay the same OAuth1
+    # nonce and timestamp.
+    return Retry(
+        total=settings.HTTP_MAX_RETRIES,
+        connect=settings.HTTP_MAX_RETRIES,
+        read=0,
+        status=0,
+        other=0,
+        allowed_methods=RETRY_METHODS,
+        backoff_factor=settings.HTTP_BACKOFF_FACTOR,
+        backoff_jitter=settings.HTTP_BACKOFF_JITTER,
+        raise_on_status=False,
+    )
+
+
+def get_adapter() -> TimeoutHTTPAdapter:
+    """Return the process-wide pooled transport, creating it on first use.
+
+    The adapter owns the urllib3 connection pool, so every session it is
+    mounted on reuses the same keep-alive connections.
+    """
+    global _adapter
+    if _adapter is None:
+        with _adapter_lock:
+            if _adapter is None:
+                logger.info(
+                    "Creating pooled HTTP transport: pool_maxsize=%s block=%s retries=%s timeout=(%s, %s)",
+                    settings.HTTP_POOL_MAXSIZE, settings.HTTP_POOL_BLOCK, settings.HTTP_MAX_RETRIES,
+                    settings.HTTP_CONNECT_TIMEOUT, settings.HTTP_READ_TIMEOUT,
+                )
+                _adapter = TimeoutHTTPAdapter(
+                    pool_connections=4,
+                    pool_maxsize=settings.HTTP_POOL_MAXSIZE,
+                    pool_block=settings.HTTP_POOL_BLOCK,
+                    max_retries=_build_retry(),
+                    timeout=(settings.HTTP_CONNECT_TIMEOUT, settings.HTTP_READ_TIMEOUT),
+                )
+    return _adapter
+
+
+def _with_status_retries(request):
+    """Wrap a session's bound ``request`` to retry idempotent calls on 429/5xx.
+
+    Each attempt goes back through ``request``, so an OAuth1Session signs it
+    again with a fresh nonce and timestamp.
+    """
+    @functools.wraps(request)
+    def request_with_retries(method, url, *args, **kwargs):
+        attempt = 0
+        while True:
+            response = request(method, url, *args, **kwargs)
+            if not should_retry(method, response.status_code, attempt):
+                return response
+            delay = backoff_delay(attempt, response.headers.get("Retry-After"))
+            logger.warning("HTTP %s %s status=%s, retrying in %.2fs", method, url, response.status_code, delay)
+            response.close()
+            attempt += 1
+            time.sleep(delay)
+
+    return request_with_retries
+
+
+def mount_pooled_transport(session: requests.Session) -> requests.Session:
+    """Route a session's HTTPS traffic through the shared pooled transport.
+
+    Per-session state (e.g. OAuth1 signing on an OAuth1Session) is untouched;
+    only the connection handling is shared.  Idempotent requests answered
+    with 429/5xx are retried with backoff, each attempt signed afresh.
+    """
+    session.mount("https://", get_adapter())
+    session.request = _with_status_retries(session.request)
+    return session
+
+
+def get_async_client() -> httpx.AsyncClient:
+    """Return the process-wide pooled asyncio HTTP client.
+
+    Uses the same pool-size and timeout settings as the sync transport.
+    Connection errors are retried by the transport; status-code retries are
+    left to the caller (see ``should_retry`` / ``backoff_delay``) because
+    OAuth1 requests must be re-signed with a fresh nonce on every attempt.
+    """
+    global _async_client
+    if _async_client is None:
+        logger.info(
+            "Creating pooled async HTTP client: max_connections=%s timeout=(%s, %s)",
+            settings.HTTP_POOL_MAXSIZE, settings.HTTP_CONNECT_TIMEOUT, settings.HTTP_READ_TIMEOUT,
+        )
+        _async_client = httpx.AsyncClient(
+            transport=httpx.AsyncHTTPTransport(
+                retries=settings.HTTP_MAX_RETRIES,
+                limits=httpx.Limits(
+                    max_connections=settings.HTTP_POOL_MAXSIZE,
+                    max_keepalive_connections=settings.HTTP_POOL_MAXSIZE,
+                ),
+            ),
+            timeout=httpx.Timeout(
+                settings.HTTP_READ_TIMEOUT,
+                connect=settings.HTTP_CONNECT_TIMEOUT,
+                pool=settings.HTTP_READ_TIMEOUT if settings.HTTP_POOL_BLOCK else settings.HTTP_CONNECT_TIMEOUT,
+            ),
+        )
+    return _async_client
+
+
+def should_retry(method: str, status_code: int, attempt: int) -> bool:
+    """True if an idempotent request that got *status_code* may be retried."""
+    return (
+        method.upper() in RETRY_METHODS
+        and status_code in RETRY_STATUS_CODES
+        and attempt < settings.HTTP_MAX_RETRIES
+    )
+
+
+def backoff_delay(attempt: int, retry_after: Optional[str] = None) -> float:
+    """Seconds to wait before retry number *attempt* (0-based).
+
+    Honours a numeric Retry-After header, otherwise exponential backoff with
+    random jitter.  Used by both the sync and the async transport.
+    """
+    if retry_after:
+        try:
+            return max(0.0, float(retry_after))
+        except ValueError:
+            pass
+    delay = settings.HTTP_BACKOFF_FACTOR * (2 ** attempt)
+    return delay + random.uniform(0, settings.HTTP_BACKOFF_JITTER)
+
+
+async def aclose() -> None:
+    """Close the async client's pooled connections (application shutdown)."""
+    global _async_client
+    if _async_client is not None:
+        await _async_client.aclose()
+        _async_client = None
+
+
+def close() -> None:
+    """Drop all pooled connections (called on application shutdown)."""
+    global _adapter
+    with _adapter_lock:
+        if _adapter is not None:
+            _adapter.close()
+            _adapter = None
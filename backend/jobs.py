@@ -0,0 +1,173 @@
+"""In-process background jobs with persisted status.
+
+Handlers are plain synchronous functions registered per job kind and run on
+a small thread pool, so they can use the existing sync services (MySQL pool,
+OAuth1 Splitwise session) directly.  Each job has a row in ``jobs`` that
+tracks its status, attempts, result and last error; ``GET /api/jobs/{id}``
+reads it.
+
+A handler receives ``(payload, context)``: *payload* is JSON-serialisable
+and persisted, *context* holds in-memory objects such as an authenticated
+OAuth session and is never written to the database.  Failed attempts are
+retried with exponential backoff up to the job's ``max_attempts``.
+
+Every ``JOB_HEARTBEAT_SEC`` each process stamps the jobs it holds.  The same
+loop fails queued or running jobs that have gone ``JOB_STALE_AFTER_SEC``
+without a heartbeat: the process that held them has died, and they cannot
+be resumed without its in-memory context.  Other workers' live jobs keep
+beating and are left alone.
+"""
+import asyncio
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Optional
+
+from backend.config import settings
+from backend.services import job_service
+
+logger = logging.getLogger(__name__)
+
+Handler = Callable[[dict, dict], Any]
+
+_handlers: dict[str, Handler] = {}
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+# Jobs submitted to this process and not yet finished
+_active: set[int] = set()
+_active_lock = threading.Lock()
+_heartbeat_task: Optional[asyncio.Task] = None
+
+
+def register(kind: str, handler: Handler) -> None:
+    """Register the handler that runs jobs of *kind*."""
+    _handlers[kind] = handler
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(max_workers=settings.JOB_WORKERS, thread_name_prefix="job")
+    return _executor
+
+
+def _retry_delay(attempt: int) -> float:
+    return settings.JOB_RETRY_BACKOFF_SEC * (2 ** (attempt - 1))
+
+
+def _run(job_id: int, kind: str, payload: dict, context: dict, max_attempts: int) -> None:
+    try:
+        _attempt_all(job_id, kind, payload, context, max_attempts)
+    finally:
+        with _active_lock:
+            _active.discard(job_id)
+
+
+def _attempt_all(job_id: int, kind: str, payload: dict, context: dict, max_attempts: int) -> None:
+    handler = _handlers[kind]
+    for attempt in range(1, max_attempts + 1):
+        try:
+            job_service.mark_running(job_id)
+            logger.info("Job %s (%s) attempt %d/%d", job_id, kind, attempt, max_attempts)
+            result = handler(payload, context)
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+            if attempt < max_attempts:
+                delay = _retry_delay(attempt)
+                logger.warning("Job %s (%s) failed, retrying in %.1fs: %s", job_id, kind, delay, error)
+                try:
+                    job_service.mark_retry(job_id, error)
+                except Exception:
+                    logger.exception("Job %s: could not record retry", job_id)
+                time.sleep(delay)
+                continue
+            logger.exception("Job %s (%s) failed after %d attempt(s)", job_id, kind, attempt)
+            try:
+                job_service.mark_failed(job_id, error)
+            except Exception:
+                logger.exception("Job %s: could not record failure", job_id)
+            return
+        try:
+            job_service.mark_succeeded(job_id, result)
+        except Exception as e:
+            # Never leave the job 'running' because its result could not be stored
+            logger.exception("Job %s: could not record success", job_id)
+            try:
+                job_service.mark_failed(job_id, f"{type(e).__name__}: {e}")
+            except Exception:
+                logger.exception("Job %s: could not record failure", job_id)
+            return
+        logger.info("Job %s (%s) succeeded", job_id, kind)
+        return
+
+
+def _submit(job_id: int, kind: str, payload: dict, context: Optional[dict], max_attempts: int) -> None:
+    with _active_lock:
+        _active.add(job_id)
+    _get_executor().submit(_run, job_id, kind, payload, context or {}, max_attempts)
+
+
+def _check_kind(kind: str) -> None:
+    if kind not in _handlers:
+        raise ValueError(f"No handler registered for job kind {kind!r}")
+
+
+async def enqueue_async(kind: str, payload: dict, user_id: Optional[int] = None,
+                        context: Optional[dict] = None, max_attempts: Optional[int] = None) -> int:
+    """Persist a queued job, hand it to the worker pool and return its id."""
+    _check_kind(kind)
+    attempts = max_attempts or settings.JOB_MAX_ATTEMPTS
+    job_id = await job_service.create_job_async(kind, payload, user_id, attempts)
+    _submit(job_id, kind, payload, context, attempts)
+    logger.info("Job %s (%s) queued: user=%s", job_id, kind, user_id)
+    return job_id
+
+
+def _beat() -> None:
+    with _active_lock:
+        job_ids = sorted(_active)
+    job_service.heartbeat(job_ids)
+    job_service.fail_stale(settings.JOB_STALE_AFTER_SEC)
+
+
+async def _heartbeat_loop() -> None:
+    while True:
+        try:
+            await asyncio.to_thread(_beat)
+        except Exception:
+            logger.exception("Job heartbeat failed")
+        await asyncio.sleep(settings.JOB_HEARTBEAT_SEC)
+
+
+def start() -> None:
+    """Start the heartbeat loop (application startup).
+
+    Its first round fails jobs abandoned by processes that died more than
+    JOB_STALE_AFTER_SEC ago; later rounds catch the rest.
+    """
+    global _heartbeat_task
+    if _heartbeat_task is None:
+        _heartbeat_task = asyncio.create_task(_heartbeat_loop(), name="job-heartbeat")
+
+
+async def shutdown() -> None:
+    """Stop accepting jobs and let running ones finish (application shutdown).
+
+    Heartbeats continue until then, so a slow job is not failed meanwhile.
+    """
+    global _executor, _heartbeat_task
+    with _executor_lock:
+        executor, _executor = _executor, None
+    if executor is not None:
+        await asyncio.to_thread(executor.shutdown, wait=True, cancel_futures=True)
+    if _heartbeat_task is not None:
+        task, _heartbeat_task = _heartbeat_task, None
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
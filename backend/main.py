@@ -1,21 +1,20 @@
 import logging
 import os
-import time
-import uuid
 from contextlib import asynccontextmanager
 from pathlib import Path
 
-from fastapi import FastAPI, Request, Response
+from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
-from starlette.middleware.base import BaseHTTPMiddleware
 from starlette.middleware.sessions import SessionMiddleware
-from starlette.responses import FileResponse
 from uvicorn.middleware.proxy_headers import ProxyHeadersMiddleware
 
 from backend.config import settings
-from backend.db import init_db
-from backend.logging_config import setup_logging, request_id_ctx
+from backend.db import init_db, close_pool
+from backend import async_db, http_client, jobs, scheduler
+from backend.logging_config import setup_logging
+from backend.middleware import RequestTracingMiddleware, SPAFallbackMiddleware
+from backend.responses import ORJSONResponse
 from backend.controllers import (
     auth_controller,
     groups_controller,
@@ -24,50 +23,32 @@ from backend.controllers import (
     trip_controller,
     location_controller,
     emergency_controller,
+    analytics_controller,
+    jobs_controller,
 )
 
 logger = logging.getLogger(__name__)
 
 
-class RequestTracingMiddleware(BaseHTTPMiddleware):
-    """Assign a unique request ID and log every request/response."""
-
-    async def dispatch(self, request: Request, call_next):
-        rid = request.headers.get("x-request-id") or uuid.uuid4().hex[:12]
-        request_id_ctx.set(rid)
-        request.state.request_id = rid
-
-        user_id = request.session.get("user_id", "-") if hasattr(request, "session") else "-"
-        logger.info(">>> %s %s  user=%s", request.method, request.url.path, user_id)
-
-        start = time.perf_counter()
-        try:
-            response: Response = await call_next(request)
-        except Exception:
-            duration_ms = (time.perf_counter() - start) * 1000
-            logger.exception("!!! %s %s  500 in %.0fms", request.method, request.url.path, duration_ms)
-            raise
-
-        duration_ms = (time.perf_counter() - start) * 1000
-        logger.info(
-            "<<< %s %s  status=%s  %.0fms",
-            request.method, request.url.path, response.status_code, duration_ms,
-        )
-        response.headers["X-Request-ID"] = rid
-        return response
-
-
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     setup_logging()
     logger.info("Application starting up")
     init_db()
+    jobs.start()
+    scheduler.start()
     logger.info("Application ready")
     yield
     logger.info("Application shutting down")
+    await scheduler.stop()
+    await jobs.shutdown()
+    http_client.close()
+    await http_client.aclose()
+    await async_db.close_pool()
+    close_pool()
 
 
-app = FastAPI(title="Splitwise Manager API", lifespan=lifespan)
+app = FastAPI(title="Splitwise Manager API", lifespan=lifespan, default_response_class=ORJSONResponse)
 
 # Middleware order matters: outermost first, innermost last.
 # RequestTracing wraps everything so it sees the final status code.
@@ -96,11 +77,14 @@ app.include_router(currencies_controller.router, prefix="/api")
 app.include_router(trip_controller.router, prefix="/api")
 app.include_router(location_controller.router, prefix="/api")
 app.include_router(emergency_controller.router, prefix="/api")
+app.include_router(analytics_controller.router, prefix="/api")
+app.include_router(jobs_controller.router, prefix="/api")
 
 
 @app.get("/api/health")
 def health():
-    from backend.db import get_connection
+    from backend.cache import cache_stats
+    from backend.db import get_connection, pool_stats
     try:
         conn = get_connection()
         cursor = conn.cursor()
@@ -111,7 +95,7 @@ def health():
         db_status = "ok"
     except Exception as e:
         db_status = f"error: {e}"
-    return {"status": "ok", "db": db_status}
+    return {"status": "ok", "db": db_status, "db_pool": pool_stats(), "caches": cache_stats()}
 
 
 # --- Serve frontend from dist/ ---
@@ -123,20 +107,4 @@ if FRONTEND_DIST.is_dir():
 
     # SPA fallback: catch any non-API GET that didn't match a route.
     # Using middleware so it never shadows API router endpoints.
-    @app.middleware("http")
-    async def spa_fallback(request: Request, call_next):
-        response = await call_next(request)
-        # Only intercept GET requests that got a 404 and aren't API routes
-        if (
-            request.method == "GET"
-            and response.status_code == 404
-            and not request.url.path.startswith("/api/")
-        ):
-            # Try exact file in dist/
-            rel = request.url.path.lstrip("/")
-            candidate = FRONTEND_DIST / rel
-            if rel and candidate.is_file():
-                return FileResponse(candidate)
-            # SPA fallback → index.html
-            return FileResponse(FRONTEND_DIST / "index.html")
-        return response
+    app.add_middleware(SPAFallbackMiddleware, dist=FRONTEND_DIST)
@@ -0,0 +1,105 @@
+"""Request tracing and SPA fallback as plain ASGI middleware.
+
+Both wrap ``send`` instead of subclassing ``BaseHTTPMiddleware``, so a
+request runs in the server's task with no extra task or response-body
+stream per layer, and streaming responses (SSE) reach the client as they
+are produced.
+"""
+import logging
+import time
+import uuid
+from pathlib import Path
+
+from starlette.datastructures import MutableHeaders
+from starlette.responses import FileResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from backend.logging_config import request_id_ctx
+
+logger = logging.getLogger(__name__)
+
+
+class RequestTracingMiddleware:
+    """Assign a unique request ID and log every request/response."""
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        rid = _header(scope, b"x-request-id") or uuid.uuid4().hex[:12]
+        request_id_ctx.set(rid)
+        scope.setdefault("state", {})["request_id"] = rid
+
+        method, path = scope["method"], scope["path"]
+        user_id = scope.get("session", {}).get("user_id", "-")
+        logger.info(">>> %s %s  user=%s", method, path, user_id)
+
+        status = 500
+
+        async def send_with_request_id(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                MutableHeaders(scope=message)["X-Request-ID"] = rid
+            await send(message)
+
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_request_id)
+        except Exception:
+            duration_ms = (time.perf_counter() - start) * 1000
+            logger.exception("!!! %s %s  500 in %.0fms", method, path, duration_ms)
+            raise
+
+        duration_ms = (time.perf_counter() - start) * 1000
+        logger.info("<<< %s %s  status=%s  %.0fms", method, path, status, duration_ms)
+
+
+class SPAFallbackMiddleware:
+    """Serve the built frontend for non-API GETs that no route matched.
+
+    A 404 from the app is swallowed and replaced by the matching file in
+    *dist*, or by ``index.html`` so client-side routes load the SPA.  Other
+    responses pass through untouched.
+    """
+
+    def __init__(self, app: ASGIApp, dist: Path):
+        self.app = app
+        self.dist = dist.resolve()
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["method"] != "GET" or scope["path"].startswith("/api/"):
+            await self.app(scope, receive, send)
+            return
+
+        not_found = False
+
+        async def send_unless_not_found(message: Message) -> None:
+            nonlocal not_found
+            if message["type"] == "http.response.start" and message["status"] == 404:
+                not_found = True
+            if not not_found:
+                await send(message)
+
+        await self.app(scope, receive, send_unless_not_found)
+        if not_found:
+            await FileResponse(self._file_for(scope["path"]))(scope, receive, send)
+
+    def _file_for(self, path: str) -> Path:
+        rel = path.lstrip("/")
+        candidate = (self.dist / rel).resolve()
+        # Exact file in dist/ (never outside it), else the SPA entry point
+        if rel and candidate.is_relative_to(self.dist) and candidate.is_file():
+            return candidate
+        return self.dist / "index.html"
+
+
+def _header(scope: Scope, name: bytes) -> str:
+    for key, value in scope["headers"]:
+        if key == name:
+            return value.decode("latin-1")
+    return ""
@@ -0,0 +1,11 @@
+-- V010: Per-trip Splitwise sync watermark for incremental (delta) syncs
+-- last_updated_at is the newest Splitwise `updated_at` applied locally.
+-- last_full_sync_at decides when a delta sync must fall back to a full one.
+
+CREATE TABLE IF NOT EXISTS trip_sync_state (
+    trip_id            VARCHAR(64) NOT NULL PRIMARY KEY COMMENT 'Splitwise group_id',
+    last_updated_at    DATETIME    NULL COMMENT 'Max Splitwise updated_at seen (UTC)',
+    last_full_sync_at  DATETIME    NULL,
+    last_sync_at       DATETIME    NULL,
+    updated_at         TIMESTAMP   NOT NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
@@ -0,0 +1,11 @@
+-- V011: Persistent exchange-rate table
+-- One row per (base, quote) from a full base-currency snapshot. Any other
+-- pair is derived by triangulating through the base.
+
+CREATE TABLE IF NOT EXISTS exchange_rates (
+    base_code   VARCHAR(10)    NOT NULL,
+    quote_code  VARCHAR(10)    NOT NULL,
+    rate        DECIMAL(24, 10) NOT NULL,
+    fetched_at  DATETIME       NOT NULL,
+    PRIMARY KEY (base_code, quote_code)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
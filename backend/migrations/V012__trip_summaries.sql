@@ -0,0 +1,22 @@
+-- V012: Incrementally maintained per-trip totals
+-- One row per (trip, Splitwise user, category, day). Expense writes apply
+-- +/- deltas in the same transaction, so summary reads never scan expenses.
+-- Expenses without a date are bucketed under day 1000-01-01.
+
+CREATE TABLE IF NOT EXISTS trip_summaries (
+    trip_id        VARCHAR(64)   NOT NULL COMMENT 'Splitwise group_id',
+    user_id        BIGINT        NOT NULL COMMENT 'Splitwise user_id',
+    category       VARCHAR(255)  NOT NULL DEFAULT '',
+    day            DATE          NOT NULL COMMENT '1000-01-01 when the expense has no date',
+    amount_inr     DECIMAL(14,2) NOT NULL DEFAULT 0.00,
+    expense_count  INT           NOT NULL DEFAULT 0 COMMENT 'Expense rows (owed shares) in this bucket',
+    updated_at     TIMESTAMP     NOT NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+    PRIMARY KEY (trip_id, user_id, category, day)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+
+-- Backfill from existing expense rows
+INSERT INTO trip_summaries (trip_id, user_id, category, day, amount_inr, expense_count)
+SELECT trip_id, user_id, category, COALESCE(date, '1000-01-01'), SUM(amount_inr), COUNT(*)
+FROM expenses
+GROUP BY trip_id, user_id, category, COALESCE(date, '1000-01-01')
+ON DUPLICATE KEY UPDATE amount_inr = VALUES(amount_inr), expense_count = VALUES(expense_count);
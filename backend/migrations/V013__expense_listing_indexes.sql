@@ -0,0 +1,12 @@
+-- V013: Indexes matching the expense listing order (date DESC, created_at DESC, id DESC)
+-- InnoDB appends the primary key (id) to every secondary index, so these
+-- serve both the ORDER BY and keyset cursors without a filesort.
+
+-- get_user_expenses_by_trip, /get_my_expenses
+CREATE INDEX idx_expenses_trip_user_date ON expenses (trip_id, user_id, date, created_at);
+
+-- get_expenses_by_trip
+CREATE INDEX idx_expenses_trip_date ON expenses (trip_id, date, created_at);
+
+-- Superseded by idx_expenses_trip_user_date (same leading columns)
+DROP INDEX idx_expenses_trip_user ON expenses;
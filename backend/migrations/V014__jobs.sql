@@ -0,0 +1,22 @@
+-- V014: Persisted status for in-process background jobs
+-- Rows are written by backend/jobs.py. Payloads hold only non-secret inputs.
+-- Splitwise credentials stay in worker memory, so a job interrupted by a
+-- restart is marked failed on the next startup rather than resumed.
+
+CREATE TABLE IF NOT EXISTS jobs (
+    id            BIGINT AUTO_INCREMENT PRIMARY KEY,
+    kind          VARCHAR(64)  NOT NULL,
+    status        VARCHAR(16)  NOT NULL DEFAULT 'queued' COMMENT 'queued, running, succeeded or failed',
+    user_id       INT          NULL COMMENT 'Local user who enqueued the job',
+    payload       TEXT         NULL COMMENT 'JSON job input',
+    result        TEXT         NULL COMMENT 'JSON handler return value',
+    error         TEXT         NULL COMMENT 'Last error message',
+    attempts      INT          NOT NULL DEFAULT 0,
+    max_attempts  INT          NOT NULL DEFAULT 1,
+    created_at    TIMESTAMP    NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    started_at    DATETIME     NULL,
+    finished_at   DATETIME     NULL,
+    updated_at    TIMESTAMP    NOT NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+    INDEX idx_jobs_status (status),
+    INDEX idx_jobs_user_created (user_id, created_at)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
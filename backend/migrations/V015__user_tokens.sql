@@ -0,0 +1,15 @@
+-- V015: Splitwise OAuth access tokens per user
+-- Written at /callback so the background scheduler can sync active trips
+-- without a browser session. Deleted again at /logout.
+
+CREATE TABLE IF NOT EXISTS user_tokens (
+    user_id              INT          NOT NULL PRIMARY KEY,
+    access_token         VARCHAR(255) NOT NULL,
+    access_token_secret  VARCHAR(255) NOT NULL,
+    created_at           TIMESTAMP    NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    updated_at           TIMESTAMP    NOT NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+    CONSTRAINT fk_user_tokens_user FOREIGN KEY (user_id) REFERENCES users (id) ON DELETE CASCADE
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+
+-- Active-trip lookups by the scheduler filter trips on their date range
+CREATE INDEX idx_trips_dates ON trips (start_date, end_date);
@@ -0,0 +1,30 @@
+-- V016: Shared Nominatim geocode cache
+-- One row per normalized place name (case, whitespace and diacritics folded
+-- by services/geocode_service.py). Both location coords and the emergency
+-- services area lookup read it, so each place hits Nominatim at most once.
+-- Rows with found = 0 record names Nominatim had no result for.
+
+CREATE TABLE IF NOT EXISTS geocode_cache (
+    query_key     VARCHAR(255)   NOT NULL PRIMARY KEY COMMENT 'Normalized place name',
+    query         VARCHAR(255)   NOT NULL DEFAULT '' COMMENT 'Name as first requested',
+    found         TINYINT(1)     NOT NULL DEFAULT 0,
+    lat           DECIMAL(10, 7) NULL,
+    lon           DECIMAL(10, 7) NULL,
+    bbox_south    DECIMAL(10, 7) NULL,
+    bbox_north    DECIMAL(10, 7) NULL,
+    bbox_west     DECIMAL(10, 7) NULL,
+    bbox_east     DECIMAL(10, 7) NULL,
+    osm_type      VARCHAR(16)    NULL COMMENT 'node, way or relation',
+    osm_id        BIGINT         NULL,
+    area_id       BIGINT         NULL COMMENT 'Overpass area id, ways and relations only',
+    display_name  VARCHAR(500)   NOT NULL DEFAULT '',
+    created_at    TIMESTAMP      NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    updated_at    TIMESTAMP      NOT NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+
+-- Seed from location_coords. Only case and surrounding spaces are folded here,
+-- and OSM ids are unknown (osm_type NULL), so the emergency path refreshes
+-- these rows on first use.
+INSERT IGNORE INTO geocode_cache (query_key, query, found, lat, lon, display_name)
+SELECT LOWER(TRIM(name)), name, lat IS NOT NULL, lat, lon, display_name
+FROM location_coords;
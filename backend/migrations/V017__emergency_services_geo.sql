@@ -0,0 +1,15 @@
+-- V017: Spatial index over cached emergency services
+-- geo holds POINT(lon, lat) in SRID 0, the axis order ST_Distance_Sphere
+-- expects. A SPATIAL index needs a NOT NULL column with a fixed SRID, so the
+-- column is added nullable, backfilled, then tightened. Rows without
+-- coordinates get POINT(0, 0) and are filtered out by lat IS NOT NULL.
+
+ALTER TABLE emergency_services_cache
+    ADD COLUMN geo POINT NULL SRID 0 AFTER lon;
+
+UPDATE emergency_services_cache
+SET geo = POINT(COALESCE(lon, 0), COALESCE(lat, 0));
+
+ALTER TABLE emergency_services_cache
+    MODIFY COLUMN geo POINT NOT NULL SRID 0,
+    ADD SPATIAL INDEX idx_es_geo (geo);
@@ -0,0 +1,10 @@
+-- V018: Stored Splitwise tokens are now Fernet-encrypted (TOKEN_ENCRYPTION_KEY)
+-- Ciphertext is longer than the raw tokens, so the columns grow. Plaintext
+-- rows from V015 cannot be encrypted in SQL and are dropped. Each user's
+-- tokens are stored again, encrypted, at their next login.
+
+DELETE FROM user_tokens;
+
+ALTER TABLE user_tokens
+    MODIFY COLUMN access_token        VARCHAR(512) NOT NULL,
+    MODIFY COLUMN access_token_secret VARCHAR(512) NOT NULL;
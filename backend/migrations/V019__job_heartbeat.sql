@@ -0,0 +1,8 @@
+-- V019: Jobs carry a heartbeat from the process that holds them
+-- Unfinished jobs whose heartbeat goes stale are failed (see backend/jobs.py)
+-- instead of failing every unfinished job at startup, which killed live jobs
+-- of other workers.
+
+ALTER TABLE jobs
+    ADD COLUMN heartbeat_at DATETIME NULL COMMENT 'Last heartbeat (UTC) of the process holding the job' AFTER finished_at,
+    ADD INDEX idx_jobs_status_heartbeat (status, heartbeat_at);
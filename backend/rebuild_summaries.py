@@ -0,0 +1,28 @@
+"""Recompute trip_summaries from the expenses table.
+
+Usage (from the project root):
+    python -m backend.rebuild_summaries              # every trip
+    python -m backend.rebuild_summaries 123 456      # specific Splitwise group ids
+"""
+import argparse
+
+from backend.db import close_pool
+from backend.logging_config import setup_logging
+from backend.services import summary_service
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Rebuild per-trip expense summaries to fix drift.")
+    parser.add_argument("trip_ids", nargs="*", help="Splitwise group ids to rebuild (default: all trips)")
+    args = parser.parse_args()
+
+    setup_logging()
+    try:
+        rows = summary_service.rebuild(args.trip_ids or None)
+    finally:
+        close_pool()
+    print(f"Rebuilt {rows} summary row(s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,45 @@
+import hashlib
+from decimal import Decimal
+from typing import Any
+
+import orjson
+from fastapi import Request, Response
+from fastapi.responses import ORJSONResponse as _ORJSONResponse
+
+
+def _orjson_default(value: Any) -> Any:
+    # orjson handles dict/list/str/int/float/date/datetime natively
+    if isinstance(value, Decimal):
+        return float(value)
+    raise TypeError(f"Type is not JSON serializable: {type(value).__name__}")
+
+
+class ORJSONResponse(_ORJSONResponse):
+    """Default response class: orjson encoding, with Decimal support.
+
+    Handlers that return large payloads (expense listings, Splitwise
+    pass-through) return this directly, which also skips FastAPI's
+    jsonable_encoder walk over the content.
+    """
+
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content, default=_orjson_default, option=orjson.OPT_NON_STR_KEYS)
+
+
+def compute_etag(payload) -> str:
+    """Strong ETag for a JSON-serialisable payload (stable across key order)."""
+    body = orjson.dumps(payload, default=str, option=orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS)
+    return '"' + hashlib.sha1(body).hexdigest() + '"'
+
+
+def conditional_json_response(request: Request, payload, etag: str) -> Response:
+    """Return 304 if the client already holds *etag*, else the JSON payload.
+
+    ``no-cache`` lets the browser keep the body but forces it to revalidate
+    with If-None-Match on every use, so a stale copy is never shown.
+    """
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if_none_match = request.headers.get("if-none-match", "")
+    if etag in [tag.strip() for tag in if_none_match.split(",")]:
+        return Response(status_code=304, headers=headers)
+    return ORJSONResponse(payload, headers=headers)
@@ -0,0 +1,53 @@
+"""Typed mapping of DB result rows into JSON-ready dicts.
+
+Services fetch plain tuples and hand them to a RowMapper, which resolves a
+converter per column once per result set (from ``cursor.description``) and
+then applies only those converters to each row.  Converters are plain
+callables, usually ``float`` (DECIMAL columns) or ``str`` (DATE/DATETIME
+columns, keeping the ``2024-01-31 09:15:00`` format the API has always
+returned).
+"""
+from typing import Any, Callable, Iterable, Optional, Sequence
+
+Converter = Callable[[Any], Any]
+
+
+class RowMapper:
+    """Converts tuple rows to dicts, applying per-column converters.
+
+    ``None`` values are passed through untouched; columns without a
+    converter are copied as-is.
+    """
+
+    def __init__(self, converters: Optional[dict[str, Converter]] = None):
+        self._converters = dict(converters or {})
+
+    def _plan(self, description: Sequence) -> tuple[list[str], list[tuple[int, Converter]]]:
+        names = [col[0] for col in description]
+        steps = [(i, self._converters[name]) for i, name in enumerate(names) if name in self._converters]
+        return names, steps
+
+    def map(self, description: Sequence, rows: Iterable[Sequence]) -> list[dict]:
+        """Map *rows* whose columns are described by a DB-API ``cursor.description``."""
+        names, steps = self._plan(description)
+        if not steps:
+            return [dict(zip(names, row)) for row in rows]
+        out = []
+        for row in rows:
+            values = list(row)
+            for i, convert in steps:
+                value = values[i]
+                if value is not None:
+                    values[i] = convert(value)
+            out.append(dict(zip(names, values)))
+        return out
+
+    def fetchall(self, cursor) -> list[dict]:
+        """Fetch every remaining row from a tuple cursor and map it."""
+        return self.map(cursor.description, cursor.fetchall())
+
+    def fetchone(self, cursor) -> Optional[dict]:
+        row = cursor.fetchone()
+        if row is None:
+            return None
+        return self.map(cursor.description, [row])[0]
@@ -0,0 +1,96 @@
+"""Periodic background sync of active trips.
+
+Every ``SYNC_INTERVAL_SEC`` the scheduler picks the trips whose date range
+includes today and runs ``expense_service.sync_trip_expenses`` for each one
+with a member's stored access tokens (saved encrypted at ``/callback``;
+tokens Splitwise rejects with 401 are deleted).  At most
+``SYNC_CONCURRENCY`` syncs run at once, each on a worker thread.  Each sync
+starts after a random delay of up to ``SYNC_JITTER_SEC``, so trips do not
+all hit Splitwise at the same moment.  Reads never wait on these syncs:
+they only query the local tables.
+"""
+import asyncio
+import logging
+import random
+from typing import Optional
+
+import requests
+
+from backend.config import settings
+from backend.dependencies import build_oauth_session
+from backend.services import expense_service, token_service
+
+logger = logging.getLogger(__name__)
+
+_task: Optional[asyncio.Task] = None
+
+
+async def _sync_one(group_id: str, credentials: tuple[int, str, str], slots: asyncio.Semaphore) -> bool:
+    user_id, token, secret = credentials
+    await asyncio.sleep(random.uniform(0, settings.SYNC_JITTER_SEC))
+    async with slots:
+        try:
+            oauth = build_oauth_session(token, secret)
+            result = await asyncio.to_thread(expense_service.sync_trip_expenses, oauth, group_id)
+        except requests.HTTPError as exc:
+            if exc.response is not None and exc.response.status_code == 401:
+                # Revoked or expired: drop the tokens instead of retrying them every round
+                logger.warning("Scheduled sync: tokens of user=%s rejected (401), deleting them", user_id)
+                await token_service.delete_tokens_async(user_id)
+            else:
+                logger.exception("Scheduled sync failed: group_id=%s", group_id)
+            return False
+        except Exception:
+            logger.exception("Scheduled sync failed: group_id=%s", group_id)
+            return False
+    logger.info("Scheduled sync: group_id=%s mode=%s inserted=%d", group_id, result["mode"], result["inserted"])
+    return True
+
+
+async def sync_active_trips() -> int:
+    """Sync every active trip once. Returns the number of trips synced successfully."""
+    credentials = await token_service.get_active_trip_credentials_async()
+    if not credentials:
+        logger.debug("Scheduled sync: no active trips")
+        return 0
+    slots = asyncio.Semaphore(max(1, settings.SYNC_CONCURRENCY))
+    results = await asyncio.gather(
+        *(_sync_one(group_id, creds, slots) for group_id, creds in credentials.items())
+    )
+    synced = sum(results)
+    logger.info("Scheduled sync round: %d/%d trip(s) synced", synced, len(results))
+    return synced
+
+
+async def _run() -> None:
+    while True:
+        await asyncio.sleep(settings.SYNC_INTERVAL_SEC)
+        try:
+            await sync_active_trips()
+        except Exception:
+            logger.exception("Scheduled sync round failed")
+
+
+def start() -> None:
+    """Start the scheduler loop (application startup); no-op when disabled."""
+    global _task
+    if settings.SYNC_INTERVAL_SEC <= 0 or _task is not None:
+        return
+    _task = asyncio.create_task(_run(), name="trip-sync-scheduler")
+    logger.info(
+        "Trip sync scheduler started: interval=%ss concurrency=%s jitter=%ss",
+        settings.SYNC_INTERVAL_SEC, settings.SYNC_CONCURRENCY, settings.SYNC_JITTER_SEC,
+    )
+
+
+async def stop() -> None:
+    """Cancel the scheduler loop (application shutdown)."""
+    global _task
+    if _task is None:
+        return
+    task, _task = _task, None
+    task.cancel()
+    try:
+        await task
+    except asyncio.CancelledError:
+        pass
@@ -31,6 +31,7 @@ CREATE TABLE IF NOT EXISTS trips (
     updated_at      TIMESTAMP     NOT NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
     INDEX idx_user_id (user_id),
     INDEX idx_trips_group_id (group_id),
+    INDEX idx_trips_dates (start_date, end_date),
     CONSTRAINT fk_trips_user FOREIGN KEY (user_id) REFERENCES users (id)
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
 
@@ -53,7 +54,8 @@ CREATE TABLE IF NOT EXISTS expenses (
     INDEX idx_trip_id (trip_id),
     INDEX idx_expense_id (expense_id),
     INDEX idx_expenses_user_id (user_id),
-    INDEX idx_expenses_trip_user (trip_id, user_id),
+    INDEX idx_expenses_trip_user_date (trip_id, user_id, date, created_at),
+    INDEX idx_expenses_trip_date (trip_id, date, created_at),
     UNIQUE KEY uq_trip_expense_user (trip_id, expense_id, user_id)
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
 
@@ -66,3 +68,77 @@ CREATE TABLE IF NOT EXISTS location_coords (
     created_at   TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
     UNIQUE KEY uq_location_name (name)
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+
+CREATE TABLE IF NOT EXISTS trip_sync_state (
+    trip_id            VARCHAR(64) NOT NULL PRIMARY KEY COMMENT 'Splitwise group_id',
+    last_updated_at    DATETIME    NULL COMMENT 'Max Splitwise updated_at seen (UTC)',
+    last_full_sync_at  DATETIME    NULL,
+    last_sync_at       DATETIME    NULL,
+    updated_at         TIMESTAMP   NOT NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+
+CREATE TABLE IF NOT EXISTS exchange_rates (
+    base_code   VARCHAR(10)    NOT NULL,
+    quote_code  VARCHAR(10)    NOT NULL,
+    rate        DECIMAL(24, 10) NOT NULL,
+    fetched_at  DATETIME       NOT NULL,
+    PRIMARY KEY (base_code, quote_code)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+
+CREATE TABLE IF NOT EXISTS trip_summaries (
+    trip_id        VARCHAR(64)   NOT NULL COMMENT 'Splitwise group_id',
+    user_id        BIGINT        NOT NULL COMMENT 'Splitwise user_id',
+    category       VARCHAR(255)  NOT NULL DEFAULT '',
+    day            DATE          NOT NULL COMMENT '1000-01-01 when the expense has no date',
+    amount_inr     DECIMAL(14,2) NOT NULL DEFAULT 0.00,
+    expense_count  INT           NOT NULL DEFAULT 0 COMMENT 'Expense rows (owed shares) in this bucket',
+    updated_at     TIMESTAMP     NOT NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+    PRIMARY KEY (trip_id, user_id, category, day)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+
+CREATE TABLE IF NOT EXISTS jobs (
+    id            BIGINT AUTO_INCREMENT PRIMARY KEY,
+    kind          VARCHAR(64)  NOT NULL,
+    status        VARCHAR(16)  NOT NULL DEFAULT 'queued' COMMENT 'queued, running, succeeded or failed',
+    user_id       INT          NULL COMMENT 'Local user who enqueued the job',
+    payload       TEXT         NULL COMMENT 'JSON job input',
+    result        TEXT         NULL COMMENT 'JSON handler return value',
+    error         TEXT         NULL COMMENT 'Last error message',
+    attempts      INT          NOT NULL DEFAULT 0,
+    max_attempts  INT          NOT NULL DEFAULT 1,
+    created_at    TIMESTAMP    NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    started_at    DATETIME     NULL,
+    finished_at   DATETIME     NULL,
+    heartbeat_at  DATETIME     NULL COMMENT 'Last heartbeat (UTC) of the process holding the job',
+    updated_at    TIMESTAMP    NOT NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+    INDEX idx_jobs_status (status),
+    INDEX idx_jobs_status_heartbeat (status, heartbeat_at),
+    INDEX idx_jobs_user_created (user_id, created_at)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+
+CREATE TABLE IF NOT EXISTS user_tokens (
+    user_id              INT          NOT NULL PRIMARY KEY,
+    access_token         VARCHAR(512) NOT NULL,
+    access_token_secret  VARCHAR(512) NOT NULL,
+    created_at           TIMESTAMP    NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    updated_at           TIMESTAMP    NOT NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+    CONSTRAINT fk_user_tokens_user FOREIGN KEY (user_id) REFERENCES users (id) ON DELETE CASCADE
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+
+CREATE TABLE IF NOT EXISTS geocode_cache (
+    query_key     VARCHAR(255)   NOT NULL PRIMARY KEY COMMENT 'Normalized place name',
+    query         VARCHAR(255)   NOT NULL DEFAULT '' COMMENT 'Name as first requested',
+    found         TINYINT(1)     NOT NULL DEFAULT 0,
+    lat           DECIMAL(10, 7) NULL,
+    lon           DECIMAL(10, 7) NULL,
+    bbox_south    DECIMAL(10, 7) NULL,
+    bbox_north    DECIMAL(10, 7) NULL,
+    bbox_west     DECIMAL(10, 7) NULL,
+    bbox_east     DECIMAL(10, 7) NULL,
+    osm_type      VARCHAR(16)    NULL COMMENT 'node, way or relation',
+    osm_id        BIGINT         NULL,
+    area_id       BIGINT         NULL COMMENT 'Overpass area id, ways and relations only',
+    display_name  VARCHAR(500)   NOT NULL DEFAULT '',
+    created_at    TIMESTAMP      NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    updated_at    TIMESTAMP      NOT NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
@@ -0,0 +1,226 @@
+import logging
+from datetime import date, timedelta
+from decimal import Decimal
+from typing import Optional
+
+from backend import async_db
+
+logger = logging.getLogger(__name__)
+
+# Category names as used by the frontend (AnalyticsPage.jsx, ExpenseForm.jsx)
+STAY_CATEGORIES = ("Stays - Hotel", "Stays - Hostel")
+GRAPH_EXCLUDED_CATEGORIES = ("Transit - Flight",)
+FOOD_CATEGORY = "Food"
+
+DEFAULT_TOP_N = 5
+MAX_TOP_N = 50
+
+NOT_SET = "Not set"
+
+
+def _placeholders(values: tuple) -> str:
+    return ",".join(["%s"] * len(values))
+
+
+def _scope_filter(trip_id: str, splitwise_user_id: Optional[int],
+                  date_from: Optional[str], date_to: Optional[str]) -> tuple[str, list]:
+    """WHERE clause (and params) shared by every aggregate query."""
+    clauses = ["trip_id = %s"]
+    params: list = [trip_id]
+    if splitwise_user_id is not None:
+        clauses.append("user_id = %s")
+        params.append(splitwise_user_id)
+    if date_from:
+        clauses.append("date >= %s")
+        params.append(date_from)
+    if date_to:
+        clauses.append("date <= %s")
+        params.append(date_to)
+    return " AND ".join(clauses), params
+
+
+def _build_queries(trip_id: str, splitwise_user_id: Optional[int],
+                   date_from: Optional[str], date_to: Optional[str],
+                   top_n: int) -> dict[str, tuple[str, list]]:
+    """Return {name: (sql, params)} for every aggregate the analytics view needs.
+
+    A Splitwise expense has one row per user who owes on it, so trip-wide
+    counts use COUNT(DISTINCT expense_id) and the top-N list groups by
+    expense_id to rank whole expenses rather than individual shares.
+    """
+    where, params = _scope_filter(trip_id, splitwise_user_id, date_from, date_to)
+    graph_where = f"{where} AND category NOT IN ({_placeholders(GRAPH_EXCLUDED_CATEGORIES)})"
+    graph_params = params + list(GRAPH_EXCLUDED_CATEGORIES)
+    stay_in = f"category IN ({_placeholders(STAY_CATEGORIES)})"
+    # Stays with a real check-in/check-out range are spread per night in Python
+    spread = "(start_date IS NOT NULL AND end_date IS NOT NULL AND start_date <> end_date)"
+
+    return {
+        "totals": (
+            f"SELECT COUNT(DISTINCT expense_id) AS count, COALESCE(SUM(amount_inr), 0) AS value "
+            f"FROM expenses WHERE {where}",
+            params,
+        ),
+        "by_category": (
+            f"SELECT category AS label, SUM(amount_inr) AS value, COUNT(DISTINCT expense_id) AS count "
+            f"FROM expenses WHERE {where} GROUP BY category ORDER BY value DESC",
+            params,
+        ),
+        "by_location": (
+            f"SELECT location AS label, SUM(amount_inr) AS value, COUNT(DISTINCT expense_id) AS count "
+            f"FROM expenses WHERE {graph_where} GROUP BY location ORDER BY value DESC",
+            graph_params,
+        ),
+        "by_currency": (
+            f"SELECT currency_code AS label, SUM(amount_inr) AS value, "
+            f"SUM(original_amount) AS original_amount, COUNT(DISTINCT expense_id) AS count "
+            f"FROM expenses WHERE {where} GROUP BY currency_code ORDER BY value DESC",
+            params,
+        ),
+        "by_day": (
+            f"SELECT date AS label, SUM(amount_inr) AS value FROM expenses "
+            f"WHERE {graph_where} AND NOT ({stay_in} AND {spread}) GROUP BY date",
+            graph_params + list(STAY_CATEGORIES),
+        ),
+        "stay_ranges": (
+            f"SELECT start_date, end_date, SUM(amount_inr) AS value FROM expenses "
+            f"WHERE {where} AND {stay_in} AND {spread} GROUP BY start_date, end_date",
+            params + list(STAY_CATEGORIES),
+        ),
+        "stay_days": (
+            f"SELECT date AS label, SUM(amount_inr) AS value FROM expenses "
+            f"WHERE {where} AND {stay_in} AND NOT {spread} AND date IS NOT NULL GROUP BY date",
+            params + list(STAY_CATEGORIES),
+        ),
+        "food_per_day": (
+            f"SELECT date AS label, SUM(amount_inr) AS value FROM expenses "
+            f"WHERE {where} AND category = %s GROUP BY date ORDER BY date",
+            params + [FOOD_CATEGORY],
+        ),
+        "top_expenses": (
+            f"SELECT expense_id, MAX(description) AS description, MAX(category) AS category, "
+            f"MAX(location) AS location, MAX(date) AS date, SUM(amount_inr) AS amount_inr "
+            f"FROM expenses WHERE {where} GROUP BY expense_id "
+            f"ORDER BY amount_inr DESC LIMIT %s",
+            params + [top_n],
+        ),
+    }
+
+
+def _num(value) -> float:
+    return float(value) if isinstance(value, Decimal) else float(value or 0)
+
+
+def _label(value) -> str:
+    return str(value) if value else NOT_SET
+
+
+def _buckets(rows: list[dict], sort_by_label: bool = False) -> list[dict]:
+    """Normalise GROUP BY rows into [{label, value, ...}] for the charts."""
+    out = []
+    for row in rows:
+        item = {"label": _label(row["label"]), "value": round(_num(row["value"]), 2)}
+        if "count" in row:
+            item["count"] = int(row["count"])
+        if "original_amount" in row:
+            item["original_amount"] = round(_num(row["original_amount"]), 2)
+        out.append(item)
+    if sort_by_label:
+        out.sort(key=lambda d: d["label"])
+    else:
+        out.sort(key=lambda d: d["value"], reverse=True)
+    return out
+
+
+def _spread_nights(ranges: list[dict], into: dict[str, float]) -> None:
+    """Add each stay's amount to *into*, split evenly over its nights."""
+    for row in ranges:
+        start, end = row["start_date"], row["end_date"]
+        if isinstance(start, str):
+            start, end = date.fromisoformat(start), date.fromisoformat(end)
+        nights = max(1, (end - start).days)
+        per_night = _num(row["value"]) / nights
+        day = start
+        while day < end:
+            key = day.isoformat()
+            into[key] = into.get(key, 0.0) + per_night
+            day += timedelta(days=1)
+
+
+def _to_buckets(totals: dict[str, float], sort_by_label: bool = False) -> list[dict]:
+    return _buckets([{"label": k, "value": v} for k, v in totals.items()], sort_by_label)
+
+
+def _assemble(results: dict[str, list[dict]], scope: str) -> dict:
+    """Shape raw query results into the analytics payload."""
+    totals = results["totals"][0] if results["totals"] else {"count": 0, "value": 0}
+
+    stay_nights: dict[str, float] = {}
+    _spread_nights(results["stay_ranges"], stay_nights)
+
+    # By-day mirrors the page's old behaviour: graph-eligible rows by date,
+    # with ranged stays spread over their nights.
+    by_day: dict[str, float] = {}
+    for row in results["by_day"]:
+        key = _label(row["label"])
+        by_day[key] = by_day.get(key, 0.0) + _num(row["value"])
+    for key, value in stay_nights.items():
+        by_day[key] = by_day.get(key, 0.0) + value
+
+    stay_per_night = dict(stay_nights)
+    for row in results["stay_days"]:
+        key = str(row["label"])
+        stay_per_night[key] = stay_per_night.get(key, 0.0) + _num(row["value"])
+
+    top = [
+        {
+            "expense_id": row["expense_id"],
+            "description": row["description"] or "",
+            "category": row["category"] or "",
+            "location": row["location"] or "",
+            "date": str(row["date"]) if row["date"] else None,
+            "amount_inr": round(_num(row["amount_inr"]), 2),
+        }
+        for row in results["top_expenses"]
+    ]
+
+    return {
+        "scope": scope,
+        "total": {"count": int(totals["count"] or 0), "amount_inr": round(_num(totals["value"]), 2)},
+        "by_category": _buckets(results["by_category"]),
+        "by_location": _buckets(results["by_location"]),
+        "by_currency": _buckets(results["by_currency"]),
+        "by_day": _to_buckets(by_day),
+        "stay_per_night": _to_buckets(stay_per_night, sort_by_label=True),
+        "food_per_day": _buckets(results["food_per_day"], sort_by_label=True),
+        "top_expenses": top,
+    }
+
+
+def _clamp_top_n(top_n: int) -> int:
+    return max(1, min(int(top_n), MAX_TOP_N))
+
+
+async def get_trip_analytics_async(
+    trip_id: str,
+    splitwise_user_id: Optional[int] = None,
+    date_from: Optional[str] = None,
+    date_to: Optional[str] = None,
+    top_n: int = DEFAULT_TOP_N,
+) -> dict:
+    """Aggregate a trip's expenses in SQL and return only the totals.
+
+    With *splitwise_user_id* the figures cover that user's owed shares;
+    without it they cover the whole trip.  *date_from*/*date_to* filter on
+    the expense date (inclusive).
+    """
+    queries = _build_queries(trip_id, splitwise_user_id, date_from, date_to, _clamp_top_n(top_n))
+    results = {}
+    async with async_db.transaction(dictionary=True) as cursor:
+        for name, (sql, params) in queries.items():
+            await cursor.execute(sql, tuple(params))
+            results[name] = list(await cursor.fetchall())
+
+    scope = "trip" if splitwise_user_id is None else "user"
+    logger.info("get_trip_analytics: trip_id=%s scope=%s", trip_id, scope)
+    return _assemble(results, scope)
@@ -3,6 +3,7 @@ import logging
 from requests_oauthlib import OAuth1Session
 
 from backend.config import settings
+from backend.http_client import mount_pooled_transport
 from backend.constants import (
     REQUEST_TOKEN_URL,
     AUTHORIZATION_URL,
@@ -16,7 +17,9 @@ logger = logging.getLogger(__name__)
 def create_request_token() -> dict:
     """Initiate OAuth1 flow and return request token data + authorization URL."""
     logger.info("Requesting OAuth request token")
-    oauth = OAuth1Session(settings.CONSUMER_KEY, client_secret=settings.CONSUMER_SECRET)
+    oauth = mount_pooled_transport(
+        OAuth1Session(settings.CONSUMER_KEY, client_secret=settings.CONSUMER_SECRET)
+    )
     fetch_response = oauth.fetch_request_token(REQUEST_TOKEN_URL)
     authorization_url = oauth.authorization_url(AUTHORIZATION_URL)
     logger.info("Request token obtained")
@@ -33,13 +36,13 @@ def exchange_access_token(
     verifier: str,
 ) -> dict:
     """Exchange the request token + verifier for a permanent access token."""
-    oauth = OAuth1Session(
+    oauth = mount_pooled_transport(OAuth1Session(
         settings.CONSUMER_KEY,
         client_secret=settings.CONSUMER_SECRET,
         resource_owner_key=resource_owner_key,
         resource_owner_secret=resource_owner_secret,
         verifier=verifier,
-    )
+    ))
     tokens = oauth.fetch_access_token(ACCESS_TOKEN_URL)
     logger.info("Access token exchanged successfully")
     return {
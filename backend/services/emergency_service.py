@@ -1,92 +1,144 @@
+import asyncio
 import logging
+import math
+import threading
 import time
 from typing import Optional
 
 import requests
 
-from backend.db import get_connection
+from backend import async_db
+from backend.cache import LRUCache
+from backend.db import advisory_lock, bulk_insert, get_connection
+from backend.rows import RowMapper
+from backend.services import geocode_service
 
 logger = logging.getLogger(__name__)
 
-NOMINATIM_SEARCH_URL = "https://nominatim.openstreetmap.org/search"
 OVERPASS_URL = "https://overpass-api.de/api/interpreter"
-NOMINATIM_HEADERS = {"User-Agent": "SohamSplitwise/1.0"}
 
+# OSM (key, value) that identifies each category's elements
+CATEGORY_OSM_TAGS = {
+    "hospital": ("amenity", "hospital"),
+    "police": ("amenity", "police"),
+    "pharmacy": ("amenity", "pharmacy"),
+}
 CATEGORY_OVERPASS_TAGS = {
-    "hospital": '["amenity"="hospital"]',
-    "police": '["amenity"="police"]',
-    "pharmacy": '["amenity"="pharmacy"]',
+    category: f'["{key}"="{value}"]' for category, (key, value) in CATEGORY_OSM_TAGS.items()
 }
+MAX_RESULTS_PER_CATEGORY = 50
 
 CACHE_MAX_AGE_DAYS = 30
+CACHE_MAX_AGE_SEC = CACHE_MAX_AGE_DAYS * 86400
+# In-memory tier in front of emergency_services_cache, keyed by (location, category)
+MEMORY_CACHE_ENTRIES = 512
+# How long a refresh waits for another worker's refresh of the same location
+REFRESH_LOCK_TIMEOUT_SEC = 30
+# Search radii tried in turn by the nearest-services lookup until k are found
+NEAREST_RADII_KM = (5, 25, 100, 500)
+# One place can be cached under several overlapping city names
+NEAREST_DUPLICATE_SLACK = 4
+_KM_PER_DEGREE = 111.32
+
+SERVICE_ROWS = RowMapper({"lat": float, "lon": float, "cached_at": float})
+NEAREST_ROWS = RowMapper({"lat": float, "lon": float, "distance_m": float})
+
+# Selects the category back so mapped rows already have the service dict shape;
+# cached_at is split off again by _to_entry
+_SELECT_CACHED_SQL = (
+    "SELECT %s AS category, name, address, phone, opening_hours, lat, lon, osm_id, "
+    "UNIX_TIMESTAMP(created_at) AS cached_at "
+    "FROM emergency_services_cache "
+    "WHERE location = %s AND category = %s"
+)
+_DELETE_CACHED_SQL = "DELETE FROM emergency_services_cache WHERE location = %s AND category IN ({})"
+_CACHE_COLUMNS = (
+    "location", "category", "name", "address", "phone", "opening_hours", "lat", "lon", "geo", "osm_id",
+)
+# geo is POINT(lon, lat), built from two parameters
+_CACHE_VALUE_SQL = {"geo": "POINT(%s, %s)"}
+# MBRContains over the search box uses the SPATIAL index; the HAVING keeps
+# only rows inside the search circle so corners of the box cannot outrank
+# closer rows just outside it
+_SELECT_NEAREST_SQL = """
+    SELECT category, name, address, phone, opening_hours, lat, lon, osm_id, location,
+           ST_Distance_Sphere(geo, POINT(%s, %s)) AS distance_m
+    FROM emergency_services_cache
+    WHERE MBRContains(ST_GeomFromText(%s), geo)
+      AND lat IS NOT NULL
+      AND category IN ({})
+    HAVING distance_m <= %s
+    ORDER BY distance_m
+    LIMIT %s
+"""
 
 
-def _resolve_osm_area_id(location: str) -> Optional[int]:
-    """Resolve a city name to an Overpass area ID via Nominatim."""
-    try:
-        resp = requests.get(
-            NOMINATIM_SEARCH_URL,
-            params={"q": location, "format": "json", "limit": 1},
-            headers=NOMINATIM_HEADERS,
-            timeout=10,
-        )
-        resp.raise_for_status()
-        data = resp.json()
-        if data and data[0].get("osm_type") == "relation":
-            return 3600000000 + int(data[0]["osm_id"])
-        if data and data[0].get("osm_type") == "way":
-            return 2400000000 + int(data[0]["osm_id"])
-        if data and data[0].get("osm_type") == "node":
-            # Nodes can't be used as areas — fall back to bounding box search
-            return None
-    except Exception:
-        logger.warning("Nominatim lookup failed for '%s'", location, exc_info=True)
-    return None
-
+def _build_overpass_query(area_id: int, categories: list[str]) -> str:
+    """Build one Overpass QL query for several categories within an area.
 
-def _build_overpass_query(area_id: int, category: str) -> str:
-    """Build an Overpass QL query for a category within an area."""
-    tag = CATEGORY_OVERPASS_TAGS.get(category, '["amenity"="hospital"]')
-    return f"""
-[out:json][timeout:15];
-area({area_id})->.a;
-(
-  node{tag}(area.a);
-  way{tag}(area.a);
-  relation{tag}(area.a);
+    Each category gets its own ``out`` statement so the per-category result
+    limit still applies inside the single request.
+    """
+    blocks = "".join(
+        f"""(
+  node{CATEGORY_OVERPASS_TAGS[c]}(area.a);
+  way{CATEGORY_OVERPASS_TAGS[c]}(area.a);
+  relation{CATEGORY_OVERPASS_TAGS[c]}(area.a);
 );
-out center body 50;
+out center body {MAX_RESULTS_PER_CATEGORY};
 """
+        for c in categories
+    )
+    return f"""
+[out:json][timeout:25];
+area({area_id})->.a;
+{blocks}"""
 
 
-def _build_overpass_bbox_query(lat: float, lon: float, category: str, radius_deg: float = 0.15) -> str:
+def _build_overpass_bbox_query(lat: float, lon: float, categories: list[str], radius_deg: float = 0.15) -> str:
     """Fallback: bounding-box query when we can't resolve an area ID."""
-    tag = CATEGORY_OVERPASS_TAGS.get(category, '["amenity"="hospital"]')
-    south = lat - radius_deg
-    north = lat + radius_deg
-    west = lon - radius_deg
-    east = lon + radius_deg
-    return f"""
-[out:json][timeout:15];
-(
-  node{tag}({south},{west},{north},{east});
-  way{tag}({south},{west},{north},{east});
+    bbox = f"{lat - radius_deg},{lon - radius_deg},{lat + radius_deg},{lon + radius_deg}"
+    blocks = "".join(
+        f"""(
+  node{CATEGORY_OVERPASS_TAGS[c]}({bbox});
+  way{CATEGORY_OVERPASS_TAGS[c]}({bbox});
 );
-out center body 50;
+out center body {MAX_RESULTS_PER_CATEGORY};
 """
+        for c in categories
+    )
+    return f"""
+[out:json][timeout:25];
+{blocks}"""
+
 
+def _element_category(tags: dict, categories: list[str]) -> Optional[str]:
+    for category in categories:
+        key, value = CATEGORY_OSM_TAGS[category]
+        if tags.get(key) == value:
+            return category
+    return None
 
-def _parse_overpass_elements(elements: list, category: str) -> list[dict]:
-    """Parse Overpass JSON elements into a flat list of service dicts."""
-    results = []
+
+def _parse_overpass_elements(elements: list, categories: list[str]) -> dict[str, list[dict]]:
+    """Split Overpass JSON elements by category tag into flat service dicts.
+
+    Returns {category: [services]} with an entry for every requested category.
+    """
+    results: dict[str, list[dict]] = {category: [] for category in categories}
     seen_ids = set()
     for el in elements:
-        osm_id = el.get("id")
-        if osm_id in seen_ids:
+        # Node, way and relation ids are separate number spaces
+        key = (el.get("type"), el.get("id"))
+        if key in seen_ids:
             continue
-        seen_ids.add(osm_id)
+        seen_ids.add(key)
         tags = el.get("tags", {})
 
+        category = _element_category(tags, categories)
+        if category is None:
+            continue
+
         name = (
             tags.get("name:en")
             or tags.get("int_name")
@@ -110,7 +162,7 @@ def _parse_overpass_elements(elements: list, category: str) -> list[dict]:
         phone = tags.get("phone") or tags.get("contact:phone") or ""
         opening_hours = tags.get("opening_hours", "")
 
-        results.append({
+        results[category].append({
             "category": category,
             "name": name,
             "address": address,
@@ -123,104 +175,191 @@ def _parse_overpass_elements(elements: list, category: str) -> list[dict]:
     return results
 
 
-def _fetch_from_overpass(location: str, category: str) -> list[dict]:
-    """Fetch emergency services from Overpass API for a location + category."""
-    area_id = _resolve_osm_area_id(location)
+def _fetch_from_overpass(location: str, categories: list[str]) -> Optional[dict[str, list[dict]]]:
+    """Fetch several categories of emergency services for a location.
 
-    if area_id:
-        query = _build_overpass_query(area_id, category)
+    One Overpass request whatever the number of categories; the area comes
+    from the shared geocode cache (Nominatim only on a miss).  Nodes cannot be
+    used as areas, so those fall back to a bounding box around the point.
+    Returns None when geocoding or Overpass fails, so callers can tell an
+    outage from a place that has no such services.
+    """
+    place = geocode_service.geocode(location, need_osm=True)
+    if place is None:
+        logger.warning("Could not geocode '%s'", location)
+        return None
+
+    if place["area_id"]:
+        query = _build_overpass_query(place["area_id"], categories)
     else:
-        # Fallback: get coords from Nominatim and do bbox search
-        try:
-            resp = requests.get(
-                NOMINATIM_SEARCH_URL,
-                params={"q": location, "format": "json", "limit": 1},
-                headers=NOMINATIM_HEADERS,
-                timeout=10,
-            )
-            data = resp.json()
-            if not data:
-                logger.warning("Nominatim returned no results for '%s'", location)
-                return []
-            lat, lon = float(data[0]["lat"]), float(data[0]["lon"])
-            query = _build_overpass_bbox_query(lat, lon, category)
-        except Exception:
-            logger.warning("Fallback geocode failed for '%s'", location, exc_info=True)
-            return []
+        query = _build_overpass_bbox_query(place["lat"], place["lon"], categories)
 
     try:
         resp = requests.post(
             OVERPASS_URL,
             data={"data": query},
             headers={"User-Agent": "SohamSplitwise/1.0"},
-            timeout=20,
+            timeout=30,
         )
         resp.raise_for_status()
         elements = resp.json().get("elements", [])
-        return _parse_overpass_elements(elements, category)
+        return _parse_overpass_elements(elements, categories)
     except Exception:
-        logger.warning("Overpass query failed for '%s' / '%s'", location, category, exc_info=True)
-        return []
+        logger.warning("Overpass query failed for '%s' / %s", location, ",".join(categories), exc_info=True)
+        return None
+
+
+def _cache_rows(location: str, category: str, services: list[dict]) -> list[tuple]:
+    # Services without coordinates are stored at POINT(0, 0), see V017
+    return [
+        (location, category, s["name"], s["address"], s["phone"],
+         s.get("opening_hours", ""), s["lat"], s["lon"], s["lon"] or 0, s["lat"] or 0, s["osm_id"])
+        for s in services
+    ]
+
+
+# Values are (cached_at epoch seconds, [services]); empty results are kept too
+_memory = LRUCache("emergency_services", MEMORY_CACHE_ENTRIES)
+
+# Single flight: one refresh per location at a time in this process
+_location_locks: dict[str, threading.Lock] = {}
+_refreshing: set[str] = set()
+_locks_guard = threading.Lock()
+
+
+def _location_lock(location: str) -> threading.Lock:
+    with _locks_guard:
+        return _location_locks.setdefault(location, threading.Lock())
+
+
+def _to_entry(rows: list[dict]) -> Optional[tuple[float, list[dict]]]:
+    if not rows:
+        return None
+    cached_at = min(row.pop("cached_at") for row in rows)
+    return cached_at, rows
+
 
+def _is_fresh(entry: tuple[float, list[dict]]) -> bool:
+    return time.time() - entry[0] < CACHE_MAX_AGE_SEC
 
-def _get_cached(location: str, category: str) -> Optional[list[dict]]:
-    """Return cached results if they exist and are fresh enough."""
+
+def _get_cached(location: str, category: str) -> Optional[tuple[float, list[dict]]]:
+    """Return the DB cache entry (cached_at, services) for a key, fresh or stale."""
     conn = get_connection()
     try:
-        cursor = conn.cursor(dictionary=True)
-        cursor.execute(
-            "SELECT name, address, phone, opening_hours, lat, lon, osm_id, created_at "
-            "FROM emergency_services_cache "
-            "WHERE location = %s AND category = %s "
-            "AND created_at > DATE_SUB(NOW(), INTERVAL %s DAY)",
-            (location, category, CACHE_MAX_AGE_DAYS),
-        )
-        rows = cursor.fetchall()
+        cursor = conn.cursor()
+        cursor.execute(_SELECT_CACHED_SQL, (category, location, category))
+        rows = SERVICE_ROWS.fetchall(cursor)
         cursor.close()
     finally:
         conn.close()
+    return _to_entry(rows)
 
-    if not rows:
-        return None
 
-    return [
-        {
-            "category": category,
-            "name": r["name"],
-            "address": r["address"],
-            "phone": r["phone"],
-            "opening_hours": r.get("opening_hours", ""),
-            "lat": float(r["lat"]) if r["lat"] is not None else None,
-            "lon": float(r["lon"]) if r["lon"] is not None else None,
-            "osm_id": r["osm_id"],
-        }
-        for r in rows
-    ]
-
-
-def _save_to_cache(location: str, category: str, services: list[dict]) -> None:
-    """Save fetched services to DB cache, replacing old entries for this location+category."""
+def _save_to_cache(location: str, by_category: dict[str, list[dict]]) -> None:
+    """Save fetched services to DB cache, replacing old entries for each location+category."""
+    rows = [row for category, services in by_category.items()
+            for row in _cache_rows(location, category, services)]
     conn = get_connection()
     try:
         cursor = conn.cursor()
-        cursor.execute(
-            "DELETE FROM emergency_services_cache WHERE location = %s AND category = %s",
-            (location, category),
-        )
-        for s in services:
-            cursor.execute(
-                "INSERT INTO emergency_services_cache "
-                "(location, category, name, address, phone, opening_hours, lat, lon, osm_id) "
-                "VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)",
-                (location, category, s["name"], s["address"], s["phone"],
-                 s.get("opening_hours", ""), s["lat"], s["lon"], s["osm_id"]),
-            )
+        categories = list(by_category)
+        if categories:
+            cursor.execute(_DELETE_CACHED_SQL.format(",".join(["%s"] * len(categories))), (location, *categories))
+        bulk_insert(cursor, "emergency_services_cache", _CACHE_COLUMNS, rows, value_sql=_CACHE_VALUE_SQL)
         conn.commit()
         cursor.close()
     finally:
         conn.close()
 
 
+def _refresh(location: str, categories: list[str]) -> dict[str, list[dict]]:
+    """Fetch *categories* from Overpass and store them in both cache tiers.
+
+    Concurrent refreshes of one location collapse into a single upstream
+    fetch: threads of this process queue on an in-process lock, other
+    workers on a MySQL advisory lock.  Whoever gets the lock second re-reads
+    the DB and only fetches what is still missing or stale.
+
+    If the fetch fails nothing is stored: stale entries keep being served
+    (misses get empty lists) and the next request tries again.
+    """
+    with _location_lock(location), advisory_lock(f"emergency:{location}", REFRESH_LOCK_TIMEOUT_SEC):
+        result: dict[str, list[dict]] = {}
+        todo = []
+        stale: dict[str, list[dict]] = {}
+        for category in categories:
+            entry = _get_cached(location, category)
+            if entry is not None and _is_fresh(entry):
+                _memory.set((location, category), entry)
+                result[category] = entry[1]
+            else:
+                todo.append(category)
+                if entry is not None:
+                    stale[category] = entry[1]
+        if not todo:
+            return result
+
+        logger.info("Querying Overpass for %s in '%s'", ",".join(todo), location)
+        fetched = _fetch_from_overpass(location, todo)
+        if fetched is None:
+            logger.warning("Keeping cached %s for '%s' after failed fetch", ",".join(todo), location)
+            result.update({category: stale.get(category, []) for category in todo})
+            return result
+        _save_to_cache(location, fetched)
+        now = time.time()
+        for category, services in fetched.items():
+            _memory.set((location, category), (now, services))
+        logger.info(
+            "Fetched and cached for '%s': %s", location,
+            ", ".join(f"{len(v)} {k}(s)" for k, v in fetched.items()),
+        )
+        result.update(fetched)
+        return result
+
+
+def _refresh_in_background(location: str, categories: list[str]) -> None:
+    """Start a background refresh of stale categories unless one is running."""
+    with _locks_guard:
+        if location in _refreshing:
+            return
+        _refreshing.add(location)
+
+    def run():
+        try:
+            _refresh(location, categories)
+        except Exception:
+            logger.warning("Background refresh failed for '%s'", location, exc_info=True)
+        finally:
+            with _locks_guard:
+                _refreshing.discard(location)
+
+    threading.Thread(target=run, name=f"emergency-refresh:{location}", daemon=True).start()
+
+
+def _from_tiers(location: str, categories: list[str], db_entries: dict) -> tuple[dict, list, list]:
+    """Split *categories* into served results, stale keys and misses."""
+    result: dict[str, list[dict]] = {}
+    stale, missing = [], []
+    for category in categories:
+        entry = _memory.get((location, category)) or db_entries.get(category)
+        if entry is None:
+            missing.append(category)
+            continue
+        _memory.set((location, category), entry)
+        result[category] = entry[1]
+        if not _is_fresh(entry):
+            stale.append(category)
+    return result, stale, missing
+
+
+def _serve(location: str, categories: list[str], result: dict, stale: list) -> dict[str, list[dict]]:
+    if stale:
+        logger.info("Serving stale %s for '%s', refreshing in background", ",".join(stale), location)
+        _refresh_in_background(location, stale)
+    return {category: result[category] for category in categories}
+
+
 def get_emergency_services(location: str, category: str) -> list[dict]:
     """Get emergency services for a location + category, using cache when available.
 
@@ -228,29 +367,98 @@ def get_emergency_services(location: str, category: str) -> list[dict]:
     """
     if category not in CATEGORY_OVERPASS_TAGS:
         return []
+    return get_all_emergency_services(location, [category])[category]
 
-    # Try cache first
-    cached = _get_cached(location, category)
-    if cached is not None:
-        logger.info("Cache hit: %d %s(s) for '%s'", len(cached), category, location)
-        return cached
 
-    # Fetch from Overpass
-    logger.info("Cache miss — querying Overpass for %s in '%s'", category, location)
-    services = _fetch_from_overpass(location, category)
+def get_all_emergency_services(location: str, categories: Optional[list[str]] = None) -> dict[str, list[dict]]:
+    """Fetch all (or the given) categories for a location. Returns {category: [services]}.
+
+    Served from the in-memory LRU, then the DB cache.  Entries older than
+    CACHE_MAX_AGE_DAYS are returned as-is and refreshed in the background;
+    only categories with no cached entry at all wait for Overpass, fetched
+    together in one query.
+    """
+    categories = list(categories or CATEGORY_OVERPASS_TAGS)
+    db_entries = {
+        c: _get_cached(location, c) for c in categories if _memory.get((location, c)) is None
+    }
+    result, stale, missing = _from_tiers(location, categories, db_entries)
+    if missing:
+        result.update(_refresh(location, missing))
+    return _serve(location, categories, result, stale)
+
 
-    # Cache even empty results to avoid hammering Overpass
-    _save_to_cache(location, category, services)
-    logger.info("Fetched and cached %d %s(s) for '%s'", len(services), category, location)
+def _nearest_query(lat: float, lon: float, categories: list[str], radius_km: float, k: int) -> tuple[str, tuple]:
+    """SQL and params for cached services within *radius_km* of (lat, lon).
 
+    The search box is clamped at the poles and the antimeridian rather than
+    wrapped, so places just across the date line are not found.
+    """
+    dlat = radius_km / _KM_PER_DEGREE
+    dlon = radius_km / (_KM_PER_DEGREE * max(math.cos(math.radians(lat)), 0.01))
+    south, north = max(lat - dlat, -90.0), min(lat + dlat, 90.0)
+    west, east = max(lon - dlon, -180.0), min(lon + dlon, 180.0)
+    box = f"POLYGON(({west} {south}, {east} {south}, {east} {north}, {west} {north}, {west} {south}))"
+    sql = _SELECT_NEAREST_SQL.format(",".join(["%s"] * len(categories)))
+    params = (lon, lat, box, *categories, radius_km * 1000, k * NEAREST_DUPLICATE_SLACK)
+    return sql, params
+
+
+def _nearest_result(rows: list[dict], k: int) -> list[dict]:
+    """Drop places cached under more than one city and keep the k closest."""
+    services, seen = [], set()
+    for row in rows:
+        key = (row["category"], row["osm_id"] or (row["name"], row["lat"], row["lon"]))
+        if key in seen:
+            continue
+        seen.add(key)
+        row["distance_km"] = round(row.pop("distance_m") / 1000, 3)
+        services.append(row)
+        if len(services) == k:
+            break
     return services
 
 
-def get_all_emergency_services(location: str) -> dict[str, list[dict]]:
-    """Fetch all categories for a location. Returns {category: [services]}."""
-    result = {}
-    for i, category in enumerate(CATEGORY_OVERPASS_TAGS):
-        if i > 0:
-            time.sleep(0.5)  # Be polite to Overpass
-        result[category] = get_emergency_services(location, category)
-    return result
+# ── Async variants (aiomysql) ──
+
+
+async def _get_cached_async(location: str, category: str) -> Optional[tuple[float, list[dict]]]:
+    rows = await async_db.fetch_all(_SELECT_CACHED_SQL, (category, location, category), mapper=SERVICE_ROWS)
+    return _to_entry(rows)
+
+
+async def get_emergency_services_async(location: str, category: str) -> list[dict]:
+    """Async version of get_emergency_services (Overpass runs in a worker thread)."""
+    if category not in CATEGORY_OVERPASS_TAGS:
+        return []
+    return (await get_all_emergency_services_async(location, [category]))[category]
+
+
+async def get_all_emergency_services_async(location: str,
+                                           categories: Optional[list[str]] = None) -> dict[str, list[dict]]:
+    """Async version of get_all_emergency_services."""
+    categories = list(categories or CATEGORY_OVERPASS_TAGS)
+    db_entries = {
+        c: await _get_cached_async(location, c) for c in categories if _memory.get((location, c)) is None
+    }
+    result, stale, missing = _from_tiers(location, categories, db_entries)
+    if missing:
+        result.update(await asyncio.to_thread(_refresh, location, missing))
+    return _serve(location, categories, result, stale)
+
+
+async def get_nearest_services_async(lat: float, lon: float, k: int,
+                                     categories: Optional[list[str]] = None) -> list[dict]:
+    """The *k* cached services closest to (lat, lon) from any cached city, nearest first.
+
+    Searches growing radii (NEAREST_RADII_KM) until k are found.  Reads the
+    DB cache only and never calls Overpass, so only places whose city was
+    looked up before are known.
+    """
+    categories = list(categories or CATEGORY_OVERPASS_TAGS)
+    for radius_km in NEAREST_RADII_KM:
+        sql, params = _nearest_query(lat, lon, categories, radius_km, k)
+        services = _nearest_result(await async_db.fetch_all(sql, params, mapper=NEAREST_ROWS), k)
+        if len(services) >= k:
+            break
+    return services
@@ -1,69 +1,119 @@
+import asyncio
+import base64
+import json
 import logging
-from typing import Optional
-from decimal import Decimal
+import threading
+from datetime import datetime, timedelta, timezone
+from typing import Iterable, Iterator, Optional
 
-import requests
+from requests_oauthlib import OAuth1Session
 
-from backend.db import get_connection
+from backend import async_db
+from backend.db import bulk_insert, get_connection
+from backend.rows import RowMapper
+from backend.services import rate_service, splitwise_service, summary_service
 
 logger = logging.getLogger(__name__)
 
-EXCHANGE_RATE_API = "https://v6.exchangerate-api.com/v6/bd518438bcd832b6b743de47/pair"
-
-# In-memory cache: { "USD": rate_float, ... }
-_rate_cache: dict[str, float] = {}
+# Column order of the row tuples built by _expense_insert_rows/_build_sync_rows
+_INSERT_EXPENSE_COLUMNS = (
+    "trip_id", "user_id", "expense_id", "location", "category",
+    "description", "amount_inr", "currency_code", "original_amount", "date",
+)
+# Columns a listing may project; the sort keys are always returned so the
+# last row of a page can be turned into a keyset cursor.
+EXPENSE_COLUMNS = (
+    "id", "trip_id", "user_id", "expense_id", "location", "category",
+    "description", "amount_inr", "currency_code", "original_amount",
+    "date", "start_date", "end_date", "created_at", "updated_at",
+)
+_SORT_COLUMNS = ("date", "created_at", "id")
+# Served by idx_expenses_trip_user_date / idx_expenses_trip_date (V013)
+_LISTING_ORDER_SQL = " ORDER BY date DESC, created_at DESC, id DESC"
+_SELECT_PERSONAL_EXPENSES_SQL = """
+    SELECT expense_id, description, currency_code, original_amount,
+           user_id, date, created_at, location, category
+    FROM expenses
+    WHERE trip_id = %s AND expense_id LIKE 'local_%%'
+    ORDER BY date DESC, created_at DESC
+"""
+_SELECT_EXPENSE_TRIP_IDS_SQL = "SELECT DISTINCT trip_id FROM expenses WHERE expense_id = %s"
+_SELECT_ROW_TRIP_ID_SQL = "SELECT trip_id FROM expenses WHERE id = %s"
+_DELETE_EXPENSE_SQL = "DELETE FROM expenses WHERE expense_id = %s"
+_UPDATE_DETAILS_SQL = "UPDATE expenses SET location = %s, category = %s WHERE id = %s"
+_UPDATE_STAY_DATES_SQL = "UPDATE expenses SET start_date = %s, end_date = %s, location = %s WHERE id = %s"
+
+# DECIMAL -> float, DATE/DATETIME -> str for every expense read path
+EXPENSE_ROWS = RowMapper({
+    "amount_inr": float,
+    "original_amount": float,
+    "date": str,
+    "start_date": str,
+    "end_date": str,
+    "created_at": str,
+    "updated_at": str,
+})
+
+# Rows written per executemany batch while streaming a Splitwise sync
+SYNC_BATCH_ROWS = 500
+
+# Delta syncs fall back to a full resync once the last full one is this old
+FULL_RESYNC_INTERVAL_HOURS = 24
+
+# One sync per trip at a time: the scheduler, trip setup jobs and manual
+# /sync_expenses calls would otherwise race on the same watermark.
+_sync_locks: dict[str, threading.Lock] = {}
+_sync_locks_guard = threading.Lock()
+
+# Account-wide syncs re-fetch this far behind a trip's last sync start, so
+# clock skew between us and Splitwise never hides an update.
+ACCOUNT_SYNC_OVERLAP = timedelta(minutes=10)
 
 
 def get_inr_rate(currency_code: str) -> float:
-    """Return the exchange rate from *currency_code* to INR.
-
-    Returns 1.0 if the currency is already INR.
-    Uses a simple in-memory cache to avoid repeated API calls within the
-    same process lifetime.
-    """
-    if currency_code == "INR":
-        return 1.0
-
-    if currency_code in _rate_cache:
-        return _rate_cache[currency_code]
-
-    try:
-        resp = requests.get(f"{EXCHANGE_RATE_API}/{currency_code}/INR", timeout=10)
-        data = resp.json()
-        rate = float(data.get("conversion_rate", 1.0))
-        logger.debug("Exchange rate %s->INR = %s", currency_code, rate)
-    except Exception:
-        logger.warning("Failed to fetch exchange rate for %s->INR, defaulting to 1.0", currency_code)
-        rate = 1.0
-
-    _rate_cache[currency_code] = rate
-    return rate
+    """Return the exchange rate from *currency_code* to INR (1.0 for INR)."""
+    return rate_service.get_conversion_rate(currency_code, "INR")
 
 
 def get_conversion_rate(from_code: str, to_code: str) -> float:
     """Return the exchange rate from *from_code* to *to_code*.
 
-    Returns 1.0 if both codes are the same.
-    Uses a simple in-memory cache keyed by 'FROM->TO'.
+    Rates come from rate_service's persisted, TTL-refreshed snapshot.
     """
-    if from_code == to_code:
-        return 1.0
+    return rate_service.get_conversion_rate(from_code, to_code)
 
-    cache_key = f"{from_code}->{to_code}"
-    if cache_key in _rate_cache:
-        return _rate_cache[cache_key]
 
-    try:
-        resp = requests.get(f"{EXCHANGE_RATE_API}/{from_code}/{to_code}", timeout=10)
-        data = resp.json()
-        rate = float(data.get("conversion_rate", 1.0))
-        logger.debug("Exchange rate %s->%s = %s", from_code, to_code, rate)
-    except Exception:
-        logger.warning("Failed to fetch exchange rate for %s->%s, defaulting to 1.0", from_code, to_code)
-        rate = 1.0
-
-    _rate_cache[cache_key] = rate
-    return rate
+def _expense_insert_rows(
+    trip_id: str,
+    expense_id: Optional[str],
+    description: str,
+    location: str,
+    category: str,
+    currency_code: str,
+    users: list[dict],
+    date_str: Optional[str],
+    rate: float,
+) -> list[tuple]:
+    """Rows for _INSERT_EXPENSE_COLUMNS, one per user with a positive owed share."""
+    rows = []
+    for u in users:
+        owed = float(u.get("owed_share", 0))
+        if owed <= 0:
+            continue
+        amount_inr = round(owed * rate, 2)
+        rows.append((
+            trip_id,
+            u["user_id"],
+            expense_id,
+            location,
+            category,
+            description,
+            amount_inr,
+            currency_code,
+            owed,
+            date_str or None,
+        ))
+    return rows
 
 
 def save_expense_rows(
@@ -76,123 +126,103 @@ def save_expense_rows(
     users: list[dict],
     date_str: Optional[str] = None,
 ) -> None:
-    """Insert one row per user into the expenses table.
+    """Insert one row per user into the expenses table (one multi-row INSERT).
 
     Each dict in *users* must have keys: user_id, owed_share.
     The amount is converted to INR before storing.
     """
     rate = get_inr_rate(currency_code)
     logger.info("save_expense_rows: expense_id=%s trip_id=%s users=%d currency=%s", expense_id, trip_id, len(users), currency_code)
+    rows = _expense_insert_rows(trip_id, expense_id, description, location, category,
+                                currency_code, users, date_str, rate)
+    summary_where = summary_service.by_expense_ids(trip_id, [expense_id or ""])
     conn = get_connection()
     try:
         cursor = conn.cursor()
-        for u in users:
-            owed = float(u.get("owed_share", 0))
-            if owed <= 0:
-                continue
-            amount_inr = round(owed * rate, 2)
-            cursor.execute(
-                """
-                INSERT INTO expenses
-                    (trip_id, user_id, expense_id, location, category,
-                     description, amount_inr, currency_code, original_amount, date)
-                VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-                """,
-                (
-                    trip_id,
-                    u["user_id"],
-                    expense_id,
-                    location,
-                    category,
-                    description,
-                    amount_inr,
-                    currency_code,
-                    owed,
-                    date_str or None,
-                ),
-            )
+        summary_service.apply_delta(cursor, *summary_where, -1)
+        bulk_insert(cursor, "expenses", _INSERT_EXPENSE_COLUMNS, rows)
+        summary_service.apply_delta(cursor, *summary_where, 1)
+        summary_service.prune(cursor, [trip_id])
         conn.commit()
         cursor.close()
     finally:
         conn.close()
+    summary_service.invalidate([trip_id])
 
 
-def sync_expenses_from_splitwise(trip_id: str, sw_expenses: list[dict]) -> int:
-    """Sync Splitwise expenses into the local expenses table.
+def _build_sync_rows(trip_id: str, exp: dict) -> list[tuple]:
+    """Turn one Splitwise expense into expense-table rows (one per owing user)."""
+    description = exp.get("description", "")
+    expense_id = str(exp.get("id", ""))
+    currency_code = exp.get("currency_code", "INR")
+    rate = get_inr_rate(currency_code)
+    raw_date = exp.get("date") or exp.get("created_at") or ""
+    date_str = raw_date[:10] if raw_date else None
 
-    Uses exactly 3 DB round-trips:
-      1. SELECT all existing rows for this trip
-      2. Batch INSERT ... ON DUPLICATE KEY UPDATE for all active Splitwise rows
-      3. Batch DELETE for stale expense_ids no longer on Splitwise
+    rows = []
+    for u in exp.get("users", []):
+        owed = float(u.get("owed_share", 0))
+        if owed <= 0:
+            continue
+        sw_user_id = u.get("user_id") or u.get("user", {}).get("id")
+        amount_inr = round(owed * rate, 2)
+        rows.append((
+            trip_id, sw_user_id, expense_id, "", "",
+            description, amount_inr, currency_code, owed, date_str,
+        ))
+    return rows
 
-    User-set location and category are preserved on update.
-    Returns the number of newly inserted rows.
-    """
-    logger.info("sync_expenses_from_splitwise: trip_id=%s incoming=%d", trip_id, len(sw_expenses))
 
-    # ── Build the desired state from Splitwise (pure Python, no DB) ──
-    active_sw_ids: set[str] = set()
-    upsert_rows: list[tuple] = []
-    for exp in sw_expenses:
-        description = exp.get("description", "")
-        if description.strip().lower() == "payment":
-            continue
-        expense_id = str(exp.get("id", ""))
-        active_sw_ids.add(expense_id)
-        currency_code = exp.get("currency_code", "INR")
-        rate = get_inr_rate(currency_code)
-        raw_date = exp.get("date") or exp.get("created_at") or ""
-        date_str = raw_date[:10] if raw_date else None
-
-        for u in exp.get("users", []):
-            owed = float(u.get("owed_share", 0))
-            if owed <= 0:
-                continue
-            sw_user_id = u.get("user_id") or u.get("user", {}).get("id")
-            amount_inr = round(owed * rate, 2)
-            upsert_rows.append((
-                trip_id, sw_user_id, expense_id, "", "",
-                description, amount_inr, currency_code, owed, date_str,
-            ))
+def _write_sync_batch(
+    trip_id: str,
+    upserts: dict[str, list[tuple]],
+    removed_eids: Iterable[str],
+) -> tuple[int, int, int]:
+    """Write one batch of synced expenses in its own short transaction.
+
+    *upserts* maps each active expense_id to its rows (one per owing user):
+    rows are inserted or updated, and rows of users no longer owing on that
+    expense are deleted.  Every row of *removed_eids* (deleted upstream) is
+    deleted.  The batch's existing rows are re-read under lock, so writes
+    made since the sync started are taken into account.
+    Returns (inserted, updated, deleted).
+    """
+    removed_eids = sorted(removed_eids)
+    touched = sorted(set(upserts) | set(removed_eids))
+    if not touched:
+        return 0, 0, 0
+    where, where_params = summary_service.by_expense_ids(trip_id, touched)
 
     conn = get_connection()
     try:
         cursor = conn.cursor()
+        cursor.execute(f"SELECT expense_id, user_id FROM expenses WHERE {where} FOR UPDATE", where_params)
+        existing: dict[str, set[str]] = {}
+        for row in cursor.fetchall():
+            existing.setdefault(str(row[0]), set()).add(str(row[1]))
 
-        # ── DB call 1: Read all existing (expense_id, user_id) for this trip ──
-        cursor.execute(
-            "SELECT expense_id, user_id FROM expenses WHERE trip_id = %s AND expense_id != ''",
-            (trip_id,),
-        )
-        existing_pairs = {(str(row[0]), str(row[1])) for row in cursor.fetchall()}
-        existing_eids = {pair[0] for pair in existing_pairs}
+        # Every expense touched by this batch: its summary contribution is
+        # subtracted before the writes and re-added after them
+        summary_service.apply_delta(cursor, where, where_params, -1)
 
-        # Split into new inserts vs updates (Python-side, no extra DB calls)
         insert_rows = []
         update_rows = []
-        for row in upsert_rows:
-            # row = (trip_id, user_id, expense_id, loc, cat, desc, amt, cur, orig, date)
-            eid, uid = str(row[2]), str(row[1])
-            if (eid, uid) in existing_pairs:
-                # (desc, amount_inr, currency_code, original_amount, date, trip_id, expense_id, user_id)
-                update_rows.append((row[5], row[6], row[7], row[8], row[9], row[0], row[2], row[1]))
-            else:
-                insert_rows.append(row)
-
-        # ── DB call 2a: Batch insert new rows ──
+        dropped_pairs = []
+        for eid, rows in upserts.items():
+            current = existing.get(eid, set())
+            for row in rows:
+                # row = (trip_id, user_id, expense_id, loc, cat, desc, amt, cur, orig, date)
+                if str(row[1]) in current:
+                    # (desc, amount_inr, currency_code, original_amount, date, trip_id, expense_id, user_id)
+                    update_rows.append((row[5], row[6], row[7], row[8], row[9], row[0], row[2], row[1]))
+                else:
+                    insert_rows.append(row)
+            owing = {str(row[1]) for row in rows}
+            dropped_pairs.extend((trip_id, eid, uid) for uid in current - owing)
+
         if insert_rows:
-            cursor.executemany(
-                """
-                INSERT INTO expenses
-                    (trip_id, user_id, expense_id, location, category,
-                     description, amount_inr, currency_code, original_amount, date)
-                VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-                """,
-                insert_rows,
-            )
-        inserted = len(insert_rows)
+            bulk_insert(cursor, "expenses", _INSERT_EXPENSE_COLUMNS, insert_rows)
 
-        # ── DB call 2b: Batch update existing rows ──
         if update_rows:
             cursor.executemany(
                 """
@@ -203,155 +233,489 @@ def sync_expenses_from_splitwise(trip_id: str, sw_expenses: list[dict]) -> int:
                 """,
                 update_rows,
             )
-        updated = len(update_rows)
 
-        # ── DB call 3: Batch delete stale expense_ids ──
-        stale_ids = [eid for eid in existing_eids
-                     if not eid.startswith("local_") and eid not in active_sw_ids]
         deleted = 0
-        if stale_ids:
-            placeholders = ",".join(["%s"] * len(stale_ids))
+        if dropped_pairs:
+            cursor.executemany(
+                "DELETE FROM expenses WHERE trip_id = %s AND expense_id = %s AND user_id = %s",
+                dropped_pairs,
+            )
+            deleted += len(dropped_pairs)
+        if removed_eids:
+            placeholders = ",".join(["%s"] * len(removed_eids))
             cursor.execute(
                 f"DELETE FROM expenses WHERE trip_id = %s AND expense_id IN ({placeholders})",
-                [trip_id] + stale_ids,
+                [trip_id] + removed_eids,
             )
-            deleted = cursor.rowcount
+            deleted += cursor.rowcount
 
+        summary_service.apply_delta(cursor, where, where_params, 1)
+        summary_service.prune(cursor, [trip_id])
         conn.commit()
         cursor.close()
-        logger.info("sync_expenses_from_splitwise: trip_id=%s inserted=%d updated=%d deleted=%d", trip_id, inserted, updated, deleted)
     finally:
         conn.close()
-    return inserted
+    summary_service.invalidate([trip_id])
+    return len(insert_rows), len(update_rows), deleted
 
 
-def delete_expense_rows(expense_id: str) -> None:
-    """Delete all rows for a given expense_id (Splitwise or local)."""
-    logger.info("delete_expense_rows: expense_id=%s", expense_id)
+def _existing_expense_ids(trip_id: str) -> set[str]:
     conn = get_connection()
     try:
         cursor = conn.cursor()
-        cursor.execute("DELETE FROM expenses WHERE expense_id = %s", (expense_id,))
-        logger.debug("Deleted %d expense rows for expense_id=%s", cursor.rowcount, expense_id)
-        conn.commit()
+        cursor.execute(
+            "SELECT DISTINCT expense_id FROM expenses WHERE trip_id = %s AND expense_id != ''",
+            (trip_id,),
+        )
+        expense_ids = {str(row[0]) for row in cursor.fetchall()}
         cursor.close()
     finally:
         conn.close()
+    return expense_ids
 
 
-def get_expenses_by_trip(trip_id: str) -> list[dict]:
-    """Return all expense rows for a trip, ordered by date desc."""
+def sync_expenses_from_splitwise(
+    trip_id: str,
+    sw_expenses: Iterable[dict],
+    prune_stale: bool = True,
+) -> int:
+    """Sync Splitwise expenses into the local expenses table.
+
+    *sw_expenses* may be a list or a lazy iterator (e.g.
+    ``splitwise_service.iter_expenses``); it is consumed in batches of
+    ``SYNC_BATCH_ROWS`` rows so memory stays flat on very large groups.
+    No connection or lock is held while the iterator fetches pages:
+      1. SELECT the trip's existing expense_ids
+      2. Per batch, in its own transaction: INSERT new rows, UPDATE existing
+         ones, DELETE expenses deleted upstream and users dropped from a split
+      3. If *prune_stale*, DELETE expense_ids no longer on Splitwise, in
+         batches of their own transactions
+    trip_summaries is adjusted by delta alongside each write.
+
+    A full sync passes the complete history with ``prune_stale=True``; a
+    delta sync passes only changed (and deleted) expenses with
+    ``prune_stale=False``.  If the iterator raises midway, the batches
+    already written stay (they mirror Splitwise) but nothing is pruned, so a
+    partial fetch never deletes rows it simply did not reach.
+    User-set location and category are preserved on update.
+    Returns the number of newly inserted rows.
+    """
+    logger.info("sync_expenses_from_splitwise: trip_id=%s prune_stale=%s", trip_id, prune_stale)
+
+    # Load the rate snapshot up front, so a slow rate refresh never stalls
+    # a batch mid-sync
+    rate_service.prefetch()
+
+    existing_eids = _existing_expense_ids(trip_id)
+
+    seen_ids: set[str] = set()
+    upserts: dict[str, list[tuple]] = {}
+    removed_eids: set[str] = set()
+    batch_rows = 0
+    inserted = updated = deleted = seen = 0
+    for exp in sw_expenses:
+        seen += 1
+        expense_id = str(exp.get("id", ""))
+        seen_ids.add(expense_id)
+        if (
+            splitwise_service.is_deleted(exp)
+            or exp.get("description", "").strip().lower() == "payment"
+        ):
+            upserts.pop(expense_id, None)
+            removed_eids.add(expense_id)
+            batch_rows += 1
+        else:
+            removed_eids.discard(expense_id)
+            rows = _build_sync_rows(trip_id, exp)
+            upserts[expense_id] = rows
+            batch_rows += max(len(rows), 1)
+        if batch_rows >= SYNC_BATCH_ROWS:
+            ins, upd, dele = _write_sync_batch(trip_id, upserts, removed_eids)
+            inserted += ins
+            updated += upd
+            deleted += dele
+            upserts, removed_eids, batch_rows = {}, set(), 0
+    ins, upd, dele = _write_sync_batch(trip_id, upserts, removed_eids)
+    inserted += ins
+    updated += upd
+    deleted += dele
+
+    if prune_stale:
+        stale_ids = sorted(eid for eid in existing_eids
+                           if not eid.startswith("local_") and eid not in seen_ids)
+        for start in range(0, len(stale_ids), SYNC_BATCH_ROWS):
+            deleted += _write_sync_batch(trip_id, {}, stale_ids[start:start + SYNC_BATCH_ROWS])[2]
+
+    logger.info("sync_expenses_from_splitwise: trip_id=%s incoming=%d inserted=%d updated=%d deleted=%d", trip_id, seen, inserted, updated, deleted)
+    return inserted
+
+
+def _parse_sw_timestamp(value: Optional[str]) -> Optional[datetime]:
+    """Parse a Splitwise ISO-8601 timestamp into a naive UTC datetime."""
+    if not value:
+        return None
+    try:
+        parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed
+
+
+def get_sync_state(trip_id: str) -> Optional[dict]:
+    """Return the sync watermark row for a trip, or None if never synced."""
     conn = get_connection()
     try:
         cursor = conn.cursor(dictionary=True)
         cursor.execute(
-            """
-            SELECT id, trip_id, user_id, expense_id, location, category,
-                   description, amount_inr, currency_code, original_amount,
-                   date, start_date, end_date, created_at, updated_at
-            FROM expenses
-            WHERE trip_id = %s
-            ORDER BY date DESC, created_at DESC
-            """,
+            "SELECT trip_id, last_updated_at, last_full_sync_at, last_sync_at "
+            "FROM trip_sync_state WHERE trip_id = %s",
             (trip_id,),
         )
-        rows = cursor.fetchall()
+        row = cursor.fetchone()
         cursor.close()
     finally:
         conn.close()
+    return row
 
-    # Convert Decimal to float for JSON serialisation
-    for row in rows:
-        if isinstance(row.get("amount_inr"), Decimal):
-            row["amount_inr"] = float(row["amount_inr"])
-        if isinstance(row.get("original_amount"), Decimal):
-            row["original_amount"] = float(row["original_amount"])
-        if row.get("date"):
-            row["date"] = str(row["date"])
-        if row.get("start_date"):
-            row["start_date"] = str(row["start_date"])
-        if row.get("end_date"):
-            row["end_date"] = str(row["end_date"])
-        if row.get("created_at"):
-            row["created_at"] = str(row["created_at"])
-        if row.get("updated_at"):
-            row["updated_at"] = str(row["updated_at"])
-
-    return rows
 
+def save_sync_state(trip_id: str, last_updated_at: Optional[datetime], full: bool,
+                    synced_at: Optional[datetime] = None) -> None:
+    """Record a completed sync and advance the trip's watermark.
 
-def get_user_expenses_by_trip(trip_id: str, splitwise_user_id: int) -> list[dict]:
-    """Return expense rows for a specific user in a trip, ordered by date desc."""
+    *synced_at* is when the sync started fetching (defaults to now).
+    """
+    now = (synced_at or datetime.utcnow()).replace(microsecond=0)
     conn = get_connection()
     try:
-        cursor = conn.cursor(dictionary=True)
+        cursor = conn.cursor()
         cursor.execute(
             """
-            SELECT id, trip_id, user_id, expense_id, location, category,
-                   description, amount_inr, currency_code, original_amount,
-                   date, start_date, end_date, created_at, updated_at
-            FROM expenses
-            WHERE trip_id = %s AND user_id = %s
-            ORDER BY date DESC, created_at DESC
+            INSERT INTO trip_sync_state (trip_id, last_updated_at, last_full_sync_at, last_sync_at)
+            VALUES (%s, %s, %s, %s)
+            ON DUPLICATE KEY UPDATE
+                last_updated_at   = GREATEST(COALESCE(last_updated_at, VALUES(last_updated_at)),
+                                             COALESCE(VALUES(last_updated_at), last_updated_at)),
+                last_full_sync_at = COALESCE(VALUES(last_full_sync_at), last_full_sync_at),
+                last_sync_at      = VALUES(last_sync_at)
             """,
-            (trip_id, splitwise_user_id),
+            (trip_id, last_updated_at, now if full else None, now),
         )
-        rows = cursor.fetchall()
+        conn.commit()
         cursor.close()
     finally:
         conn.close()
 
-    for row in rows:
-        if isinstance(row.get("amount_inr"), Decimal):
-            row["amount_inr"] = float(row["amount_inr"])
-        if isinstance(row.get("original_amount"), Decimal):
-            row["original_amount"] = float(row["original_amount"])
-        if row.get("date"):
-            row["date"] = str(row["date"])
-        if row.get("start_date"):
-            row["start_date"] = str(row["start_date"])
-        if row.get("end_date"):
-            row["end_date"] = str(row["end_date"])
-        if row.get("created_at"):
-            row["created_at"] = str(row["created_at"])
-        if row.get("updated_at"):
-            row["updated_at"] = str(row["updated_at"])
-
-    return rows
-
 
-def get_personal_expenses(trip_id: str, splitwise_user_id: int) -> list[dict]:
-    """Return local-only personal expenses for a trip, shaped like Splitwise expenses
-    so the frontend ExpenseHistory can render them directly."""
+def get_sync_states(trip_ids: list[str]) -> dict[str, dict]:
+    """Return {trip_id: sync watermark row} for the trips that have one."""
+    if not trip_ids:
+        return {}
+    placeholders = ",".join(["%s"] * len(trip_ids))
     conn = get_connection()
     try:
         cursor = conn.cursor(dictionary=True)
         cursor.execute(
-            """
-            SELECT expense_id, description, currency_code, original_amount,
-                   user_id, date, created_at, location, category
-            FROM expenses
-            WHERE trip_id = %s AND expense_id LIKE 'local_%%'
-            ORDER BY date DESC, created_at DESC
-            """,
-            (trip_id,),
+            "SELECT trip_id, last_updated_at, last_full_sync_at, last_sync_at "
+            f"FROM trip_sync_state WHERE trip_id IN ({placeholders})",
+            tuple(trip_ids),
         )
         rows = cursor.fetchall()
         cursor.close()
     finally:
         conn.close()
+    return {row["trip_id"]: row for row in rows}
 
-    logger.info("get_personal_expenses: trip_id=%s found %d rows", trip_id, len(rows))
 
-    # Normalise types coming from MySQL
-    for row in rows:
-        if isinstance(row.get("original_amount"), Decimal):
-            row["original_amount"] = float(row["original_amount"])
-        if row.get("date"):
-            row["date"] = str(row["date"])
-        if row.get("created_at"):
-            row["created_at"] = str(row["created_at"])
+def _touch_sync_state(trip_ids: list[str], synced_at: datetime) -> None:
+    """Record a sync that found no changes (the watermark stays put)."""
+    if not trip_ids:
+        return
+    placeholders = ",".join(["%s"] * len(trip_ids))
+    conn = get_connection()
+    try:
+        cursor = conn.cursor()
+        cursor.execute(
+            f"UPDATE trip_sync_state SET last_sync_at = %s WHERE trip_id IN ({placeholders})",
+            (synced_at.replace(microsecond=0), *trip_ids),
+        )
+        conn.commit()
+        cursor.close()
+    finally:
+        conn.close()
+
 
+def _needs_full_resync(state: Optional[dict]) -> bool:
+    """A delta sync is only safe with a watermark and a recent full sync."""
+    if not state or not state.get("last_updated_at") or not state.get("last_full_sync_at"):
+        return True
+    age = datetime.utcnow() - state["last_full_sync_at"]
+    return age > timedelta(hours=FULL_RESYNC_INTERVAL_HOURS)
+
+
+def sync_trip_expenses(oauth: OAuth1Session, trip_id: str, force_full: bool = False) -> dict:
+    """Bring a trip's local expenses up to date with Splitwise.
+
+    Routine syncs only pull expenses changed since the stored watermark
+    (Splitwise ``updated_after``) and apply them as a delta.  Falls back to a
+    full resync when the watermark is missing, the last full sync is older
+    than ``FULL_RESYNC_INTERVAL_HOURS``, or *force_full* is set.
+    Concurrent calls for the same trip run one after the other.
+    Returns {"mode": "full"|"delta", "inserted": int}.
+    """
+    with _trip_sync_lock(trip_id):
+        return _sync_trip_expenses(oauth, trip_id, force_full)
+
+
+def _trip_sync_lock(trip_id: str) -> threading.Lock:
+    with _sync_locks_guard:
+        return _sync_locks.setdefault(trip_id, threading.Lock())
+
+
+def _sync_trip_expenses(oauth: OAuth1Session, trip_id: str, force_full: bool) -> dict:
+    state = None if force_full else get_sync_state(trip_id)
+    full = force_full or _needs_full_resync(state)
+    watermark = None if full else state["last_updated_at"]
+    newest = {"ts": watermark}
+    started = datetime.utcnow()
+
+    def _track(expenses: Iterable[dict]) -> Iterator[dict]:
+        for exp in expenses:
+            ts = _parse_sw_timestamp(exp.get("updated_at"))
+            if ts and (newest["ts"] is None or ts > newest["ts"]):
+                newest["ts"] = ts
+            yield exp
+
+    if full:
+        logger.info("sync_trip_expenses: full resync trip_id=%s", trip_id)
+        sw_expenses = splitwise_service.iter_expenses(oauth, trip_id)
+    else:
+        logger.info("sync_trip_expenses: delta sync trip_id=%s since=%s", trip_id, watermark)
+        sw_expenses = splitwise_service.iter_expenses(
+            oauth, trip_id,
+            updated_after=watermark.strftime("%Y-%m-%dT%H:%M:%SZ"),
+            include_deleted=True,
+        )
+
+    inserted = sync_expenses_from_splitwise(trip_id, _track(sw_expenses), prune_stale=full)
+    save_sync_state(trip_id, newest["ts"], full=full, synced_at=started)
+    return {"mode": "full" if full else "delta", "inserted": inserted}
+
+
+def _account_cutoff(state: Optional[dict]) -> Optional[datetime]:
+    """Oldest updated_at a trip still needs from an account-wide pass, or None
+    if the trip has never been synced and needs its full history."""
+    if not state or not state.get("last_updated_at"):
+        return None
+    cutoff = state["last_updated_at"]
+    if state.get("last_sync_at"):
+        cutoff = max(cutoff, state["last_sync_at"] - ACCOUNT_SYNC_OVERLAP)
+    return cutoff
+
+
+def sync_account_expenses(oauth: OAuth1Session, trip_ids: Iterable[str]) -> dict:
+    """Delta-sync several trips with one paginated pass over the account.
+
+    Fetches every expense changed since the oldest per-trip cutoff across all
+    of the user's Splitwise groups (``get_expenses`` without ``group_id``),
+    buckets them by group and applies each non-empty bucket through
+    ``sync_expenses_from_splitwise``.  Groups we do not track are ignored;
+    tracked trips without changes only have their sync time recorded.
+    Trips that were never synced fall back to ``sync_trip_expenses``.
+    Returns {"trips": {trip_id: {"mode", "inserted"}}, "unchanged": [trip_id],
+    "fetched": int}.
+    """
+    trip_ids = sorted({t for t in trip_ids if t})
+    states = get_sync_states(trip_ids)
+    cutoffs = {t: _account_cutoff(states.get(t)) for t in trip_ids}
+
+    results: dict[str, dict] = {}
+    for trip_id in [t for t, cutoff in cutoffs.items() if cutoff is None]:
+        results[trip_id] = sync_trip_expenses(oauth, trip_id)
+
+    buckets: dict[str, list[dict]] = {t: [] for t, cutoff in cutoffs.items() if cutoff is not None}
+    if not buckets:
+        return {"trips": results, "unchanged": [], "fetched": 0}
+
+    started = datetime.utcnow()
+    since = min(cutoffs[t] for t in buckets)
+    logger.info("sync_account_expenses: trips=%d since=%s", len(buckets), since)
+    fetched = 0
+    for page in splitwise_service.iter_expense_pages(
+        oauth, None,
+        updated_after=since.strftime("%Y-%m-%dT%H:%M:%SZ"),
+        include_deleted=True,
+    ):
+        fetched += len(page)
+        for exp in page:
+            bucket = buckets.get(str(exp.get("group_id")))
+            if bucket is not None:
+                bucket.append(exp)
+
+    unchanged = []
+    for trip_id, expenses in buckets.items():
+        if not expenses:
+            unchanged.append(trip_id)
+            continue
+        stamps = [ts for ts in (_parse_sw_timestamp(e.get("updated_at")) for e in expenses) if ts]
+        with _trip_sync_lock(trip_id):
+            inserted = sync_expenses_from_splitwise(trip_id, expenses, prune_stale=False)
+            save_sync_state(trip_id, max(stamps, default=None), full=False, synced_at=started)
+        results[trip_id] = {"mode": "delta", "inserted": inserted}
+    _touch_sync_state(unchanged, started)
+
+    logger.info(
+        "sync_account_expenses: fetched=%d changed_trips=%d unchanged=%d",
+        fetched, len(buckets) - len(unchanged), len(unchanged),
+    )
+    return {"trips": results, "unchanged": unchanged, "fetched": fetched}
+
+
+def delete_expense_rows(expense_id: str) -> list[str]:
+    """Delete all rows for a given expense_id (Splitwise or local).
+
+    Returns the trip_ids the deleted rows belonged to.
+    """
+    logger.info("delete_expense_rows: expense_id=%s", expense_id)
+    conn = get_connection()
+    try:
+        cursor = conn.cursor()
+        cursor.execute(_SELECT_EXPENSE_TRIP_IDS_SQL, (expense_id,))
+        trip_ids = [row[0] for row in cursor.fetchall()]
+        summary_service.apply_delta(cursor, "expense_id = %s", (expense_id,), -1)
+        cursor.execute(_DELETE_EXPENSE_SQL, (expense_id,))
+        logger.debug("Deleted %d expense rows for expense_id=%s", cursor.rowcount, expense_id)
+        summary_service.prune(cursor, trip_ids)
+        conn.commit()
+        cursor.close()
+    finally:
+        conn.close()
+    summary_service.invalidate(trip_ids)
+    return trip_ids
+
+
+def encode_expense_cursor(row: dict) -> str:
+    """Opaque keyset cursor pointing just past *row* in listing order."""
+    raw = json.dumps([row["date"], row["created_at"], row["id"]], default=str)
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def _decode_expense_cursor(cursor: str) -> tuple[Optional[str], str, int]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        date_key, created_at, row_id = json.loads(base64.urlsafe_b64decode(padded))
+        return date_key, str(created_at), int(row_id)
+    except (ValueError, TypeError):
+        raise ValueError("Invalid expense cursor") from None
+
+
+def _expense_listing_query(
+    trip_id: str,
+    splitwise_user_id: Optional[int],
+    limit: Optional[int],
+    after: Optional[str],
+    date_from: Optional[str],
+    date_to: Optional[str],
+    fields: Optional[Iterable[str]],
+) -> tuple[str, list]:
+    """Build the SELECT for a (possibly paged, filtered, projected) listing.
+
+    Raises ValueError for an unknown field or a malformed cursor.
+    """
+    if fields:
+        unknown = sorted(set(fields) - set(EXPENSE_COLUMNS))
+        if unknown:
+            raise ValueError(f"Unknown expense fields: {', '.join(unknown)}")
+        columns = [c for c in EXPENSE_COLUMNS if c in set(fields) or c in _SORT_COLUMNS]
+    else:
+        columns = list(EXPENSE_COLUMNS)
+
+    clauses = ["trip_id = %s"]
+    params: list = [trip_id]
+    if splitwise_user_id is not None:
+        clauses.append("user_id = %s")
+        params.append(splitwise_user_id)
+    if date_from:
+        clauses.append("date >= %s")
+        params.append(date_from)
+    if date_to:
+        clauses.append("date <= %s")
+        params.append(date_to)
+    if after:
+        date_key, created_at, row_id = _decode_expense_cursor(after)
+        tail = "(created_at < %s OR (created_at = %s AND id < %s))"
+        if date_key is None:
+            # NULL dates sort last under DESC; only older undated rows remain
+            clauses.append(f"(date IS NULL AND {tail})")
+            params += [created_at, created_at, row_id]
+        else:
+            clauses.append(f"(date < %s OR (date = %s AND {tail}) OR date IS NULL)")
+            params += [date_key, date_key, created_at, created_at, row_id]
+
+    sql = f"SELECT {', '.join(columns)} FROM expenses WHERE {' AND '.join(clauses)}{_LISTING_ORDER_SQL}"
+    if limit:
+        sql += " LIMIT %s"
+        params.append(limit)
+    return sql, params
+
+
+def get_expenses_by_trip(
+    trip_id: str,
+    limit: Optional[int] = None,
+    after: Optional[str] = None,
+    date_from: Optional[str] = None,
+    date_to: Optional[str] = None,
+    fields: Optional[Iterable[str]] = None,
+) -> list[dict]:
+    """Return expense rows for a trip, newest first.
+
+    *limit* and *after* (a cursor from ``encode_expense_cursor``) page through
+    the rows; *date_from*/*date_to* filter on the expense date (inclusive);
+    *fields* restricts the columns returned (sort keys are always included).
+    """
+    sql, params = _expense_listing_query(trip_id, None, limit, after, date_from, date_to, fields)
+    conn = get_connection()
+    try:
+        cursor = conn.cursor()
+        cursor.execute(sql, tuple(params))
+        rows = EXPENSE_ROWS.fetchall(cursor)
+        cursor.close()
+    finally:
+        conn.close()
+
+    return rows
+
+
+def get_user_expenses_by_trip(
+    trip_id: str,
+    splitwise_user_id: int,
+    limit: Optional[int] = None,
+    after: Optional[str] = None,
+    date_from: Optional[str] = None,
+    date_to: Optional[str] = None,
+    fields: Optional[Iterable[str]] = None,
+) -> list[dict]:
+    """Return expense rows for a specific user in a trip, newest first.
+
+    Paging, date filters and projection work as in get_expenses_by_trip.
+    """
+    sql, params = _expense_listing_query(trip_id, splitwise_user_id, limit, after, date_from, date_to, fields)
+    conn = get_connection()
+    try:
+        cursor = conn.cursor()
+        cursor.execute(sql, tuple(params))
+        rows = EXPENSE_ROWS.fetchall(cursor)
+        cursor.close()
+    finally:
+        conn.close()
+
+    return rows
+
+
+def _shape_personal_expenses(rows: list[dict]) -> list[dict]:
+    """Group local-only rows (mapped by EXPENSE_ROWS) by expense_id into
+    Splitwise-shaped expense dicts."""
     # Group rows by expense_id (personal expenses typically have 1 row)
     grouped: dict[str, list] = {}
     for row in rows:
@@ -388,19 +752,39 @@ def get_personal_expenses(trip_id: str, splitwise_user_id: int) -> list[dict]:
     return expenses
 
 
+def get_personal_expenses(trip_id: str, splitwise_user_id: int) -> list[dict]:
+    """Return local-only personal expenses for a trip, shaped like Splitwise expenses
+    so the frontend ExpenseHistory can render them directly."""
+    conn = get_connection()
+    try:
+        cursor = conn.cursor()
+        cursor.execute(_SELECT_PERSONAL_EXPENSES_SQL, (trip_id,))
+        rows = EXPENSE_ROWS.fetchall(cursor)
+        cursor.close()
+    finally:
+        conn.close()
+
+    logger.info("get_personal_expenses: trip_id=%s found %d rows", trip_id, len(rows))
+    return _shape_personal_expenses(rows)
+
+
 def update_expense_details(expense_row_id: int, location: str, category: str) -> None:
     """Update location and category on a single expense row by its PK."""
     conn = get_connection()
     try:
         cursor = conn.cursor()
-        cursor.execute(
-            "UPDATE expenses SET location = %s, category = %s WHERE id = %s",
-            (location, category, expense_row_id),
-        )
+        # The category moves the row to another summary bucket
+        cursor.execute(_SELECT_ROW_TRIP_ID_SQL, (expense_row_id,))
+        trip_ids = [row[0] for row in cursor.fetchall()]
+        summary_service.apply_delta(cursor, "id = %s", (expense_row_id,), -1)
+        cursor.execute(_UPDATE_DETAILS_SQL, (location, category, expense_row_id))
+        summary_service.apply_delta(cursor, "id = %s", (expense_row_id,), 1)
+        summary_service.prune(cursor, trip_ids)
         conn.commit()
         cursor.close()
     finally:
         conn.close()
+    summary_service.invalidate(trip_ids)
 
 
 def update_stay_dates(
@@ -414,10 +798,111 @@ def update_stay_dates(
     try:
         cursor = conn.cursor()
         cursor.execute(
-            "UPDATE expenses SET start_date = %s, end_date = %s, location = %s WHERE id = %s",
+            _UPDATE_STAY_DATES_SQL,
             (start_date or None, end_date or None, location or "", expense_row_id),
         )
         conn.commit()
         cursor.close()
     finally:
         conn.close()
+
+
+# ── Async variants (aiomysql) ──
+
+
+async def save_expense_rows_async(
+    trip_id: str,
+    expense_id: Optional[str],
+    description: str,
+    location: str,
+    category: str,
+    currency_code: str,
+    users: list[dict],
+    date_str: Optional[str] = None,
+) -> None:
+    """Async version of save_expense_rows."""
+    # Almost always an in-memory lookup; a snapshot refresh does blocking I/O
+    rate = await asyncio.to_thread(get_inr_rate, currency_code)
+    logger.info("save_expense_rows: expense_id=%s trip_id=%s users=%d currency=%s", expense_id, trip_id, len(users), currency_code)
+    rows = _expense_insert_rows(trip_id, expense_id, description, location, category,
+                                currency_code, users, date_str, rate)
+    summary_where = summary_service.by_expense_ids(trip_id, [expense_id or ""])
+    async with async_db.transaction() as cursor:
+        await summary_service.apply_delta_async(cursor, *summary_where, -1)
+        await async_db.bulk_insert(cursor, "expenses", _INSERT_EXPENSE_COLUMNS, rows)
+        await summary_service.apply_delta_async(cursor, *summary_where, 1)
+        await summary_service.prune_async(cursor, [trip_id])
+    summary_service.invalidate([trip_id])
+
+
+async def delete_expense_rows_async(expense_id: str) -> list[str]:
+    """Async version of delete_expense_rows."""
+    logger.info("delete_expense_rows: expense_id=%s", expense_id)
+    async with async_db.transaction() as cursor:
+        await cursor.execute(_SELECT_EXPENSE_TRIP_IDS_SQL, (expense_id,))
+        trip_ids = [row[0] for row in await cursor.fetchall()]
+        await summary_service.apply_delta_async(cursor, "expense_id = %s", (expense_id,), -1)
+        await cursor.execute(_DELETE_EXPENSE_SQL, (expense_id,))
+        logger.debug("Deleted %d expense rows for expense_id=%s", cursor.rowcount, expense_id)
+        await summary_service.prune_async(cursor, trip_ids)
+    summary_service.invalidate(trip_ids)
+    return trip_ids
+
+
+async def get_expenses_by_trip_async(
+    trip_id: str,
+    limit: Optional[int] = None,
+    after: Optional[str] = None,
+    date_from: Optional[str] = None,
+    date_to: Optional[str] = None,
+    fields: Optional[Iterable[str]] = None,
+) -> list[dict]:
+    """Async version of get_expenses_by_trip."""
+    sql, params = _expense_listing_query(trip_id, None, limit, after, date_from, date_to, fields)
+    return await async_db.fetch_all(sql, tuple(params), mapper=EXPENSE_ROWS)
+
+
+async def get_user_expenses_by_trip_async(
+    trip_id: str,
+    splitwise_user_id: int,
+    limit: Optional[int] = None,
+    after: Optional[str] = None,
+    date_from: Optional[str] = None,
+    date_to: Optional[str] = None,
+    fields: Optional[Iterable[str]] = None,
+) -> list[dict]:
+    """Async version of get_user_expenses_by_trip."""
+    sql, params = _expense_listing_query(trip_id, splitwise_user_id, limit, after, date_from, date_to, fields)
+    return await async_db.fetch_all(sql, tuple(params), mapper=EXPENSE_ROWS)
+
+
+async def get_personal_expenses_async(trip_id: str, splitwise_user_id: int) -> list[dict]:
+    """Async version of get_personal_expenses."""
+    rows = await async_db.fetch_all(_SELECT_PERSONAL_EXPENSES_SQL, (trip_id,), mapper=EXPENSE_ROWS)
+    logger.info("get_personal_expenses: trip_id=%s found %d rows", trip_id, len(rows))
+    return _shape_personal_expenses(rows)
+
+
+async def update_expense_details_async(expense_row_id: int, location: str, category: str) -> None:
+    """Async version of update_expense_details."""
+    async with async_db.transaction() as cursor:
+        await cursor.execute(_SELECT_ROW_TRIP_ID_SQL, (expense_row_id,))
+        trip_ids = [row[0] for row in await cursor.fetchall()]
+        await summary_service.apply_delta_async(cursor, "id = %s", (expense_row_id,), -1)
+        await cursor.execute(_UPDATE_DETAILS_SQL, (location, category, expense_row_id))
+        await summary_service.apply_delta_async(cursor, "id = %s", (expense_row_id,), 1)
+        await summary_service.prune_async(cursor, trip_ids)
+    summary_service.invalidate(trip_ids)
+
+
+async def update_stay_dates_async(
+    expense_row_id: int,
+    start_date: Optional[str],
+    end_date: Optional[str],
+    location: Optional[str] = None,
+) -> None:
+    """Async version of update_stay_dates."""
+    await async_db.execute(
+        _UPDATE_STAY_DATES_SQL,
+        (start_date or None, end_date or None, location or "", expense_row_id),
+    )
@@ -0,0 +1,345 @@
+import asyncio
+import logging
+import queue
+import re
+import threading
+import time
+import unicodedata
+from typing import Optional
+
+import requests
+
+from backend import async_db
+from backend.config import settings
+from backend.db import get_connection
+from backend.gazetteer import Gazetteer
+from backend.rows import RowMapper
+
+logger = logging.getLogger(__name__)
+
+NOMINATIM_SEARCH_URL = "https://nominatim.openstreetmap.org/search"
+NOMINATIM_HEADERS = {"User-Agent": "SohamSplitwise/1.0"}
+# Nominatim's usage policy allows one request per second per application
+NOMINATIM_RATE_LIMIT_SEC = 1.1
+
+# Overpass derives area ids from OSM ids; nodes have no area
+_AREA_ID_OFFSETS = {"relation": 3600000000, "way": 2400000000}
+
+_COLUMNS = (
+    "query_key, query, found, lat, lon, bbox_south, bbox_north, bbox_west, bbox_east, "
+    "osm_type, osm_id, area_id, display_name"
+)
+_UPSERT_SQL = f"""
+    INSERT INTO geocode_cache ({_COLUMNS})
+    VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+    ON DUPLICATE KEY UPDATE
+        found = VALUES(found), lat = VALUES(lat), lon = VALUES(lon),
+        bbox_south = VALUES(bbox_south), bbox_north = VALUES(bbox_north),
+        bbox_west = VALUES(bbox_west), bbox_east = VALUES(bbox_east),
+        osm_type = VALUES(osm_type), osm_id = VALUES(osm_id), area_id = VALUES(area_id),
+        display_name = VALUES(display_name)
+"""
+
+GEOCODE_ROWS = RowMapper({
+    "lat": float, "lon": float,
+    "bbox_south": float, "bbox_north": float, "bbox_west": float, "bbox_east": float,
+})
+
+# Serialises Nominatim calls process-wide (rate limit + at most one lookup per key)
+_nominatim_lock = threading.Lock()
+_last_call = 0.0
+
+# Background geocoder: names queued by geocode_cached, looked up one at a time
+# by a single daemon thread.  _queued holds the keys waiting or in progress.
+MAX_QUEUED_LOOKUPS = 1000
+_lookup_queue: "queue.Queue[str]" = queue.Queue()
+_queued: set[str] = set()
+_queue_guard = threading.Lock()
+_worker: Optional[threading.Thread] = None
+
+
+def normalize_key(name: str) -> str:
+    """Cache key for a place name: diacritics stripped, casefolded, whitespace collapsed."""
+    decomposed = unicodedata.normalize("NFKD", name)
+    stripped = "".join(ch for ch in decomposed if not unicodedata.combining(ch))
+    return re.sub(r"\s+", " ", stripped).strip().casefold()[:255]
+
+
+# Offline city index consulted before Nominatim (see backend/gazetteer.py)
+_gazetteer = Gazetteer(settings.GAZETTEER_PATH, normalize_key)
+
+
+def _select_sql(count: int) -> str:
+    return f"SELECT {_COLUMNS} FROM geocode_cache WHERE query_key IN ({','.join(['%s'] * count)})"
+
+
+def _to_place(row: dict) -> Optional[dict]:
+    """Shape a cache row as a place dict; None for a cached "not found"."""
+    if not row["found"]:
+        return None
+    bbox = None
+    if row["bbox_south"] is not None:
+        bbox = [row["bbox_south"], row["bbox_north"], row["bbox_west"], row["bbox_east"]]
+    return {
+        "lat": row["lat"],
+        "lon": row["lon"],
+        "bbox": bbox,
+        "osm_type": row["osm_type"],
+        "osm_id": row["osm_id"],
+        "area_id": row["area_id"],
+        "display_name": row["display_name"],
+    }
+
+
+def _is_complete(row: dict, need_osm: bool) -> bool:
+    # Rows seeded from location_coords have coords but no OSM ids
+    return not need_osm or not row["found"] or row["osm_type"] is not None
+
+
+def _search_nominatim(name: str) -> Optional[dict]:
+    """One rate-limited Nominatim search. Returns the first hit or {} when none.
+
+    Returns None on network/HTTP errors, which are not cached.
+    """
+    global _last_call
+    wait = _last_call + NOMINATIM_RATE_LIMIT_SEC - time.monotonic()
+    if wait > 0:
+        time.sleep(wait)
+    try:
+        resp = requests.get(
+            NOMINATIM_SEARCH_URL,
+            params={"q": name, "format": "json", "limit": 1},
+            headers=NOMINATIM_HEADERS,
+            timeout=10,
+        )
+        resp.raise_for_status()
+        data = resp.json()
+    except Exception:
+        logger.warning("Nominatim geocode failed for '%s'", name, exc_info=True)
+        return None
+    finally:
+        _last_call = time.monotonic()
+    return data[0] if data else {}
+
+
+def _row_params(key: str, name: str, hit: dict) -> tuple:
+    if not hit:
+        return (key, name[:255], 0, None, None, None, None, None, None, None, None, None, "")
+    bbox = [float(v) for v in hit.get("boundingbox") or []] or [None] * 4
+    osm_type = hit.get("osm_type")
+    osm_id = int(hit["osm_id"]) if hit.get("osm_id") is not None else None
+    offset = _AREA_ID_OFFSETS.get(osm_type)
+    area_id = offset + osm_id if offset is not None and osm_id is not None else None
+    return (key, name[:255], 1, float(hit["lat"]), float(hit["lon"]), *bbox,
+            osm_type, osm_id, area_id, hit.get("display_name", "")[:500])
+
+
+def _gazetteer_place(name: str) -> Optional[dict]:
+    """Place dict for *name* from the offline gazetteer (coords only, no OSM ids)."""
+    city = _gazetteer.lookup(name)
+    if city is None:
+        return None
+    return {
+        "lat": city["lat"],
+        "lon": city["lon"],
+        "bbox": None,
+        "osm_type": None,
+        "osm_id": None,
+        "area_id": None,
+        "display_name": f"{city['name']}, {city['country']}",
+    }
+
+
+def _from_gazetteer(names: list[str]) -> tuple[dict[str, dict], list[str]]:
+    """Resolve *names* from the gazetteer. Returns (places found, names left over)."""
+    places, missing = {}, []
+    for name in names:
+        place = _gazetteer_place(name)
+        if place is None:
+            missing.append(name)
+        else:
+            places[name] = place
+    return places, missing
+
+
+def _fetch_rows(keys: list[str]) -> dict[str, dict]:
+    conn = get_connection()
+    try:
+        cursor = conn.cursor()
+        cursor.execute(_select_sql(len(keys)), tuple(keys))
+        rows = GEOCODE_ROWS.fetchall(cursor)
+        cursor.close()
+    finally:
+        conn.close()
+    return {row["query_key"]: row for row in rows}
+
+
+def _resolve_miss(name: str, need_osm: bool) -> Optional[dict]:
+    """Geocode a cache miss via Nominatim and store it.
+
+    Runs under the process-wide Nominatim lock and re-reads the cache first,
+    so concurrent misses for one place trigger a single upstream call.
+    Returns the cache row, or None if Nominatim could not be reached.
+    """
+    key = normalize_key(name)
+    with _nominatim_lock:
+        row = _fetch_rows([key]).get(key)
+        if row is not None and _is_complete(row, need_osm):
+            return row
+        hit = _search_nominatim(name)
+        if hit is None:
+            return None
+        params = _row_params(key, name, hit)
+        conn = get_connection()
+        try:
+            cursor = conn.cursor()
+            cursor.execute(_UPSERT_SQL, params)
+            conn.commit()
+            cursor.close()
+        finally:
+            conn.close()
+    logger.info("Geocoded '%s' -> found=%s osm=%s/%s", name, bool(hit), params[9], params[10])
+    return dict(zip([c.strip() for c in _COLUMNS.split(",")], params))
+
+
+def _resolve(name: str, need_osm: bool) -> Optional[dict]:
+    """Place for a cache miss: gazetteer first, then Nominatim.
+
+    Callers that need OSM ids go to Nominatim first and only use the
+    gazetteer's coordinates when Nominatim has nothing or is unreachable.
+    """
+    place = None if need_osm else _gazetteer_place(name)
+    if place is None:
+        row = _resolve_miss(name, need_osm)
+        place = _to_place(row) if row is not None else None
+    if place is None and need_osm:
+        place = _gazetteer_place(name)
+    return place
+
+
+def _split_cached(keys: dict[str, str], rows: dict[str, dict],
+                  need_osm: bool) -> tuple[dict[str, Optional[dict]], list[str]]:
+    """Split *keys* ({name: key}) into cached places and names that need a lookup."""
+    places: dict[str, Optional[dict]] = {}
+    misses = []
+    for name, key in keys.items():
+        row = rows.get(key)
+        if row is None or not _is_complete(row, need_osm):
+            misses.append(name)
+        else:
+            places[name] = _to_place(row)
+    return places, misses
+
+
+def geocode_many(names: list[str], need_osm: bool = False) -> dict[str, Optional[dict]]:
+    """Return {name: place or None} for *names*, resolving cache misses via _resolve.
+
+    Places are {lat, lon, bbox, osm_type, osm_id, area_id, display_name};
+    None means neither the gazetteer nor Nominatim has a result (or
+    Nominatim was unreachable).  With *need_osm*, cached rows lacking OSM
+    ids are looked up again.
+    """
+    keys = {name: normalize_key(name) for name in names}
+    rows = _fetch_rows(sorted(set(keys.values()))) if keys else {}
+    places, misses = _split_cached(keys, rows, need_osm)
+    for name in misses:
+        places[name] = _resolve(name, need_osm)
+    return {name: places[name] for name in keys}
+
+
+def _lookup_worker() -> None:
+    while True:
+        name = _lookup_queue.get()
+        try:
+            _resolve_miss(name, need_osm=False)
+        except Exception:
+            logger.exception("Background geocode failed for '%s'", name)
+        finally:
+            with _queue_guard:
+                _queued.discard(normalize_key(name))
+
+
+def queue_lookups(names: list[str]) -> list[str]:
+    """Queue *names* for the background geocoder. Returns the names now waiting.
+
+    Names already queued are not queued twice.  Names beyond
+    MAX_QUEUED_LOOKUPS are not queued yet but are still returned as waiting,
+    so a polling client asks again and they are queued once there is room.
+    Failed lookups are not cached, so they are retried the same way.
+    """
+    global _worker
+    waiting = []
+    with _queue_guard:
+        for name in names:
+            key = normalize_key(name)
+            if key not in _queued and len(_queued) < MAX_QUEUED_LOOKUPS:
+                _queued.add(key)
+                _lookup_queue.put(name)
+            waiting.append(name)
+        if waiting and _worker is None:
+            _worker = threading.Thread(target=_lookup_worker, name="geocode-queue", daemon=True)
+            _worker.start()
+    if waiting:
+        logger.info("Geocode queue: %d waiting (%s)", len(_queued), ", ".join(waiting))
+    return waiting
+
+
+def geocode_cached(names: list[str]) -> tuple[dict[str, Optional[dict]], list[str]]:
+    """Cache-only geocode_many that never waits on Nominatim.
+
+    Returns ({name: place or None} for names in the cache or the gazetteer,
+    pending names).  Pending names are queued for the background geocoder and show up in the
+    cache once it reaches them (about NOMINATIM_RATE_LIMIT_SEC each).
+    """
+    keys = {name: normalize_key(name) for name in names}
+    rows = _fetch_rows(sorted(set(keys.values()))) if keys else {}
+    places, misses = _split_cached(keys, rows, need_osm=False)
+    found, misses = _from_gazetteer(misses)
+    places.update(found)
+    return places, queue_lookups(misses)
+
+
+def search_places(prefix: str, limit: int = 10) -> list[dict]:
+    """Typeahead over the offline gazetteer: [{name, country, lat, lon, population}]."""
+    return _gazetteer.search(prefix, limit)
+
+
+def geocode(name: str, need_osm: bool = False) -> Optional[dict]:
+    """Geocode one place name through the shared cache (see geocode_many)."""
+    return geocode_many([name], need_osm)[name]
+
+
+# ── Async variants (aiomysql) ──
+
+
+async def _fetch_rows_async(keys: list[str]) -> dict[str, dict]:
+    if not keys:
+        return {}
+    rows = await async_db.fetch_all(_select_sql(len(keys)), tuple(keys), mapper=GEOCODE_ROWS)
+    return {row["query_key"]: row for row in rows}
+
+
+async def geocode_many_async(names: list[str], need_osm: bool = False) -> dict[str, Optional[dict]]:
+    """Async version of geocode_many (cache misses are resolved in a worker thread)."""
+    keys = {name: normalize_key(name) for name in names}
+    rows = await _fetch_rows_async(sorted(set(keys.values())))
+    places, misses = _split_cached(keys, rows, need_osm)
+    for name in misses:
+        places[name] = await asyncio.to_thread(_resolve, name, need_osm)
+    return {name: places[name] for name in keys}
+
+
+async def geocode_cached_async(names: list[str]) -> tuple[dict[str, Optional[dict]], list[str]]:
+    """Async version of geocode_cached."""
+    keys = {name: normalize_key(name) for name in names}
+    rows = await _fetch_rows_async(sorted(set(keys.values())))
+    places, misses = _split_cached(keys, rows, need_osm=False)
+    # The first call loads the gazetteer file, so keep it off the event loop
+    found, misses = await asyncio.to_thread(_from_gazetteer, misses)
+    places.update(found)
+    return places, queue_lookups(misses)
+
+
+async def geocode_async(name: str, need_osm: bool = False) -> Optional[dict]:
+    """Async version of geocode."""
+    return (await geocode_many_async([name], need_osm))[name]
@@ -0,0 +1,115 @@
+import json
+import logging
+from typing import Any, Optional
+
+from backend import async_db
+from backend.db import get_connection
+from backend.rows import RowMapper
+
+logger = logging.getLogger(__name__)
+
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+FINISHED_STATUSES = (SUCCEEDED, FAILED)
+
+INTERRUPTED_ERROR = "Interrupted: the worker process stopped"
+
+_INSERT_JOB_SQL = """
+    INSERT INTO jobs (kind, status, user_id, payload, max_attempts, heartbeat_at)
+    VALUES (%s, 'queued', %s, %s, %s, UTC_TIMESTAMP())
+"""
+_MARK_RUNNING_SQL = (
+    "UPDATE jobs SET status = 'running', attempts = attempts + 1, heartbeat_at = UTC_TIMESTAMP(), "
+    "started_at = COALESCE(started_at, UTC_TIMESTAMP()) WHERE id = %s"
+)
+_HEARTBEAT_SQL = "UPDATE jobs SET heartbeat_at = UTC_TIMESTAMP() WHERE status IN ('queued', 'running') AND id IN ({})"
+_MARK_RETRY_SQL = "UPDATE jobs SET status = 'queued', error = %s WHERE id = %s"
+_MARK_FINISHED_SQL = (
+    "UPDATE jobs SET status = %s, result = %s, error = %s, finished_at = UTC_TIMESTAMP() WHERE id = %s"
+)
+# Rows from before V019 have no heartbeat and count as stale
+_FAIL_STALE_SQL = (
+    "UPDATE jobs SET status = 'failed', error = %s, finished_at = UTC_TIMESTAMP() "
+    "WHERE status IN ('queued', 'running') "
+    "AND (heartbeat_at IS NULL OR heartbeat_at < UTC_TIMESTAMP() - INTERVAL %s SECOND)"
+)
+_SELECT_JOB_SQL = (
+    "SELECT id, kind, status, user_id, result, error, attempts, max_attempts, "
+    "created_at, started_at, finished_at, updated_at FROM jobs WHERE id = %s"
+)
+
+JOB_ROWS = RowMapper({
+    "result": json.loads,
+    "created_at": str,
+    "started_at": str,
+    "finished_at": str,
+    "updated_at": str,
+})
+
+
+def _dumps(value: Any) -> Optional[str]:
+    return None if value is None else json.dumps(value, default=str)
+
+
+def _execute(sql: str, params: tuple) -> int:
+    conn = get_connection()
+    try:
+        cursor = conn.cursor()
+        cursor.execute(sql, params)
+        rowcount = cursor.rowcount
+        conn.commit()
+        cursor.close()
+    finally:
+        conn.close()
+    return rowcount
+
+
+def mark_running(job_id: int) -> None:
+    _execute(_MARK_RUNNING_SQL, (job_id,))
+
+
+def mark_retry(job_id: int, error: str) -> None:
+    """Put a job back in the queue after a failed attempt."""
+    _execute(_MARK_RETRY_SQL, (error, job_id))
+
+
+def mark_succeeded(job_id: int, result: Any) -> None:
+    _execute(_MARK_FINISHED_SQL, (SUCCEEDED, _dumps(result), None, job_id))
+
+
+def mark_failed(job_id: int, error: str) -> None:
+    _execute(_MARK_FINISHED_SQL, (FAILED, None, error, job_id))
+
+
+def heartbeat(job_ids: list[int]) -> None:
+    """Record that this process still holds *job_ids* (queued or running)."""
+    if job_ids:
+        _execute(_HEARTBEAT_SQL.format(",".join(["%s"] * len(job_ids))), tuple(job_ids))
+
+
+def fail_stale(max_age_sec: float) -> int:
+    """Fail queued/running jobs without a heartbeat for *max_age_sec*.
+
+    Their worker process died (crash or restart); live jobs of other
+    processes keep beating and are left alone.
+    """
+    count = _execute(_FAIL_STALE_SQL, (INTERRUPTED_ERROR, int(max_age_sec)))
+    if count:
+        logger.warning("Marked %d interrupted job(s) as failed", count)
+    return count
+
+
+# ── Async variants (aiomysql) ──
+
+
+async def create_job_async(kind: str, payload: dict, user_id: Optional[int], max_attempts: int) -> int:
+    """Insert a queued job row and return its id."""
+    _, job_id = await async_db.execute(_INSERT_JOB_SQL, (kind, user_id, _dumps(payload), max_attempts))
+    return job_id
+
+
+async def get_job_async(job_id: int) -> Optional[dict]:
+    """Return a job's status row, or None."""
+    return await async_db.fetch_one(_SELECT_JOB_SQL, (job_id,), mapper=JOB_ROWS)
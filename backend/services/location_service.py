@@ -1,100 +1,39 @@
 import logging
-import time
 
-import requests
-
-from backend.db import get_connection
+from backend.services import geocode_service
 
 logger = logging.getLogger(__name__)
 
-NOMINATIM_SEARCH_URL = "https://nominatim.openstreetmap.org/search"
-NOMINATIM_HEADERS = {"User-Agent": "SohamSplitwise/1.0"}
-NOMINATIM_RATE_LIMIT_SEC = 1.1
-
-
-def _geocode_city(name: str) -> dict:
-    """Call Nominatim to geocode a city name. Returns {name, lat, lon, display_name}."""
-    try:
-        resp = requests.get(
-            NOMINATIM_SEARCH_URL,
-            params={"q": name, "format": "json", "limit": 1},
-            headers=NOMINATIM_HEADERS,
-            timeout=10,
-        )
-        resp.raise_for_status()
-        data = resp.json()
-        if data:
-            return {
-                "name": name,
-                "lat": float(data[0]["lat"]),
-                "lon": float(data[0]["lon"]),
-                "display_name": data[0].get("display_name", ""),
-            }
-    except Exception:
-        logger.warning("Nominatim geocode failed for '%s'", name, exc_info=True)
-
-    return {"name": name, "lat": None, "lon": None, "display_name": ""}
 
+def _to_coord(name: str, place) -> dict:
+    """Shape a geocode result as {name, lat, lon, display_name}."""
+    if place is None:
+        return {"name": name, "lat": None, "lon": None, "display_name": ""}
+    return {"name": name, "lat": place["lat"], "lon": place["lon"], "display_name": place["display_name"]}
 
-def _insert_coord(name: str, lat: float | None, lon: float | None, display_name: str) -> None:
-    """Insert a location coord row, ignoring duplicates."""
-    conn = get_connection()
-    try:
-        cursor = conn.cursor()
-        cursor.execute(
-            "INSERT IGNORE INTO location_coords (name, lat, lon, display_name) "
-            "VALUES (%s, %s, %s, %s)",
-            (name, lat, lon, display_name),
-        )
-        conn.commit()
-        cursor.close()
-    finally:
-        conn.close()
 
+def get_location_coords(names: list[str]) -> dict:
+    """Return {"coords": [...], "pending": [...]} for the given location names.
 
-def get_location_coords(names: list[str]) -> list[dict]:
-    """Return coords for the given location names, geocoding any that are missing (lazy backfill)."""
+    coords has one entry per name, in input order, read from the shared
+    geocode cache only.  Names no one has looked up before are queued for the
+    background geocoder and listed in pending, with null coords for now.
+    Names Nominatim cannot place come back with null coords and are not pending.
+    """
     if not names:
-        return []
+        return {"coords": [], "pending": []}
+    places, pending = geocode_service.geocode_cached(names)
+    return {"coords": [_to_coord(n, places.get(n)) for n in names], "pending": pending}
 
-    # 1. Fetch existing from DB
-    conn = get_connection()
-    try:
-        cursor = conn.cursor(dictionary=True)
-        placeholders = ",".join(["%s"] * len(names))
-        cursor.execute(
-            f"SELECT name, lat, lon, display_name FROM location_coords WHERE name IN ({placeholders})",
-            tuple(names),
-        )
-        rows = cursor.fetchall()
-        cursor.close()
-    finally:
-        conn.close()
 
-    found = {row["name"]: _row_to_coord(row) for row in rows}
+def search_locations(prefix: str, limit: int = 10) -> list[dict]:
+    """Location typeahead from the offline gazetteer, most populous first (empty when disabled)."""
+    return geocode_service.search_places(prefix, limit)
 
-    # 2. Geocode missing ones
-    missing = [n for n in names if n not in found]
-    for i, name in enumerate(missing):
-        if i > 0:
-            time.sleep(NOMINATIM_RATE_LIMIT_SEC)
-        coord = _geocode_city(name)
-        _insert_coord(coord["name"], coord["lat"], coord["lon"], coord["display_name"])
-        found[coord["name"]] = coord
-        logger.info("Geocoded '%s' -> lat=%s lon=%s", name, coord["lat"], coord["lon"])
 
-    # 3. Return in the same order as input, filtering out any with null coords
-    result = []
-    for n in names:
-        if n in found:
-            result.append(found[n])
-    return result
-
-
-def _row_to_coord(row: dict) -> dict:
-    return {
-        "name": row["name"],
-        "lat": float(row["lat"]) if row["lat"] is not None else None,
-        "lon": float(row["lon"]) if row["lon"] is not None else None,
-        "display_name": row.get("display_name", ""),
-    }
+async def get_location_coords_async(names: list[str]) -> dict:
+    """Async version of get_location_coords."""
+    if not names:
+        return {"coords": [], "pending": []}
+    places, pending = await geocode_service.geocode_cached_async(names)
+    return {"coords": [_to_coord(n, places.get(n)) for n in names], "pending": pending}
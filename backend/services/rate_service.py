@@ -0,0 +1,160 @@
+import logging
+import threading
+from datetime import datetime, timedelta
+from typing import Iterable, Optional
+
+import requests
+
+from backend.config import settings
+from backend.db import get_connection
+
+logger = logging.getLogger(__name__)
+
+EXCHANGE_RATE_API = "https://v6.exchangerate-api.com/v6/bd518438bcd832b6b743de47"
+
+# Every snapshot is fetched against this base; other pairs are triangulated.
+PIVOT_CURRENCY = "USD"
+
+# After a failed refresh, keep serving the stale snapshot this long before retrying
+REFRESH_RETRY_SEC = 60
+
+# In-memory copy of the latest snapshot: {quote_code: units per 1 PIVOT}
+_table: dict[str, float] = {}
+_fetched_at: Optional[datetime] = None
+_last_attempt: Optional[datetime] = None
+_refresh_lock = threading.Lock()
+
+
+def _is_fresh(fetched_at: Optional[datetime]) -> bool:
+    if fetched_at is None:
+        return False
+    return datetime.utcnow() - fetched_at < timedelta(hours=settings.EXCHANGE_RATE_TTL_HOURS)
+
+
+def _load_from_db() -> tuple[dict[str, float], Optional[datetime]]:
+    """Return the stored pivot snapshot and when it was fetched."""
+    conn = get_connection()
+    try:
+        cursor = conn.cursor()
+        cursor.execute(
+            "SELECT quote_code, rate, fetched_at FROM exchange_rates WHERE base_code = %s",
+            (PIVOT_CURRENCY,),
+        )
+        rows = cursor.fetchall()
+        cursor.close()
+    finally:
+        conn.close()
+
+    table = {row[0]: float(row[1]) for row in rows}
+    fetched_at = min((row[2] for row in rows), default=None)
+    return table, fetched_at
+
+
+def _save_to_db(table: dict[str, float], fetched_at: datetime) -> None:
+    conn = get_connection()
+    try:
+        cursor = conn.cursor()
+        cursor.executemany(
+            """
+            INSERT INTO exchange_rates (base_code, quote_code, rate, fetched_at)
+            VALUES (%s, %s, %s, %s)
+            ON DUPLICATE KEY UPDATE rate = VALUES(rate), fetched_at = VALUES(fetched_at)
+            """,
+            [(PIVOT_CURRENCY, code, rate, fetched_at) for code, rate in table.items()],
+        )
+        conn.commit()
+        cursor.close()
+    finally:
+        conn.close()
+
+
+def _fetch_snapshot() -> Optional[dict[str, float]]:
+    """Fetch every rate against the pivot in one upstream call, or None on failure."""
+    try:
+        resp = requests.get(f"{EXCHANGE_RATE_API}/latest/{PIVOT_CURRENCY}", timeout=10)
+        resp.raise_for_status()
+        data = resp.json()
+        rates = data.get("conversion_rates")
+        if data.get("result") != "success" or not rates:
+            logger.warning("Exchange rate API returned no rates: %s", data.get("error-type", data.get("result")))
+            return None
+        logger.info("Fetched %d exchange rates against %s", len(rates), PIVOT_CURRENCY)
+        return {code: float(rate) for code, rate in rates.items()}
+    except Exception:
+        logger.warning("Failed to fetch exchange rate snapshot for %s", PIVOT_CURRENCY, exc_info=True)
+        return None
+
+
+def _ensure_table() -> dict[str, float]:
+    """Return a snapshot, refreshing it when older than EXCHANGE_RATE_TTL_HOURS.
+
+    Order: memory, then the DB table, then the upstream API.  Only one thread
+    refreshes at a time.  A failed refresh is never stored; the previous
+    (stale) snapshot keeps serving until the next attempt succeeds.
+    """
+    global _table, _fetched_at, _last_attempt
+    if _table and _is_fresh(_fetched_at):
+        return _table
+
+    with _refresh_lock:
+        if _table and _is_fresh(_fetched_at):
+            return _table
+        now = datetime.utcnow().replace(microsecond=0)
+        if _last_attempt and now - _last_attempt < timedelta(seconds=REFRESH_RETRY_SEC):
+            return _table
+        _last_attempt = now
+
+        table, fetched_at = _load_from_db()
+        if table and _is_fresh(fetched_at):
+            _table, _fetched_at = table, fetched_at
+            return _table
+
+        snapshot = _fetch_snapshot()
+        if snapshot:
+            _save_to_db(snapshot, now)
+            _table, _fetched_at = snapshot, now
+        elif table and not _table:
+            logger.warning("Serving stale exchange rates from %s", fetched_at)
+            _table, _fetched_at = table, fetched_at
+    return _table
+
+
+def get_rate(from_code: str, to_code: str) -> Optional[float]:
+    """Return the *from_code* -> *to_code* rate, or None if it is unknown."""
+    if from_code == to_code:
+        return 1.0
+    table = _ensure_table()
+    from_rate = table.get(from_code)
+    to_rate = table.get(to_code)
+    if not from_rate or to_rate is None:
+        return None
+    return to_rate / from_rate
+
+
+def get_conversion_rate(from_code: str, to_code: str) -> float:
+    """Like get_rate but falls back to 1.0 (not cached) when the rate is unknown."""
+    rate = get_rate(from_code, to_code)
+    if rate is None:
+        logger.warning("No exchange rate for %s->%s, defaulting to 1.0", from_code, to_code)
+        return 1.0
+    logger.debug("Exchange rate %s->%s = %s", from_code, to_code, rate)
+    return rate
+
+
+def get_conversion_rates(base: str, targets: Iterable[str]) -> dict[str, float]:
+    """Rates from *base* to each target, all derived from one snapshot."""
+    return {t: get_conversion_rate(base, t) for t in targets}
+
+
+def prefetch(currency_codes: Iterable[str] = ()) -> None:
+    """Make sure rates are loaded before a batch runs, so it never stalls mid-way.
+
+    One snapshot covers all currencies, so this is at most a single upstream
+    call regardless of how many distinct codes the batch contains.  Codes
+    the snapshot lacks are logged.
+    """
+    codes = set(currency_codes)
+    table = _ensure_table()
+    missing = sorted(c for c in codes if c not in table)
+    if missing:
+        logger.warning("No exchange rates available for: %s", ", ".join(missing))
@@ -0,0 +1,141 @@
+"""Asyncio counterpart of splitwise_service: same functions, but they take a
+SplitwiseClient instead of an OAuth1Session and must be awaited."""
+import asyncio
+import logging
+from typing import AsyncIterator, Optional
+from urllib.parse import urlencode
+
+import httpx
+from oauthlib.oauth1 import Client as OAuth1Signer
+
+from backend import http_client
+from backend.config import settings
+from backend.constants import BASE_API_URL, DEFAULT_EXPENSE_LIMIT, MAX_EXPENSE_PAGES
+from backend.services.splitwise_service import (
+    expense_page_params,
+    expense_write_request,
+    keep_page_expenses,
+    page_expenses,
+    pagination_exhausted,
+)
+
+logger = logging.getLogger(__name__)
+
+FORM_CONTENT_TYPE = "application/x-www-form-urlencoded"
+
+
+class SplitwiseClient:
+    """Signs requests with one user's OAuth1 tokens and sends them over the shared pool."""
+
+    def __init__(self, access_token: str, access_token_secret: str):
+        self._signer = OAuth1Signer(
+            settings.CONSUMER_KEY,
+            client_secret=settings.CONSUMER_SECRET,
+            resource_owner_key=access_token,
+            resource_owner_secret=access_token_secret,
+        )
+
+    async def request(self, method: str, url: str, params: Optional[dict] = None,
+                      data: Optional[dict] = None) -> httpx.Response:
+        """Send a signed request, retrying idempotent calls on 429/5xx with backoff."""
+        if params:
+            url = str(httpx.URL(url, params=params))
+        body = urlencode(data) if data else None
+        headers = {"Content-Type": FORM_CONTENT_TYPE} if data else {}
+
+        client = http_client.get_async_client()
+        attempt = 0
+        while True:
+            # Re-sign on every attempt so each retry carries a fresh nonce
+            signed_url, signed_headers, signed_body = self._signer.sign(
+                url, http_method=method, body=body, headers=headers,
+            )
+            response = await client.request(
+                method, signed_url, headers=signed_headers, content=signed_body,
+            )
+            if not http_client.should_retry(method, response.status_code, attempt):
+                return response
+            delay = http_client.backoff_delay(attempt, response.headers.get("Retry-After"))
+            logger.warning("Splitwise API: %s %s status=%s, retrying in %.2fs",
+                           method, url, response.status_code, delay)
+            attempt += 1
+            await asyncio.sleep(delay)
+
+    async def get(self, url: str, params: Optional[dict] = None) -> httpx.Response:
+        return await self.request("GET", url, params=params)
+
+    async def post(self, url: str, data: Optional[dict] = None) -> httpx.Response:
+        return await self.request("POST", url, data=data)
+
+
+async def fetch_current_user(client: SplitwiseClient) -> dict:
+    logger.debug("Splitwise API: GET /get_current_user")
+    response = await client.get(f"{BASE_API_URL}/get_current_user")
+    logger.debug("Splitwise API: /get_current_user status=%s", response.status_code)
+    return response.json()
+
+
+async def fetch_groups(client: SplitwiseClient) -> dict:
+    logger.debug("Splitwise API: GET /get_groups")
+    response = await client.get(f"{BASE_API_URL}/get_groups")
+    logger.debug("Splitwise API: /get_groups status=%s", response.status_code)
+    return response.json()
+
+
+async def iter_expense_pages(
+    client: SplitwiseClient,
+    group_id: Optional[str],
+    page_size: int = DEFAULT_EXPENSE_LIMIT,
+    max_pages: int = MAX_EXPENSE_PAGES,
+    updated_after: Optional[str] = None,
+    include_deleted: bool = False,
+) -> AsyncIterator[list]:
+    """Async version of splitwise_service.iter_expense_pages."""
+    offset = 0
+    for page in range(max_pages):
+        logger.debug("Splitwise API: GET /get_expenses group_id=%s offset=%d limit=%d updated_after=%s", group_id, offset, page_size, updated_after)
+        response = await client.get(
+            f"{BASE_API_URL}/get_expenses",
+            params=expense_page_params(group_id, page_size, offset, updated_after),
+        )
+        expenses = page_expenses(response)
+        kept = keep_page_expenses(expenses, include_deleted)
+        logger.debug("Splitwise API: page %d fetched %d expenses (%d kept) for group_id=%s", page, len(expenses), len(kept), group_id)
+        if kept:
+            yield kept
+        if len(expenses) < page_size:
+            return
+        offset += page_size
+
+    raise pagination_exhausted(group_id, page_size, max_pages)
+
+
+async def iter_expenses(client: SplitwiseClient, group_id: str, **kwargs) -> AsyncIterator[dict]:
+    async for page in iter_expense_pages(client, group_id, **kwargs):
+        for expense in page:
+            yield expense
+
+
+async def fetch_expenses(client: SplitwiseClient, group_id: str) -> list:
+    active_expenses = [e async for e in iter_expenses(client, group_id)]
+    logger.debug("Splitwise API: fetched %d active expenses for group_id=%s", len(active_expenses), group_id)
+    return active_expenses
+
+
+async def create_or_update_expense(client: SplitwiseClient, payload: dict) -> dict:
+    response = await client.post(expense_write_request(payload), data=payload)
+    logger.info("Splitwise API: expense response status=%s", response.status_code)
+    return response.json()
+
+
+async def delete_expense(client: SplitwiseClient, expense_id: str) -> dict:
+    logger.info("Splitwise API: POST /delete_expense/%s", expense_id)
+    response = await client.post(f"{BASE_API_URL}/delete_expense/{expense_id}")
+    logger.info("Splitwise API: delete_expense status=%s", response.status_code)
+    return response.json()
+
+
+async def fetch_currencies(client: SplitwiseClient) -> dict:
+    logger.debug("Splitwise API: GET /get_currencies")
+    response = await client.get(f"{BASE_API_URL}/get_currencies")
+    return response.json()
@@ -0,0 +1,50 @@
+import logging
+
+from backend.cache import TTLCache
+from backend.config import settings
+from backend.responses import compute_etag
+from backend.services import splitwise_async_service
+from backend.services.splitwise_async_service import SplitwiseClient
+
+logger = logging.getLogger(__name__)
+
+# Values are (payload, etag).  Groups are keyed by local user id because the
+# payload (members, balances) is per user; currencies are global.
+_groups_cache = TTLCache("splitwise_groups", settings.GROUPS_CACHE_TTL_SEC)
+_currencies_cache = TTLCache("splitwise_currencies", settings.CURRENCIES_CACHE_TTL_SEC)
+CURRENCIES_KEY = "all"
+
+
+async def get_groups(client: SplitwiseClient, user_id: int) -> tuple[dict, str]:
+    """Return (groups payload, etag) for a user, fetching from Splitwise on a miss."""
+    if not user_id:
+        raise ValueError("get_groups needs a local user id to key the cache")
+    cached = _groups_cache.get(user_id)
+    if cached is not None:
+        logger.debug("Groups cache hit: user=%s", user_id)
+        return cached
+
+    result = await splitwise_async_service.fetch_groups(client)
+    entry = (result, compute_etag(result))
+    # Only cache real payloads, never an upstream error body
+    if "groups" in result:
+        _groups_cache.set(user_id, entry)
+    return entry
+
+
+async def get_currencies(client: SplitwiseClient) -> tuple[dict, str]:
+    """Return (currencies payload, etag), fetching from Splitwise on a miss."""
+    cached = _currencies_cache.get(CURRENCIES_KEY)
+    if cached is not None:
+        return cached
+
+    result = await splitwise_async_service.fetch_currencies(client)
+    entry = (result, compute_etag(result))
+    if "currencies" in result:
+        _currencies_cache.set(CURRENCIES_KEY, entry)
+    return entry
+
+
+def invalidate_groups(*user_ids: int) -> None:
+    """Drop cached groups for the given users (after trip or expense writes)."""
+    _groups_cache.invalidate(*user_ids)
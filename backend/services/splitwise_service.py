@@ -1,8 +1,9 @@
 import logging
+from typing import Iterator, Optional
 
 from requests_oauthlib import OAuth1Session
 
-from backend.constants import BASE_API_URL, DEFAULT_EXPENSE_LIMIT
+from backend.constants import BASE_API_URL, DEFAULT_EXPENSE_LIMIT, MAX_EXPENSE_PAGES
 
 logger = logging.getLogger(__name__)
 
@@ -21,34 +22,119 @@ def fetch_groups(oauth: OAuth1Session) -> dict:
     return response.json()
 
 
-def fetch_expenses(oauth: OAuth1Session, group_id: str) -> list:
-    logger.debug("Splitwise API: GET /get_expenses group_id=%s", group_id)
-    response = oauth.get(
-        f"{BASE_API_URL}/get_expenses",
-        params={"group_id": group_id, "limit": DEFAULT_EXPENSE_LIMIT},
+def is_deleted(expense: dict) -> bool:
+    """True if Splitwise reports the expense as deleted."""
+    return expense.get("deleted_at") is not None or expense.get("deleted_by") is not None
+
+
+def expense_page_params(group_id: Optional[str], page_size: int, offset: int,
+                        updated_after: Optional[str] = None) -> dict:
+    """Query params for one /get_expenses page (shared with the async client).
+
+    Without *group_id* Splitwise returns expenses across all the user's groups.
+    """
+    params = {"limit": page_size, "offset": offset}
+    if group_id:
+        params["group_id"] = group_id
+    if updated_after:
+        params["updated_after"] = updated_after
+    return params
+
+
+def keep_page_expenses(expenses: list, include_deleted: bool) -> list:
+    """Drop deleted expenses from a page unless the caller asked for them."""
+    if include_deleted:
+        return expenses
+    return [e for e in expenses if not is_deleted(e)]
+
+
+def page_expenses(response) -> list:
+    """The expense list of one /get_expenses response (requests or httpx).
+
+    Raises on an HTTP error status or a body without "expenses", so an
+    error (revoked token, rate limit, outage) never reads as a short, empty
+    last page that would end pagination early.
+    """
+    response.raise_for_status()
+    body = response.json()
+    expenses = body.get("expenses") if isinstance(body, dict) else None
+    if not isinstance(expenses, list):
+        raise RuntimeError(f"Splitwise /get_expenses returned no expense list: {str(body)[:200]}")
+    return expenses
+
+
+def pagination_exhausted(group_id: Optional[str], page_size: int, max_pages: int) -> RuntimeError:
+    scope = f"group_id={group_id}" if group_id else "all groups"
+    return RuntimeError(
+        f"Expense history for {scope} exceeds {max_pages} pages of {page_size}"
     )
-    data = response.json()
-    expenses = data.get("expenses", [])
-    # Filter out deleted expenses
-    active_expenses = [
-        e
-        for e in expenses
-        if e.get("deleted_at") is None and e.get("deleted_by") is None
-    ]
-    logger.debug("Splitwise API: fetched %d expenses (%d active) for group_id=%s", len(expenses), len(active_expenses), group_id)
-    return active_expenses
 
 
-def create_or_update_expense(oauth: OAuth1Session, payload: dict) -> dict:
+def expense_write_request(payload: dict) -> str:
+    """Pop the expense ID off *payload* and return the endpoint URL to POST to."""
     expense_id = payload.pop("id", None)
     if expense_id:
         logger.info("Splitwise API: POST /update_expense/%s", expense_id)
-        response = oauth.post(
-            f"{BASE_API_URL}/update_expense/{expense_id}", data=payload
+        return f"{BASE_API_URL}/update_expense/{expense_id}"
+    logger.info("Splitwise API: POST /create_expense")
+    return f"{BASE_API_URL}/create_expense"
+
+
+def iter_expense_pages(
+    oauth: OAuth1Session,
+    group_id: Optional[str],
+    page_size: int = DEFAULT_EXPENSE_LIMIT,
+    max_pages: int = MAX_EXPENSE_PAGES,
+    updated_after: Optional[str] = None,
+    include_deleted: bool = False,
+) -> Iterator[list]:
+    """Yield the expenses of a group (or, with group_id=None, of every group
+    the user belongs to) one page at a time.
+
+    Walks Splitwise's offset/limit pagination until a short page comes back.
+    Deleted expenses are dropped unless *include_deleted* is set (delta syncs
+    need them to remove local rows).  *updated_after* is an ISO-8601 UTC
+    timestamp passed straight to Splitwise's ``updated_after`` filter.
+
+    Raises RuntimeError if the group has more than *max_pages* pages, and
+    page_expenses raises on an error response, so a truncated history is
+    never mistaken for the complete one (the sync path deletes local rows
+    for expense IDs it did not see).
+    """
+    offset = 0
+    for page in range(max_pages):
+        logger.debug("Splitwise API: GET /get_expenses group_id=%s offset=%d limit=%d updated_after=%s", group_id, offset, page_size, updated_after)
+        response = oauth.get(
+            f"{BASE_API_URL}/get_expenses",
+            params=expense_page_params(group_id, page_size, offset, updated_after),
         )
-    else:
-        logger.info("Splitwise API: POST /create_expense")
-        response = oauth.post(f"{BASE_API_URL}/create_expense", data=payload)
+        expenses = page_expenses(response)
+        kept = keep_page_expenses(expenses, include_deleted)
+        logger.debug("Splitwise API: page %d fetched %d expenses (%d kept) for group_id=%s", page, len(expenses), len(kept), group_id)
+        if kept:
+            yield kept
+        if len(expenses) < page_size:
+            return
+        offset += page_size
+
+    raise pagination_exhausted(group_id, page_size, max_pages)
+
+
+def iter_expenses(oauth: OAuth1Session, group_id: str, **kwargs) -> Iterator[dict]:
+    """Yield active expenses of a group one by one, fetching pages lazily."""
+    for page in iter_expense_pages(oauth, group_id, **kwargs):
+        yield from page
+
+
+def fetch_expenses(oauth: OAuth1Session, group_id: str) -> list:
+    """Return the full list of active expenses for a group (all pages)."""
+    active_expenses = list(iter_expenses(oauth, group_id))
+    logger.debug("Splitwise API: fetched %d active expenses for group_id=%s", len(active_expenses), group_id)
+    return active_expenses
+
+
+def create_or_update_expense(oauth: OAuth1Session, payload: dict) -> dict:
+    response = oauth.post(expense_write_request(payload), data=payload)
     logger.info("Splitwise API: expense response status=%s", response.status_code)
     return response.json()
 
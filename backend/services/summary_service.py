@@ -0,0 +1,190 @@
+import logging
+from decimal import Decimal
+from typing import Iterable, Optional, Sequence
+
+from backend import async_db, cache
+from backend.db import get_connection
+from backend.services.trip_service import group_tag
+
+logger = logging.getLogger(__name__)
+
+# trip_summaries.day for expense rows without a date (the column is part of the PK)
+NO_DATE = "1000-01-01"
+
+# Adds sign * (the matching expense rows) into their summary buckets.  Callers
+# subtract (-1) the rows they are about to change, write, then add (+1) the
+# same rows back, all on one cursor inside the caller's transaction.
+_DELTA_SQL = """
+    INSERT INTO trip_summaries (trip_id, user_id, category, day, amount_inr, expense_count)
+    SELECT trip_id, user_id, category, COALESCE(date, %s), %s * SUM(amount_inr), %s * COUNT(*)
+    FROM expenses
+    WHERE {where}
+    GROUP BY trip_id, user_id, category, COALESCE(date, %s)
+    ON DUPLICATE KEY UPDATE
+        amount_inr    = trip_summaries.amount_inr + VALUES(amount_inr),
+        expense_count = trip_summaries.expense_count + VALUES(expense_count)
+"""
+_PRUNE_SQL = "DELETE FROM trip_summaries WHERE trip_id = %s AND expense_count <= 0"
+_DELETE_TRIP_SQL = "DELETE FROM trip_summaries WHERE trip_id = %s"
+
+_SELECT_TOTAL_SQL = (
+    "SELECT COALESCE(SUM(amount_inr), 0) AS amount_inr, COALESCE(SUM(expense_count), 0) AS count "
+    "FROM trip_summaries WHERE {where}"
+)
+_SELECT_BY_CATEGORY_SQL = (
+    "SELECT category AS label, SUM(amount_inr) AS value, SUM(expense_count) AS count "
+    "FROM trip_summaries WHERE {where} GROUP BY category ORDER BY value DESC"
+)
+_SELECT_BY_DAY_SQL = (
+    "SELECT day AS label, SUM(amount_inr) AS value, SUM(expense_count) AS count "
+    "FROM trip_summaries WHERE {where} GROUP BY day ORDER BY day"
+)
+_SELECT_BY_USER_SQL = (
+    "SELECT user_id AS label, SUM(amount_inr) AS value, SUM(expense_count) AS count "
+    "FROM trip_summaries WHERE {where} GROUP BY user_id ORDER BY value DESC"
+)
+
+
+def _in(column: str, values: Sequence) -> str:
+    return f"{column} IN ({','.join(['%s'] * len(values))})"
+
+
+def delta_params(sign: int, where_params: Sequence) -> tuple:
+    return (NO_DATE, sign, sign, *where_params, NO_DATE)
+
+
+def delta_sql(where: str) -> str:
+    return _DELTA_SQL.format(where=where)
+
+
+def by_expense_ids(trip_id: str, expense_ids: Sequence[str]) -> tuple[str, tuple]:
+    """WHERE clause selecting all rows of the given expenses in one trip."""
+    return f"trip_id = %s AND {_in('expense_id', expense_ids)}", (trip_id, *expense_ids)
+
+
+# ── Writes (run on the caller's cursor / transaction) ──
+
+
+def apply_delta(cursor, where: str, params: Sequence, sign: int) -> None:
+    """Add (+1) or subtract (-1) the matching expense rows from trip_summaries."""
+    cursor.execute(delta_sql(where), delta_params(sign, params))
+
+
+def prune(cursor, trip_ids: Iterable[str]) -> None:
+    """Drop buckets whose rows have all been subtracted away.
+
+    Every delta is followed by a prune; once the transaction has committed,
+    callers pass the same trips to ``invalidate``.
+    """
+    for trip_id in set(trip_ids):
+        cursor.execute(_PRUNE_SQL, (trip_id,))
+
+
+async def apply_delta_async(cursor, where: str, params: Sequence, sign: int) -> None:
+    """Async version of apply_delta (aiomysql cursor)."""
+    await cursor.execute(delta_sql(where), delta_params(sign, params))
+
+
+async def prune_async(cursor, trip_ids: Iterable[str]) -> None:
+    """Async version of prune."""
+    for trip_id in set(trip_ids):
+        await cursor.execute(_PRUNE_SQL, (trip_id,))
+
+
+def invalidate(trip_ids: Iterable[str]) -> None:
+    """Drop cached trips whose total_inr comes from these trips' buckets.
+
+    Call after the transaction that changed the buckets has committed: an
+    earlier call lets a concurrent reader cache the pre-commit rows again.
+    """
+    cache.invalidate_tags(*{group_tag(trip_id) for trip_id in trip_ids})
+
+
+def rebuild(trip_ids: Optional[Sequence[str]] = None) -> int:
+    """Recompute trip_summaries from the expenses table to repair drift.
+
+    Rebuilds the given trips, or every trip when *trip_ids* is empty, in a
+    single transaction.  Returns the number of summary rows written.
+    """
+    if trip_ids:
+        where, params = _in("trip_id", trip_ids), tuple(trip_ids)
+    else:
+        where, params = "1 = 1", ()
+
+    conn = get_connection()
+    try:
+        cursor = conn.cursor()
+        cursor.execute(f"DELETE FROM trip_summaries WHERE {where}", params)
+        apply_delta(cursor, where, params, 1)
+        written = cursor.rowcount
+        conn.commit()
+        cursor.close()
+    finally:
+        conn.close()
+
+    logger.info("Rebuilt trip summaries: trips=%s rows=%d", ",".join(trip_ids) if trip_ids else "all", written)
+    return written
+
+
+# ── Reads ──
+
+
+def _scope(trip_id: str, splitwise_user_id: Optional[int]) -> tuple[str, tuple]:
+    if splitwise_user_id is None:
+        return "trip_id = %s", (trip_id,)
+    return "trip_id = %s AND user_id = %s", (trip_id, splitwise_user_id)
+
+
+def _buckets(rows: list[dict]) -> list[dict]:
+    out = []
+    for row in rows:
+        label = row["label"]
+        if str(label) == NO_DATE:
+            label = None
+        out.append({
+            "label": str(label) if label is not None else None,
+            "value": float(row["value"]) if isinstance(row["value"], Decimal) else float(row["value"] or 0),
+            "count": int(row["count"] or 0),
+        })
+    return out
+
+
+def _shape(results: dict, scope: str) -> dict:
+    total = results["total"] or {"amount_inr": 0, "count": 0}
+    summary = {
+        "scope": scope,
+        "total": {"amount_inr": float(total["amount_inr"] or 0), "count": int(total["count"] or 0)},
+        "by_category": _buckets(results["by_category"]),
+        "by_day": _buckets(results["by_day"]),
+    }
+    if "by_user" in results:
+        summary["by_user"] = _buckets(results["by_user"])
+    return summary
+
+
+def _summary_queries(trip_id: str, splitwise_user_id: Optional[int]) -> dict[str, tuple[str, tuple]]:
+    where, params = _scope(trip_id, splitwise_user_id)
+    queries = {
+        "by_category": (_SELECT_BY_CATEGORY_SQL.format(where=where), params),
+        "by_day": (_SELECT_BY_DAY_SQL.format(where=where), params),
+    }
+    if splitwise_user_id is None:
+        queries["by_user"] = (_SELECT_BY_USER_SQL.format(where=where), params)
+    return queries
+
+
+async def get_trip_summary_async(trip_id: str, splitwise_user_id: Optional[int] = None) -> dict:
+    """Return totals by category, day (and user, trip-wide) from trip_summaries.
+
+    Reads only summary buckets, so cost depends on the number of users,
+    categories and days in the trip rather than on how many expenses it has.
+    """
+    where, params = _scope(trip_id, splitwise_user_id)
+    results: dict = {}
+    async with async_db.transaction(dictionary=True) as cursor:
+        await cursor.execute(_SELECT_TOTAL_SQL.format(where=where), params)
+        results["total"] = await cursor.fetchone()
+        for name, (sql, query_params) in _summary_queries(trip_id, splitwise_user_id).items():
+            await cursor.execute(sql, query_params)
+            results[name] = list(await cursor.fetchall())
+    return _shape(results, "trip" if splitwise_user_id is None else "user")
@@ -0,0 +1,95 @@
+import functools
+import logging
+from typing import Optional
+
+from cryptography.fernet import Fernet, InvalidToken
+
+from backend import async_db
+from backend.config import settings
+
+logger = logging.getLogger(__name__)
+
+_UPSERT_TOKENS_SQL = """
+    INSERT INTO user_tokens (user_id, access_token, access_token_secret)
+    VALUES (%s, %s, %s)
+    ON DUPLICATE KEY UPDATE
+        access_token        = VALUES(access_token),
+        access_token_secret = VALUES(access_token_secret)
+"""
+_DELETE_TOKENS_SQL = "DELETE FROM user_tokens WHERE user_id = %s"
+# Trips whose date range includes today, each with the stored tokens of its
+# members, most recently refreshed first.  One day of slack on either side
+# covers trips in time zones ahead of or behind the server.
+_SELECT_ACTIVE_TRIP_TOKENS_SQL = """
+    SELECT t.group_id, ut.user_id, ut.access_token, ut.access_token_secret
+    FROM trips t
+    JOIN user_tokens ut ON ut.user_id = t.user_id
+    WHERE t.group_id <> ''
+      AND t.start_date <= CURDATE() + INTERVAL 1 DAY
+      AND t.end_date >= CURDATE() - INTERVAL 1 DAY
+    ORDER BY t.group_id, ut.updated_at DESC
+"""
+
+
+@functools.lru_cache(maxsize=1)
+def _fernet() -> Optional[Fernet]:
+    if not settings.TOKEN_ENCRYPTION_KEY:
+        logger.warning("TOKEN_ENCRYPTION_KEY is not set: Splitwise tokens are not stored and scheduled sync is off")
+        return None
+    return Fernet(settings.TOKEN_ENCRYPTION_KEY.encode())
+
+
+def _encrypt(value: str) -> str:
+    return _fernet().encrypt(value.encode()).decode()
+
+
+def _decrypt(value: str) -> Optional[str]:
+    try:
+        return _fernet().decrypt(value.encode()).decode()
+    except InvalidToken:
+        return None
+
+
+def _first_per_group(rows) -> dict[str, tuple[int, str, str]]:
+    """Decrypt and keep each group's most recent usable token pair.
+
+    Rows that no longer decrypt (key rotated) are skipped.
+    """
+    credentials: dict[str, tuple[int, str, str]] = {}
+    for group_id, user_id, access_token, access_token_secret in rows:
+        if group_id in credentials:
+            continue
+        token, secret = _decrypt(access_token), _decrypt(access_token_secret)
+        if token is None or secret is None:
+            logger.warning("Stored tokens of user=%s do not decrypt with the current key, skipped", user_id)
+            continue
+        credentials[group_id] = (user_id, token, secret)
+    return credentials
+
+
+async def save_tokens_async(user_id: int, access_token: str, access_token_secret: str) -> None:
+    """Store (or replace) a user's Splitwise access token pair, encrypted.
+
+    A no-op when TOKEN_ENCRYPTION_KEY is not configured.
+    """
+    if _fernet() is None:
+        return
+    await async_db.execute(_UPSERT_TOKENS_SQL, (user_id, _encrypt(access_token), _encrypt(access_token_secret)))
+
+
+async def delete_tokens_async(user_id: int) -> None:
+    """Forget a user's stored tokens (logout, or Splitwise rejected them)."""
+    await async_db.execute(_DELETE_TOKENS_SQL, (user_id,))
+
+
+async def get_active_trip_credentials_async() -> dict[str, tuple[int, str, str]]:
+    """Return {group_id: (user_id, access_token, access_token_secret)} for active trips.
+
+    user_id is the member whose tokens are used.  Trips none of whose
+    members has stored tokens are left out.  Empty when
+    TOKEN_ENCRYPTION_KEY is not configured.
+    """
+    if _fernet() is None:
+        return {}
+    rows = await async_db.fetch_all(_SELECT_ACTIVE_TRIP_TOKENS_SQL, dictionary=False)
+    return _first_per_group(rows)
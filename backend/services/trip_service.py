@@ -1,26 +1,198 @@
 import logging
 from typing import Optional
 
+from backend import async_db, cache
+from backend.config import settings
 from backend.db import get_connection
+from backend.rows import RowMapper
+from backend.services import user_service
 
 logger = logging.getLogger(__name__)
 
+# SQL shared by the sync and async variants below
+_INSERT_TRIP_SQL = """
+    INSERT INTO trips (user_id, group_id, name, start_date, end_date, currencies, locations, created_by)
+    VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
+"""
+_UPDATE_TRIP_SQL = """
+    UPDATE trips
+    SET group_id   = %s,
+        name       = %s,
+        start_date = %s,
+        end_date   = %s,
+        currencies = %s,
+        locations  = %s
+    WHERE id = %s
+"""
+_SELECT_TRIP_SQL = (
+    "SELECT t.id, t.user_id, t.group_id, t.name, t.start_date, t.end_date, "
+    "t.currencies, t.locations, t.created_by, u.name AS created_by_name, "
+    # Whole-trip spend from the maintained summary buckets, not the expenses table
+    "(SELECT COALESCE(SUM(s.amount_inr), 0) FROM trip_summaries s WHERE s.trip_id = t.group_id) AS total_inr "
+    "FROM trips t LEFT JOIN users u ON t.created_by = u.id "
+)
+_SELECT_TRIPS_BY_USER_SQL = _SELECT_TRIP_SQL + "WHERE t.user_id = %s ORDER BY t.created_at DESC"
+_SELECT_TRIP_BY_ID_SQL = _SELECT_TRIP_SQL + "WHERE t.id = %s"
+# Rows just inserted by one multi-row INSERT: ids are >= its first lastrowid
+_SELECT_CREATED_TRIPS_SQL = _SELECT_TRIP_SQL + "WHERE t.group_id = %s AND t.id >= %s AND t.user_id IN ({})"
+_SELECT_MEMBER_IDS_SQL = "SELECT DISTINCT user_id FROM trips WHERE group_id = %s"
+_SELECT_EXISTING_MEMBER_IDS_SQL = "SELECT user_id FROM trips WHERE group_id = %s AND user_id IN ({})"
+# Run in order inside one transaction by delete_trip(_async), keyed by group_id
+_DELETE_GROUP_SQL = (
+    "DELETE FROM expenses WHERE trip_id = %s",
+    "DELETE FROM trip_sync_state WHERE trip_id = %s",
+    "DELETE FROM trip_summaries WHERE trip_id = %s",
+    # Delete trip rows for ALL members of this group, not just the creator's row
+    "DELETE FROM trips WHERE group_id = %s",
+)
+
+
+TRIP_ROWS = RowMapper({"start_date": str, "end_date": str, "total_inr": float})
+
+# get_trip_by_id runs for the creator check and again for the reload on
+# every update and delete.  Entries are tagged with their trip, group (whose
+# summary buckets feed total_inr) and creator (created_by_name).
+_trips_cache = cache.TaggedCache("trips", settings.LOOKUP_CACHE_MAX_ENTRIES, settings.LOOKUP_CACHE_TTL_SEC)
+
+
+def trip_tag(trip_id: int) -> str:
+    return f"trip:{trip_id}"
+
+
+def group_tag(group_id: str) -> str:
+    """Cache tag of every trip row of a Splitwise group (see backend/cache.py)."""
+    return f"trip_group:{group_id}"
+
+
+def _cache_trip(trip_id: int, row: Optional[dict], generation: int) -> Optional[dict]:
+    if not row:
+        return None
+    trip = _row_to_dict(row)
+    tags = [trip_tag(trip_id), group_tag(row["group_id"])]
+    if row.get("created_by"):
+        tags.append(user_service.user_tag(row["created_by"]))
+    _trips_cache.set(trip_id, trip, tags=tags, generation=generation)
+    return _copy_trip(trip)
+
+
+def _copy_trip(trip: dict) -> dict:
+    # Callers may modify the returned dict or its lists
+    return {**trip, "currencies": list(trip["currencies"]), "locations": list(trip["locations"])}
+
 
 def _row_to_dict(row: dict) -> dict:
-    """Convert a DB row to the frontend-friendly trip dict."""
+    """Convert a DB row (mapped by TRIP_ROWS) to the frontend-friendly trip dict."""
     return {
         "id": row["id"],
         "groupId": row["group_id"],
         "name": row["name"],
-        "start": str(row["start_date"]) if row["start_date"] else "",
-        "end": str(row["end_date"]) if row["end_date"] else "",
+        "start": row["start_date"] or "",
+        "end": row["end_date"] or "",
         "currencies": row["currencies"].split(",") if row["currencies"] else [],
         "locations": row["locations"].split(",") if row["locations"] else [],
         "created_by": row.get("created_by"),
         "created_by_name": row.get("created_by_name", ""),
+        "total_inr": row.get("total_inr") or 0.0,
     }
 
 
+def _insert_params(user_id: int, group_id: str, name: str,
+                   start_date: Optional[str], end_date: Optional[str],
+                   currencies: list[str], locations: list[str] | None,
+                   created_by: int | None) -> tuple:
+    currencies_csv = ",".join(currencies) if currencies else ""
+    locations_csv = ",".join(locations) if locations else ""
+    return (user_id, group_id, name,
+            start_date or None, end_date or None, currencies_csv, locations_csv,
+            created_by or user_id)
+
+
+def _update_params(trip_id: int, group_id: str, name: str,
+                   start_date: Optional[str], end_date: Optional[str],
+                   currencies: list[str], locations: list[str] | None) -> tuple:
+    currencies_csv = ",".join(currencies) if currencies else ""
+    locations_csv = ",".join(locations) if locations else ""
+    return (group_id, name,
+            start_date or None, end_date or None,
+            currencies_csv, locations_csv, trip_id)
+
+
+def _bulk_insert_sql(count: int) -> str:
+    values = ", ".join(["(%s, %s, %s, %s, %s, %s, %s, %s)"] * count)
+    return (
+        "INSERT INTO trips (user_id, group_id, name, start_date, end_date, currencies, locations, created_by) "
+        f"VALUES {values}"
+    )
+
+
+def _group_trip_user_ids(users: list[dict], created_by: int) -> list[int]:
+    """Local ids getting a trip row: every member, plus the creator."""
+    user_ids = [u["id"] for u in users]
+    if created_by not in user_ids:
+        user_ids.append(created_by)
+    return user_ids
+
+
+def _group_trip_statements(user_ids: list[int], created_by: int, group_id: str, name: str,
+                           start_date: Optional[str], end_date: Optional[str],
+                           currencies: list[str], locations: list[str] | None) -> tuple[str, list]:
+    params = [v for uid in user_ids
+              for v in _insert_params(uid, group_id, name, start_date, end_date,
+                                      currencies, locations, created_by)]
+    return _bulk_insert_sql(len(user_ids)), params
+
+
+def _existing_members_select(group_id: str, user_ids: list[int]) -> tuple[str, list]:
+    sql = _SELECT_EXISTING_MEMBER_IDS_SQL.format(", ".join(["%s"] * len(user_ids)))
+    return sql, [group_id, *user_ids]
+
+
+def _created_trips_select(group_id: str, first_id: int, user_ids: list[int]) -> tuple[str, list]:
+    sql = _SELECT_CREATED_TRIPS_SQL.format(", ".join(["%s"] * len(user_ids)))
+    return sql, [group_id, first_id, *user_ids]
+
+
+def create_group_trip(members: list[dict], created_by: int, group_id: str, name: str,
+                      start_date: Optional[str], end_date: Optional[str],
+                      currencies: list[str],
+                      locations: list[str] | None = None,
+                      skip_existing: bool = False) -> dict[int, dict]:
+    """Upsert a group's members and create a trip row for each of them (and the creator).
+
+    *members* are Splitwise profiles (splitwise_id, name, email).  Everything
+    runs in one transaction: a multi-row user upsert, one SELECT for their
+    ids, a multi-row trip INSERT and one SELECT for the created rows.  With
+    *skip_existing*, users who already hold a row for the group are left
+    alone, which makes the call safe to retry.
+    Returns {local user id: trip dict} for the rows created.
+    """
+    conn = get_connection()
+    try:
+        cursor = conn.cursor()
+        users = user_service.upsert_users_with_cursor(cursor, members)
+        user_ids = _group_trip_user_ids(users, created_by)
+        if skip_existing:
+            cursor.execute(*_existing_members_select(group_id, user_ids))
+            existing = {row[0] for row in cursor.fetchall()}
+            user_ids = [uid for uid in user_ids if uid not in existing]
+        rows = []
+        if user_ids:
+            insert_sql, insert_params = _group_trip_statements(
+                user_ids, created_by, group_id, name, start_date, end_date, currencies, locations)
+            cursor.execute(insert_sql, insert_params)
+            select_sql, select_params = _created_trips_select(group_id, cursor.lastrowid, user_ids)
+            cursor.execute(select_sql, select_params)
+            rows = TRIP_ROWS.fetchall(cursor)
+        conn.commit()
+        cursor.close()
+    finally:
+        conn.close()
+    user_service.invalidate_users(users)
+
+    logger.info("Trip rows created: group_id=%s members=%d", group_id, len(rows))
+    return {row["user_id"]: _row_to_dict(row) for row in rows}
+
+
 def create_trip(user_id: int, group_id: str, name: str,
                 start_date: Optional[str], end_date: Optional[str],
                 currencies: list[str],
@@ -28,19 +200,13 @@ def create_trip(user_id: int, group_id: str, name: str,
                 created_by: int | None = None) -> dict:
     """Insert a new trip for the given user and return it."""
     logger.debug("create_trip: user_id=%s group_id=%s name=%s", user_id, group_id, name)
-    currencies_csv = ",".join(currencies) if currencies else ""
-    locations_csv = ",".join(locations) if locations else ""
     conn = get_connection()
     try:
         cursor = conn.cursor()
         cursor.execute(
-            """
-            INSERT INTO trips (user_id, group_id, name, start_date, end_date, currencies, locations, created_by)
-            VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
-            """,
-            (user_id, group_id, name,
-             start_date or None, end_date or None, currencies_csv, locations_csv,
-             created_by or user_id),
+            _INSERT_TRIP_SQL,
+            _insert_params(user_id, group_id, name, start_date, end_date,
+                           currencies, locations, created_by),
         )
         trip_id = cursor.lastrowid
         conn.commit()
@@ -58,31 +224,19 @@ def update_trip(trip_id: int, group_id: str, name: str,
                 currencies: list[str],
                 locations: list[str] | None = None) -> dict:
     """Update an existing trip by its ID and return it."""
-    currencies_csv = ",".join(currencies) if currencies else ""
-    locations_csv = ",".join(locations) if locations else ""
     conn = get_connection()
     try:
         cursor = conn.cursor()
         cursor.execute(
-            """
-            UPDATE trips
-            SET group_id   = %s,
-                name       = %s,
-                start_date = %s,
-                end_date   = %s,
-                currencies = %s,
-                locations  = %s
-            WHERE id = %s
-            """,
-            (group_id, name,
-             start_date or None, end_date or None,
-             currencies_csv, locations_csv, trip_id),
+            _UPDATE_TRIP_SQL,
+            _update_params(trip_id, group_id, name, start_date, end_date, currencies, locations),
         )
         conn.commit()
         cursor.close()
     finally:
         conn.close()
 
+    cache.invalidate_tags(trip_tag(trip_id))
     return get_trip_by_id(trip_id)
 
 
@@ -90,15 +244,9 @@ def get_trips(user_id: int) -> list[dict]:
     """Return all trips for the given user."""
     conn = get_connection()
     try:
-        cursor = conn.cursor(dictionary=True)
-        cursor.execute(
-            "SELECT t.id, t.group_id, t.name, t.start_date, t.end_date, "
-            "t.currencies, t.locations, t.created_by, u.name AS created_by_name "
-            "FROM trips t LEFT JOIN users u ON t.created_by = u.id "
-            "WHERE t.user_id = %s ORDER BY t.created_at DESC",
-            (user_id,),
-        )
-        rows = cursor.fetchall()
+        cursor = conn.cursor()
+        cursor.execute(_SELECT_TRIPS_BY_USER_SQL, (user_id,))
+        rows = TRIP_ROWS.fetchall(cursor)
         cursor.close()
     finally:
         conn.close()
@@ -117,13 +265,8 @@ def delete_trip(trip_id: int) -> None:
         row = cursor.fetchone()
         if row:
             group_id = row["group_id"]
-            cursor.execute(
-                "DELETE FROM expenses WHERE trip_id = %s", (group_id,)
-            )
-            # Delete trip rows for ALL members of this group, not just the creator's row
-            cursor.execute(
-                "DELETE FROM trips WHERE group_id = %s", (group_id,)
-            )
+            for sql in _DELETE_GROUP_SQL:
+                cursor.execute(sql, (group_id,))
             logger.info("Deleted all trip rows and expenses for group_id=%s", group_id)
         else:
             logger.warning("delete_trip: trip_id=%s not found", trip_id)
@@ -131,26 +274,107 @@ def delete_trip(trip_id: int) -> None:
         cursor.close()
     finally:
         conn.close()
+    if row:
+        cache.invalidate_tags(group_tag(row["group_id"]))
+
+
+def get_member_user_ids(group_id: str) -> list[int]:
+    """Return the local user ids of everyone holding a trip row for a group."""
+    conn = get_connection()
+    try:
+        cursor = conn.cursor()
+        cursor.execute(_SELECT_MEMBER_IDS_SQL, (group_id,))
+        user_ids = [row[0] for row in cursor.fetchall()]
+        cursor.close()
+    finally:
+        conn.close()
+    return user_ids
 
 
 def get_trip_by_id(trip_id: int) -> Optional[dict]:
-    """Return a single trip by its primary key, or None."""
+    """Return a single trip by its primary key, or None (cached)."""
+    cached = _trips_cache.get(trip_id)
+    if cached is not None:
+        return _copy_trip(cached)
+    generation = _trips_cache.generation
     conn = get_connection()
     try:
-        cursor = conn.cursor(dictionary=True)
-        cursor.execute(
-            "SELECT t.id, t.group_id, t.name, t.start_date, t.end_date, "
-            "t.currencies, t.locations, t.created_by, u.name AS created_by_name "
-            "FROM trips t LEFT JOIN users u ON t.created_by = u.id "
-            "WHERE t.id = %s",
-            (trip_id,),
-        )
-        row = cursor.fetchone()
+        cursor = conn.cursor()
+        cursor.execute(_SELECT_TRIP_BY_ID_SQL, (trip_id,))
+        row = TRIP_ROWS.fetchone(cursor)
         cursor.close()
     finally:
         conn.close()
 
-    if not row:
-        return None
+    return _cache_trip(trip_id, row, generation)
+
+
+# ── Async variants (aiomysql) ──
+
+
+async def create_trip_async(user_id: int, group_id: str, name: str,
+                            start_date: Optional[str], end_date: Optional[str],
+                            currencies: list[str],
+                            locations: list[str] | None = None,
+                            created_by: int | None = None) -> dict:
+    """Async version of create_trip."""
+    _, trip_id = await async_db.execute(
+        _INSERT_TRIP_SQL,
+        _insert_params(user_id, group_id, name, start_date, end_date,
+                       currencies, locations, created_by),
+    )
+    result = await get_trip_by_id_async(trip_id)
+    logger.info("Trip row created: id=%s user_id=%s group_id=%s", trip_id, user_id, group_id)
+    return result
+
+
+async def update_trip_async(trip_id: int, group_id: str, name: str,
+                            start_date: Optional[str], end_date: Optional[str],
+                            currencies: list[str],
+                            locations: list[str] | None = None) -> dict:
+    """Async version of update_trip."""
+    await async_db.execute(
+        _UPDATE_TRIP_SQL,
+        _update_params(trip_id, group_id, name, start_date, end_date, currencies, locations),
+    )
+    cache.invalidate_tags(trip_tag(trip_id))
+    return await get_trip_by_id_async(trip_id)
+
+
+async def get_trips_async(user_id: int) -> list[dict]:
+    """Async version of get_trips."""
+    rows = await async_db.fetch_all(_SELECT_TRIPS_BY_USER_SQL, (user_id,), mapper=TRIP_ROWS)
+    return [_row_to_dict(r) for r in rows]
+
+
+async def delete_trip_async(trip_id: int) -> None:
+    """Async version of delete_trip."""
+    logger.info("delete_trip: trip_id=%s", trip_id)
+    async with async_db.transaction(dictionary=True) as cursor:
+        await cursor.execute("SELECT group_id FROM trips WHERE id = %s", (trip_id,))
+        row = await cursor.fetchone()
+        if row:
+            group_id = row["group_id"]
+            for sql in _DELETE_GROUP_SQL:
+                await cursor.execute(sql, (group_id,))
+            logger.info("Deleted all trip rows and expenses for group_id=%s", group_id)
+        else:
+            logger.warning("delete_trip: trip_id=%s not found", trip_id)
+    if row:
+        cache.invalidate_tags(group_tag(row["group_id"]))
+
+
+async def get_member_user_ids_async(group_id: str) -> list[int]:
+    """Async version of get_member_user_ids."""
+    rows = await async_db.fetch_all(_SELECT_MEMBER_IDS_SQL, (group_id,), dictionary=False)
+    return [row[0] for row in rows]
+
 
-    return _row_to_dict(row)
+async def get_trip_by_id_async(trip_id: int) -> Optional[dict]:
+    """Async version of get_trip_by_id."""
+    cached = _trips_cache.get(trip_id)
+    if cached is not None:
+        return _copy_trip(cached)
+    generation = _trips_cache.generation
+    row = await async_db.fetch_one(_SELECT_TRIP_BY_ID_SQL, (trip_id,), mapper=TRIP_ROWS)
+    return _cache_trip(trip_id, row, generation)
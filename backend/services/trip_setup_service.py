@@ -0,0 +1,62 @@
+import logging
+
+from requests_oauthlib import OAuth1Session
+
+from backend import jobs
+from backend.services import expense_service, splitwise_cache, splitwise_service, trip_service
+
+logger = logging.getLogger(__name__)
+
+TRIP_SETUP_JOB = "trip_setup"
+
+
+def group_members(groups_payload: dict, group_id: str) -> list[dict]:
+    """Splitwise profiles (splitwise_id, name, email) of one group's members."""
+    group = next(
+        (g for g in groups_payload.get("groups", []) if str(g.get("id")) == group_id), None
+    )
+    if not group:
+        return []
+    members = []
+    for member in group.get("members", []):
+        if not member.get("id"):
+            continue
+        first = member.get("first_name", "")
+        last = member.get("last_name", "")
+        members.append({
+            "splitwise_id": member.get("id"),
+            "name": f"{first} {last}".strip(),
+            "email": member.get("email", ""),
+        })
+    return members
+
+
+def run_trip_setup(payload: dict, context: dict) -> dict:
+    """Job handler: fan a new trip out to the group's members and run its first sync.
+
+    *payload* is {"trip": trip fields, "created_by": local user id}; *context*
+    carries the creator's OAuth session.  Every step is idempotent (existing
+    member rows are skipped, the sync upserts), so a failed attempt is simply
+    rerun by the job runner.
+    """
+    oauth: OAuth1Session = context["oauth"]
+    trip = payload["trip"]
+    group_id = trip["group_id"]
+
+    groups = splitwise_service.fetch_groups(oauth)
+    if "groups" not in groups:
+        raise RuntimeError(f"Splitwise get_groups failed: {groups.get('error') or groups.get('errors')}")
+    members = group_members(groups, group_id)
+    created = trip_service.create_group_trip(
+        members, created_by=payload["created_by"], skip_existing=True, **trip,
+    )
+
+    # Sync existing Splitwise expenses (skip "Payment" settlements)
+    sync = expense_service.sync_trip_expenses(oauth, group_id)
+
+    splitwise_cache.invalidate_groups(*trip_service.get_member_user_ids(group_id))
+    logger.info("Trip setup done: group_id=%s members_added=%d sync=%s", group_id, len(created), sync)
+    return {"group_id": group_id, "members_added": len(created), "sync": sync}
+
+
+jobs.register(TRIP_SETUP_JOB, run_trip_setup)
@@ -1,10 +1,74 @@
 import logging
 from typing import Optional
 
-from backend.db import get_connection
+from backend import async_db, cache
+from backend.config import settings
+from backend.db import bulk_insert, get_connection
+from backend.rows import RowMapper
 
 logger = logging.getLogger(__name__)
 
+# SQL shared by the sync and async variants below
+_UPSERT_USER_SQL = """
+    INSERT INTO users (splitwise_id, name, email)
+    VALUES (%s, %s, %s)
+    ON DUPLICATE KEY UPDATE
+        name  = VALUES(name),
+        email = VALUES(email)
+"""
+_SELECT_BY_SPLITWISE_ID_SQL = "SELECT id, splitwise_id, name, email FROM users WHERE splitwise_id = %s"
+_SELECT_BY_ID_SQL = "SELECT id, splitwise_id, name, email FROM users WHERE id = %s"
+
+USER_ROWS = RowMapper()
+
+# get_user_by_id runs on nearly every authenticated request
+_users_cache = cache.TaggedCache("users", settings.LOOKUP_CACHE_MAX_ENTRIES, settings.LOOKUP_CACHE_TTL_SEC)
+
+
+def user_tag(user_id: int) -> str:
+    """Cache tag of everything derived from one users row (see backend/cache.py)."""
+    return f"user:{user_id}"
+
+
+def invalidate_users(users: list[dict]) -> None:
+    """Drop cached data derived from *users*. Call after the write has committed."""
+    if users:
+        cache.invalidate_tags(*(user_tag(u["id"]) for u in users))
+
+
+def _cache_user(user_id: int, row: Optional[dict], generation: int) -> Optional[dict]:
+    # Callers may modify the returned dict, so the cache keeps its own copy
+    if row is None:
+        return None
+    _users_cache.set(user_id, dict(row), tags=(user_tag(user_id),), generation=generation)
+    return row
+
+
+_USER_COLUMNS = ("splitwise_id", "name", "email")
+
+
+def _member_rows(members: list[dict]) -> list[tuple]:
+    return [(m["splitwise_id"], m["name"], m["email"]) for m in members]
+
+
+def _select_members_sql(members: list[dict]) -> tuple[str, list]:
+    placeholders = ", ".join(["%s"] * len(members))
+    select_sql = f"SELECT id, splitwise_id, name, email FROM users WHERE splitwise_id IN ({placeholders})"
+    return select_sql, [m["splitwise_id"] for m in members]
+
+
+def _dedupe_members(members: list[dict]) -> list[dict]:
+    """Last entry wins for a repeated splitwise_id; first-seen order is kept."""
+    by_id: dict = {}
+    for m in members:
+        by_id[int(m["splitwise_id"])] = {**m, "splitwise_id": int(m["splitwise_id"])}
+    return list(by_id.values())
+
+
+def _in_member_order(members: list[dict], rows: list[dict]) -> list[dict]:
+    by_sw_id = {row["splitwise_id"]: row for row in rows}
+    return [by_sw_id[m["splitwise_id"]] for m in members if m["splitwise_id"] in by_sw_id]
+
 
 def upsert_user(splitwise_id: int, name: str, email: str) -> dict:
     """Insert or update a user based on their Splitwise ID.
@@ -14,22 +78,14 @@ def upsert_user(splitwise_id: int, name: str, email: str) -> dict:
     conn = get_connection()
     try:
         cursor = conn.cursor()
-        cursor.execute(
-            """
-            INSERT INTO users (splitwise_id, name, email)
-            VALUES (%s, %s, %s)
-            ON DUPLICATE KEY UPDATE
-                name  = VALUES(name),
-                email = VALUES(email)
-            """,
-            (splitwise_id, name, email),
-        )
+        cursor.execute(_UPSERT_USER_SQL, (splitwise_id, name, email))
         conn.commit()
         cursor.close()
     finally:
         conn.close()
 
     user = get_user_by_splitwise_id(splitwise_id)
+    invalidate_users([user] if user else [])
     logger.info("Upserted user: db_id=%s splitwise_id=%s name=%s", user["id"] if user else "-", splitwise_id, name)
     return user
 
@@ -39,10 +95,7 @@ def get_user_by_splitwise_id(splitwise_id: int) -> Optional[dict]:
     conn = get_connection()
     try:
         cursor = conn.cursor(dictionary=True)
-        cursor.execute(
-            "SELECT id, splitwise_id, name, email FROM users WHERE splitwise_id = %s",
-            (splitwise_id,),
-        )
+        cursor.execute(_SELECT_BY_SPLITWISE_ID_SQL, (splitwise_id,))
         row = cursor.fetchone()
         cursor.close()
     finally:
@@ -52,17 +105,60 @@ def get_user_by_splitwise_id(splitwise_id: int) -> Optional[dict]:
 
 
 def get_user_by_id(user_id: int) -> Optional[dict]:
-    """Return the local user record by primary key, or None."""
+    """Return the local user record by primary key, or None (cached)."""
+    cached = _users_cache.get(user_id)
+    if cached is not None:
+        return dict(cached)
+    generation = _users_cache.generation
     conn = get_connection()
     try:
         cursor = conn.cursor(dictionary=True)
-        cursor.execute(
-            "SELECT id, splitwise_id, name, email FROM users WHERE id = %s",
-            (user_id,),
-        )
+        cursor.execute(_SELECT_BY_ID_SQL, (user_id,))
         row = cursor.fetchone()
         cursor.close()
     finally:
         conn.close()
 
-    return row
+    return _cache_user(user_id, row, generation)
+
+
+def upsert_users_with_cursor(cursor, members: list[dict]) -> list[dict]:
+    """Upsert *members* with chunked multi-row statements on the caller's (tuple) cursor.
+
+    Runs inside the caller's transaction.  Returns the user records in
+    member order; pass them to ``invalidate_users`` once it has committed.
+    """
+    members = _dedupe_members(members)
+    if not members:
+        return []
+    bulk_insert(cursor, "users", _USER_COLUMNS, _member_rows(members), update_columns=("name", "email"))
+    select_sql, select_params = _select_members_sql(members)
+    cursor.execute(select_sql, select_params)
+    return _in_member_order(members, USER_ROWS.fetchall(cursor))
+
+
+# ── Async variants (aiomysql) ──
+
+
+async def upsert_user_async(splitwise_id: int, name: str, email: str) -> dict:
+    """Async version of upsert_user."""
+    await async_db.execute(_UPSERT_USER_SQL, (splitwise_id, name, email))
+    user = await get_user_by_splitwise_id_async(splitwise_id)
+    invalidate_users([user] if user else [])
+    logger.info("Upserted user: db_id=%s splitwise_id=%s name=%s", user["id"] if user else "-", splitwise_id, name)
+    return user
+
+
+async def get_user_by_splitwise_id_async(splitwise_id: int) -> Optional[dict]:
+    """Async version of get_user_by_splitwise_id."""
+    return await async_db.fetch_one(_SELECT_BY_SPLITWISE_ID_SQL, (splitwise_id,))
+
+
+async def get_user_by_id_async(user_id: int) -> Optional[dict]:
+    """Async version of get_user_by_id."""
+    cached = _users_cache.get(user_id)
+    if cached is not None:
+        return dict(cached)
+    generation = _users_cache.generation
+    return _cache_user(user_id, await async_db.fetch_one(_SELECT_BY_ID_SQL, (user_id,)), generation)
+
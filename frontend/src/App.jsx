@@ -1,5 +1,5 @@
 import React, { useState, useEffect, useCallback } from "react";
-import { checkLogin, fetchGroups, fetchCurrencies, createTripApi, updateTripApi, deleteTripApi, getTripsApi, flushOfflineQueue, getOfflineQueueCount } from "./api";
+import { checkLogin, fetchGroups, fetchCurrencies, createTripApi, updateTripApi, waitForJob, syncAllExpenses, deleteTripApi, getTripsApi, flushOfflineQueue, getOfflineQueueCount } from "./api";
 import Navbar from "./components/Navbar";
 import LoadingOverlay from "./components/LoadingOverlay";
 import TripSetupPage from "./components/TripSetupPage";
@@ -135,6 +135,8 @@ export default function App() {
           setCurrentUser(data.user);
           cacheSet(CACHE_KEYS.user, data.user);
           const [, groups, trips] = await Promise.all([loadCurrencies(), loadGroups(), loadTrips()]);
+          // Refresh every trip from Splitwise in the background, then the totals
+          syncAllExpenses().then(loadTrips).catch(() => {});
 
           // Auto-resume last opened trip
           const lastTripId = localStorage.getItem("lastTripId");
@@ -181,6 +183,15 @@ export default function App() {
     const saved = result.trip || details;
     // Refresh the trips list
     await loadTrips();
+    // Member fan-out and the first expense sync finish in the background
+    if (result.job_id) {
+      waitForJob(result.job_id)
+        .then((job) => {
+          if (job.status === "failed") console.warn("Trip setup failed:", job.error);
+          return loadTrips();
+        })
+        .catch((err) => console.warn("Trip setup status unavailable:", err));
+    }
     setSelectedTrip(saved);
     setPage(PAGES.MY_TRIPS);
   };
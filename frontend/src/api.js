@@ -62,7 +62,8 @@ export async function checkLogin() {
 }
 
 export async function fetchGroups() {
-  const res = await apiFetch(`/get_groups?t=${Date.now()}`);
+  // No cache-buster: the server sends an ETag and the browser revalidates
+  const res = await apiFetch("/get_groups");
   if (res.status === 401) {
     return { groups: [] };
   }
@@ -111,6 +112,23 @@ export async function createTripApi(details) {
   return res.json();
 }
 
+export async function fetchJob(jobId) {
+  const res = await apiFetch(`/jobs/${jobId}`);
+  if (!res.ok) throw new Error(`Job ${jobId}: HTTP ${res.status}`);
+  return (await res.json()).job;
+}
+
+// Poll a background job until it succeeds or fails; resolves with the final job.
+// Rejects after maxAttempts polls (about 3 minutes by default).
+export async function waitForJob(jobId, intervalMs = 1500, maxAttempts = 120) {
+  for (let attempt = 1; attempt <= maxAttempts; attempt++) {
+    const job = await fetchJob(jobId);
+    if (job.status === "succeeded" || job.status === "failed") return job;
+    if (attempt < maxAttempts) await new Promise((resolve) => setTimeout(resolve, intervalMs));
+  }
+  throw new Error(`Job ${jobId}: still running after ${maxAttempts} checks`);
+}
+
 export async function updateTripApi(tripId, details) {
   const res = await apiFetch(`/update_trip/${tripId}`, {
     method: "POST",
@@ -135,6 +153,15 @@ export async function fetchMyExpenses(groupId) {
   return res.json();
 }
 
+export async function fetchTripAnalytics(groupId, { scope = "user", dateFrom, dateTo, topN } = {}) {
+  const params = new URLSearchParams({ scope });
+  if (dateFrom) params.set("date_from", dateFrom);
+  if (dateTo) params.set("date_to", dateTo);
+  if (topN) params.set("top_n", topN);
+  const res = await apiFetch(`/trip_analytics/${groupId}?${params}`);
+  return res.json();
+}
+
 export async function fetchPersonalExpenses(groupId) {
   const res = await apiFetch(`/get_personal_expenses/${groupId}?t=${Date.now()}`);
   return res.json();
@@ -145,6 +172,12 @@ export async function syncExpenses(groupId) {
   return res.json();
 }
 
+// One account-wide delta sync covering all of the user's trips
+export async function syncAllExpenses() {
+  const res = await apiFetch("/sync_all_expenses", { method: "POST" });
+  return res.json();
+}
+
 export async function convertCurrency(from, to, amount) {
   if (!navigator.onLine) {
     const cached = getCachedRates();
@@ -220,3 +253,15 @@ export async function fetchEmergencyServices(location, category = "all") {
   );
   return res.json();
 }
+
+export async function fetchNearestEmergencyServices(lat, lon, category = "all", k = 10) {
+  const params = new URLSearchParams({ lat, lon, category, k });
+  const res = await apiFetch(`/emergency_services/nearest?${params}`);
+  return res.json();
+}
+
+export async function searchLocationsApi(query, limit = 10) {
+  const params = new URLSearchParams({ q: query, limit });
+  const res = await apiFetch(`/location_search?${params}`);
+  return res.json();
+}
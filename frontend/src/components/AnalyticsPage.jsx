@@ -1,5 +1,5 @@
 import React, { useState, useEffect, useCallback, useMemo } from "react";
-import { fetchMyExpenses, updateExpenseDetails, updateStayDates, syncExpenses } from "../api";
+import { fetchMyExpenses, fetchTripAnalytics, updateExpenseDetails, updateStayDates, syncExpenses } from "../api";
 
 const EXPENSE_CATEGORIES = [
   "Important Documents",
@@ -19,10 +19,6 @@ const EXPENSE_CATEGORIES = [
 
 const STAY_CATEGORIES = ["Stays - Hotel", "Stays - Hostel"];
 
-const GRAPH_EXCLUDED_CATEGORIES = [
-  "Transit - Flight",
-];
-
 const PIE_COLORS = [
   "#059669", "#0284c7", "#d97706", "#dc2626", "#7c3aed",
   "#db2777", "#0d9488", "#ca8a04", "#4f46e5", "#ea580c",
@@ -155,6 +151,7 @@ function StatCard({ label, value, sub }) {
 
 export default function AnalyticsPage({ tripDetails, currentUser, onBack }) {
   const [expenses, setExpenses] = useState([]);
+  const [analytics, setAnalytics] = useState(null);
   const [editState, setEditState] = useState({});
   const [stayEditState, setStayEditState] = useState({});
   const [saving, setSaving] = useState({});
@@ -163,17 +160,27 @@ export default function AnalyticsPage({ tripDetails, currentUser, onBack }) {
   const tripLocations = tripDetails?.locations || [];
   const groupId = tripDetails?.groupId;
 
-  const loadExpenses = useCallback(async () => {
+  const readExpenses = useCallback(async () => {
     if (!groupId) return;
     try {
-      await syncExpenses(groupId).catch(() => {});
-      const data = await fetchMyExpenses(groupId);
+      const [data, summary] = await Promise.all([
+        fetchMyExpenses(groupId),
+        fetchTripAnalytics(groupId),
+      ]);
       setExpenses(data.expenses || []);
+      setAnalytics(summary);
     } catch {
       /* ignore */
     }
   }, [groupId]);
 
+  // Render local data first; reload after the background sync finishes
+  const loadExpenses = useCallback(async () => {
+    if (!groupId) return;
+    await readExpenses();
+    syncExpenses(groupId).then(readExpenses).catch(() => {});
+  }, [groupId, readExpenses]);
+
   useEffect(() => {
     loadExpenses();
   }, [loadExpenses]);
@@ -193,116 +200,29 @@ export default function AnalyticsPage({ tripDetails, currentUser, onBack }) {
   );
   const allExpenses = expenses;
 
-  const grandTotal = useMemo(
-    () => allExpenses.reduce((s, e) => s + (e.amount_inr || 0), 0),
-    [allExpenses]
-  );
-
-  /* ── Grouping helpers ── */
-  const groupBy = useCallback((arr, keyFn) => {
-    const map = {};
-    arr.forEach((e) => {
-      const key = keyFn(e) || "Not set";
-      map[key] = (map[key] || 0) + (e.amount_inr || 0);
-    });
-    return Object.entries(map)
-      .map(([label, value]) => ({ label, value }))
-      .sort((a, b) => b.value - a.value);
-  }, []);
-
-  const byCategory = useMemo(
-    () => groupBy(allExpenses, (e) => e.category),
-    [allExpenses, groupBy]
-  );
-  const graphExpenses = useMemo(
-    () => allExpenses.filter((e) => !GRAPH_EXCLUDED_CATEGORIES.includes(e.category)),
-    [allExpenses]
-  );
-  const byLocation = useMemo(
-    () => groupBy(graphExpenses, (e) => e.location),
-    [graphExpenses, groupBy]
-  );
-  const byDate = useMemo(() => {
-    const map = {};
-    graphExpenses.forEach((e) => {
-      const amt = e.amount_inr || 0;
-      if (STAY_CATEGORIES.includes(e.category) && e.start_date && e.end_date && e.start_date !== e.end_date) {
-        const start = new Date(e.start_date);
-        const end = new Date(e.end_date);
-        const nights = Math.max(1, Math.round((end - start) / (1000 * 60 * 60 * 24)));
-        const perNight = amt / nights;
-        for (let d = new Date(start); d < end; d.setDate(d.getDate() + 1)) {
-          const key = d.toISOString().slice(0, 10);
-          map[key] = (map[key] || 0) + perNight;
-        }
-      } else {
-        const key = e.date || "Not set";
-        map[key] = (map[key] || 0) + amt;
-      }
-    });
-    return Object.entries(map)
-      .map(([label, value]) => ({ label, value }))
-      .sort((a, b) => b.value - a.value);
-  }, [graphExpenses]);
-
-  /* ── Stay per-night breakdown ── */
-  const stayPerNight = useMemo(() => {
-    const map = {};
-    stayExpenses.forEach((e) => {
-      const amt = e.amount_inr || 0;
-      if (e.start_date && e.end_date && e.start_date !== e.end_date) {
-        const start = new Date(e.start_date);
-        const end = new Date(e.end_date);
-        const nights = Math.max(1, Math.round((end - start) / (1000 * 60 * 60 * 24)));
-        const perNight = amt / nights;
-        for (let d = new Date(start); d < end; d.setDate(d.getDate() + 1)) {
-          const key = d.toISOString().slice(0, 10);
-          map[key] = (map[key] || 0) + perNight;
-        }
-      } else if (e.date) {
-        map[e.date] = (map[e.date] || 0) + amt;
-      }
-    });
-    return Object.entries(map)
-      .map(([label, value]) => ({ label, value }))
-      .sort((a, b) => a.label.localeCompare(b.label));
-  }, [stayExpenses]);
-
-  const stayAvgPerNight = useMemo(() => {
-    if (stayPerNight.length === 0) return 0;
-    const total = stayPerNight.reduce((s, d) => s + d.value, 0);
-    return total / stayPerNight.length;
-  }, [stayPerNight]);
-
-  /* ── Food per-day breakdown ── */
-  const foodPerDay = useMemo(() => {
-    const map = {};
-    expenses
-      .filter((e) => e.category === "Food")
-      .forEach((e) => {
-        const key = e.date || "Not set";
-        map[key] = (map[key] || 0) + (e.amount_inr || 0);
-      });
-    return Object.entries(map)
-      .map(([label, value]) => ({ label, value }))
-      .sort((a, b) => a.label.localeCompare(b.label));
-  }, [expenses]);
+  /* ── Aggregates (computed server-side in SQL) ── */
+  const grandTotal = analytics?.total.amount_inr || 0;
+  const expenseCount = analytics?.total.count || 0;
+  const byCategory = analytics?.by_category || [];
+  const byLocation = analytics?.by_location || [];
+  const byDate = analytics?.by_day || [];
+  const stayPerNight = analytics?.stay_per_night || [];
+  const foodPerDay = analytics?.food_per_day || [];
 
-  const foodAvgPerDay = useMemo(() => {
-    if (foodPerDay.length === 0) return 0;
-    const total = foodPerDay.reduce((s, d) => s + d.value, 0);
-    return total / foodPerDay.length;
-  }, [foodPerDay]);
+  const average = (data) =>
+    data.length === 0 ? 0 : data.reduce((s, d) => s + d.value, 0) / data.length;
+  const stayAvgPerNight = average(stayPerNight);
+  const foodAvgPerDay = average(foodPerDay);
 
   /* ── Detailed stats ── */
   const stats = useMemo(() => {
-    if (allExpenses.length === 0) return null;
-    const maxExpense = allExpenses.reduce((m, e) => (e.amount_inr || 0) > (m.amount_inr || 0) ? e : m, allExpenses[0]);
+    if (!analytics || analytics.top_expenses.length === 0) return null;
+    const maxExpense = analytics.top_expenses[0];
     const topCategory = byCategory[0] || { label: "—", value: 0 };
     const topLocation = byLocation[0] || { label: "—", value: 0 };
     const topDate = byDate[0] || { label: "—", value: 0 };
     return { maxExpense, topCategory, topLocation, topDate };
-  }, [allExpenses, byCategory, byLocation, byDate]);
+  }, [analytics, byCategory, byLocation, byDate]);
 
   const getEdit = (id) =>
     editState[id] || {};
@@ -604,10 +524,10 @@ export default function AnalyticsPage({ tripDetails, currentUser, onBack }) {
                 </p>
               </div>
               <div className="flex gap-4">
-                <StatCard label="Expenses" value={allExpenses.length} />
+                <StatCard label="Expenses" value={expenseCount} />
                 <StatCard
                   label="Avg / Expense"
-                  value={allExpenses.length > 0 ? (grandTotal / allExpenses.length).toFixed(0) : "0"}
+                  value={expenseCount > 0 ? (grandTotal / expenseCount).toFixed(0) : "0"}
                 />
               </div>
             </div>
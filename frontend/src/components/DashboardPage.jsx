@@ -4,6 +4,10 @@ import ExpenseForm from "./ExpenseForm";
 import BalancesPanel from "./BalancesPanel";
 import ExpenseHistory from "./ExpenseHistory";
 
+// The backend geocodes about one new place per second
+const COORDS_POLL_MS = 2000;
+const COORDS_MAX_POLLS = 30;
+
 export default function DashboardPage({
   activeGroup,
   availableCurrencies,
@@ -38,23 +42,34 @@ export default function DashboardPage({
     // eslint-disable-next-line react-hooks/exhaustive-deps
   }, [activeGroup.id]);
 
-  // Fetch and cache location coordinates for trip locations (lazy backfill)
+  // Fetch location coordinates for trip locations; names still being geocoded
+  // in the background come back as `pending` and are polled until resolved
   const locationsKey = (tripDetails?.locations || []).join(",");
   useEffect(() => {
     const locs = tripDetails?.locations || [];
     if (locs.length === 0) return;
-    console.log("[GeoDebug] Fetching coords for locations:", locs);
-    getLocationCoordsApi(locs)
-      .then((data) => {
-        console.log("[GeoDebug] Got location coords:", data.coords);
-        setLocationCoords(data.coords || []);
-      })
-      .catch((err) => console.warn("[GeoDebug] Failed to fetch location coords:", err));
+    let cancelled = false;
+    let timer = null;
+    let polls = 0;
+    const load = () => {
+      console.log("[GeoDebug] Fetching coords for locations:", locs);
+      getLocationCoordsApi(locs)
+        .then((data) => {
+          if (cancelled) return;
+          console.log("[GeoDebug] Got location coords:", data.coords, "pending:", data.pending);
+          setLocationCoords(data.coords || []);
+          if ((data.pending || []).length > 0 && polls++ < COORDS_MAX_POLLS) {
+            timer = setTimeout(load, COORDS_POLL_MS);
+          }
+        })
+        .catch((err) => console.warn("[GeoDebug] Failed to fetch location coords:", err));
+    };
+    load();
+    return () => { cancelled = true; clearTimeout(timer); };
     // eslint-disable-next-line react-hooks/exhaustive-deps
   }, [locationsKey]);
 
-  const loadHistory = useCallback(async () => {
-    await syncExpenses(activeGroup.id).catch(() => {});
+  const readHistory = useCallback(async () => {
     const [swData, personalData] = await Promise.all([
       fetchExpenses(activeGroup.id).catch(() => ({ expenses: [] })),
       fetchPersonalExpenses(activeGroup.id).catch(() => ({ expenses: [] })),
@@ -67,6 +82,12 @@ export default function DashboardPage({
     setCurrentExpenses(all);
   }, [activeGroup.id]);
 
+  // Show local rows immediately; refresh once the Splitwise sync lands
+  const loadHistory = useCallback(async () => {
+    await readHistory();
+    syncExpenses(activeGroup.id).then(readHistory).catch(() => {});
+  }, [activeGroup.id, readHistory]);
+
   useEffect(() => {
     loadHistory();
   }, [loadHistory]);
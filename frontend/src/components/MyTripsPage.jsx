@@ -90,6 +90,20 @@ export default function MyTripsPage({ allTrips, allGroups, onSelectTrip, onCreat
                   </div>
                 </div>
 
+                <div className="flex items-center gap-3">
+                  <div className="w-9 h-9 bg-rose-100 rounded-lg flex items-center justify-center">
+                    <svg className="w-4.5 h-4.5 text-rose-600" fill="none" stroke="currentColor" viewBox="0 0 24 24">
+                      <path strokeLinecap="round" strokeLinejoin="round" strokeWidth="2" d="M9 7h6m0 10v-3m-3 3h.01M9 17h.01M9 14h.01M12 14h.01M15 11h.01M12 11h.01M9 11h.01M7 21h10a2 2 0 002-2V5a2 2 0 00-2-2H7a2 2 0 00-2 2v14a2 2 0 002 2z" />
+                    </svg>
+                  </div>
+                  <div>
+                    <p className="text-xs text-gray-400 font-bold uppercase">Spent</p>
+                    <p className="text-sm font-semibold text-gray-800">
+                      INR {(trip.total_inr || 0).toFixed(0)}
+                    </p>
+                  </div>
+                </div>
+
                 <div className="flex items-center gap-3">
                   <div className="w-9 h-9 bg-purple-100 rounded-lg flex items-center justify-center">
                     <svg className="w-4.5 h-4.5 text-purple-600" fill="none" stroke="currentColor" viewBox="0 0 24 24">